@@ -0,0 +1,67 @@
+"""Benchmark finding Verma constraints in pure Python against ``causaleffect`` in R.
+
+Run with ``python scripts/benchmark_verma_constraints.py``. The comparison against R is
+skipped if :mod:`rpy2` or the R packages aren't available.
+"""
+
+import time
+
+import networkx as nx
+import pyparsing
+
+from y0.algorithm.verma_constraints import clear_verma_constraints_cache, get_verma_constraints
+from y0.examples import Example, examples
+
+
+def _get_examples() -> list[Example]:
+    return [example for example in examples if nx.is_directed_acyclic_graph(example.graph.directed)]
+
+
+def main() -> None:
+    """Time both implementations on the acyclic examples and check that they agree."""
+    acyclic_examples = _get_examples()
+
+    clear_verma_constraints_cache()
+    start = time.perf_counter()
+    python_constraints = {
+        example.name: get_verma_constraints(example.graph) for example in acyclic_examples
+    }
+    elapsed = time.perf_counter() - start
+    print(f"python: {len(acyclic_examples)} examples in {elapsed:.4f} s (cold cache)")  # noqa:T201
+
+    start = time.perf_counter()
+    for example in acyclic_examples:
+        get_verma_constraints(example.graph)
+    elapsed = time.perf_counter() - start
+    print(f"python: {len(acyclic_examples)} examples in {elapsed:.4f} s (warm cache)")  # noqa:T201
+
+    try:
+        from y0.causaleffect import r_get_verma_constraints
+        from y0.r_utils import CAUSALEFFECT, IGRAPH, prepare_renv
+
+        prepare_renv([CAUSALEFFECT, IGRAPH])
+    except Exception as e:  # noqa:BLE001
+        print(f"skipping the comparison against R: {e}")  # noqa:T201
+        return
+
+    elapsed = 0.0
+    for example in acyclic_examples:
+        start = time.perf_counter()
+        try:
+            r_constraints = r_get_verma_constraints(example.graph)
+        except pyparsing.ParseException:
+            print(f"R: can't parse the constraints for {example.name}")  # noqa:T201
+            continue
+        elapsed += time.perf_counter() - start
+        # causaleffect sometimes drops sums in the left hand side expression
+        expected = {constraint._replace(lhs_expr=None) for constraint in r_constraints}
+        actual = {
+            constraint._replace(lhs_expr=None) for constraint in python_constraints[example.name]
+        }
+        if expected != actual:
+            print(f"mismatch on {example.name}: R={expected} python={actual}")  # noqa:T201
+    print(f"R: {len(acyclic_examples)} examples in {elapsed:.4f} s")  # noqa:T201
+
+
+if __name__ == "__main__":
+    main()
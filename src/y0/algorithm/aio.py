@@ -0,0 +1,419 @@
+"""An :mod:`asyncio` facade for running identification algorithms in an event loop.
+
+Identification can take a long time, so calling :func:`y0.algorithm.identify.identify_outcomes`
+directly from a coroutine blocks the event loop. The :class:`IdentificationService` instead
+offloads each query to an executor (a thread pool by default), while:
+
+1. limiting how many queries run at the same time,
+2. coalescing identical queries that are in flight, so they share one computation,
+3. caching results in front of the executor, keyed by the graph's
+   :meth:`y0.graph.NxMixedGraph.fingerprint` and the query, and
+4. cancelling the computation when every coroutine awaiting it has been cancelled.
+
+.. code-block:: python
+
+    from y0.algorithm.aio import IdentificationService
+
+    async with IdentificationService(max_concurrency=4, timeout=5.0) as service:
+        estimand = await service.identify_outcomes(graph, treatments=X, outcomes=Y)
+
+The module-level functions, like :func:`aidentify_outcomes`, use a default service that is
+shared by all coroutines running in the same event loop.
+
+Computations are cancelled cooperatively through a :class:`y0.algorithm.budget.Budget`,
+so a cancelled computation stops at the algorithm's next recursive call. The same budget
+enforces the optional timeout, in which case :class:`y0.algorithm.budget.BudgetExceededError`
+is raised to the callers. When a :class:`concurrent.futures.ProcessPoolExecutor` is used,
+a computation that has already started can not be cancelled, but the timeout still applies.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, TypeVar
+from weakref import WeakKeyDictionary
+
+from .budget import Budget
+from .identify import id_star, idc_star, identify_outcomes
+from .transport import identify_target_outcomes
+from ..dsl import Event, Expression, Population, Variable
+from ..graph import NxMixedGraph, _ensure_set
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+__all__ = [
+    "IdentificationService",
+    "ServiceStatistics",
+    "aid_star",
+    "aidc_star",
+    "aidentify_outcomes",
+    "aidentify_target_outcomes",
+    "get_default_service",
+]
+
+X = TypeVar("X")
+CacheKey = tuple[Hashable, ...]
+
+
+def _variables_key(variables: Variable | Iterable[Variable] | None) -> tuple[str, ...]:
+    if variables is None:
+        return ()
+    return tuple(sorted(variable.to_y0() for variable in _ensure_set(variables)))
+
+
+def _event_key(event: Event) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((variable.to_y0(), value.to_y0()) for variable, value in event.items()))
+
+
+def _populations_key(
+    data: Mapping[Population, set[Variable]],
+) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    return tuple(
+        sorted(
+            (population.to_y0(), _variables_key(variables))
+            for population, variables in data.items()
+        )
+    )
+
+
+def _run_with_budget(
+    budget: Budget, func: Callable[..., X], args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> X:
+    with budget:
+        return func(*args, **kwargs)
+
+
+@dataclass
+class _Flight:
+    """A computation that is in flight, and the number of coroutines awaiting it."""
+
+    budget: Budget
+    task: asyncio.Task[Any] | None = None
+    waiters: int = 0
+
+
+@dataclass
+class ServiceStatistics:
+    """Counts of how queries to an :class:`IdentificationService` were answered."""
+
+    #: The number of queries answered from the results cache
+    hits: int = 0
+    #: The number of queries that started a new computation
+    misses: int = 0
+    #: The number of queries that joined a computation already in flight
+    coalesced: int = 0
+    #: The number of computations that were cancelled
+    cancelled: int = 0
+    #: The number of results currently in the cache
+    size: int = 0
+
+
+class IdentificationService:
+    """Run identification algorithms from an event loop without blocking it.
+
+    The service's caches are not thread safe, so it should only be used from one event loop.
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        *,
+        max_concurrency: int = 4,
+        cache_size: int | None = 1024,
+        timeout: float | None = None,
+    ) -> None:
+        """Instantiate the service.
+
+        :param executor: The executor that runs the algorithms. If none is given, a thread pool
+            with ``max_concurrency`` workers is created, which is shut down with the service.
+        :param max_concurrency: The maximum number of computations that run at the same time
+        :param cache_size: The maximum number of results to keep in the cache. Set to 0 to
+            disable the cache, or to None to keep all results.
+        :param timeout: The maximum number of seconds for each computation. Note that this
+            doesn't include the time a computation spends waiting for a free worker.
+        :raises ValueError: if the maximum concurrency is not positive
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency should be positive, got {max_concurrency}")
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="y0"
+        )
+        self.max_concurrency = max_concurrency
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.statistics = ServiceStatistics()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: OrderedDict[CacheKey, Any] = OrderedDict()
+        self._in_flight: dict[CacheKey, _Flight] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """Cancel all computations in flight and shut down the executor, if the service created it."""
+        for flight in self._in_flight.values():
+            flight.budget.cancel()
+            if flight.task is not None:
+                flight.task.cancel()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def clear_cache(self) -> None:
+        """Clear the results cache."""
+        self._cache.clear()
+        self.statistics.size = 0
+
+    async def identify_outcomes(
+        self,
+        graph: NxMixedGraph,
+        treatments: Variable | set[Variable],
+        outcomes: Variable | set[Variable],
+        conditions: Variable | set[Variable] | None = None,
+    ) -> Expression | None:
+        """Run :func:`y0.algorithm.identify.identify_outcomes` in the executor.
+
+        :param graph: An acyclic directed mixed graph
+        :param treatments: The node or nodes that are treated
+        :param outcomes: The node or nodes that are outcomes
+        :param conditions: Optional condition or condition nodes.
+        :returns: An expression representing the estimand if the query is identifiable,
+            otherwise none.
+        """
+        key = (
+            "identify_outcomes",
+            graph.fingerprint(),
+            _variables_key(treatments),
+            _variables_key(outcomes),
+            None if conditions is None else _variables_key(conditions),
+        )
+        return await self._submit(
+            key, identify_outcomes, graph, treatments, outcomes, conditions=conditions
+        )
+
+    async def id_star(self, graph: NxMixedGraph, event: Event) -> Expression:
+        """Run :func:`y0.algorithm.identify.id_star` in the executor.
+
+        :param graph: An acyclic directed mixed graph
+        :param event: The counterfactual event
+        :returns: An expression for the probability of the event
+        """
+        key = ("id_star", graph.fingerprint(), _event_key(event))
+        return await self._submit(key, id_star, graph, event)
+
+    async def idc_star(self, graph: NxMixedGraph, outcomes: Event, conditions: Event) -> Expression:
+        """Run :func:`y0.algorithm.identify.idc_star` in the executor.
+
+        :param graph: An acyclic directed mixed graph
+        :param outcomes: The outcome events
+        :param conditions: The condition events
+        :returns: An expression for the conditional probability of the outcomes
+        """
+        key = ("idc_star", graph.fingerprint(), _event_key(outcomes), _event_key(conditions))
+        return await self._submit(key, idc_star, graph, outcomes, conditions)
+
+    async def identify_target_outcomes(
+        self,
+        graph: NxMixedGraph,
+        *,
+        target_outcomes: set[Variable],
+        target_interventions: set[Variable],
+        surrogate_outcomes: dict[Population, set[Variable]],
+        surrogate_interventions: dict[Population, set[Variable]],
+    ) -> Expression | None:
+        """Run :func:`y0.algorithm.transport.identify_target_outcomes` in the executor.
+
+        :param graph: The graph of the target domain.
+        :param target_outcomes: A set of target variables for causal effects.
+        :param target_interventions: A set of interventions for the target domain.
+        :param surrogate_outcomes: A dictionary of outcomes in other populations
+        :param surrogate_interventions: A dictionary of interventions in other populations
+        :returns: An expression for the transported query, or none if it can't be transported
+        """
+        key = (
+            "identify_target_outcomes",
+            graph.fingerprint(),
+            _variables_key(target_outcomes),
+            _variables_key(target_interventions),
+            _populations_key(surrogate_outcomes),
+            _populations_key(surrogate_interventions),
+        )
+        return await self._submit(
+            key,
+            identify_target_outcomes,
+            graph,
+            target_outcomes=target_outcomes,
+            target_interventions=target_interventions,
+            surrogate_outcomes=surrogate_outcomes,
+            surrogate_interventions=surrogate_interventions,
+        )
+
+    async def _submit(self, key: CacheKey, func: Callable[..., X], *args: Any, **kwargs: Any) -> X:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.statistics.hits += 1
+            return self._cache[key]  # type:ignore
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            self.statistics.misses += 1
+            flight = _Flight(budget=Budget(timeout=self.timeout))
+            flight.task = asyncio.ensure_future(self._run(key, flight, func, args, kwargs))
+            self._in_flight[key] = flight
+        else:
+            self.statistics.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # shield the computation, so cancelling one caller doesn't affect the others
+            return await asyncio.shield(flight.task)  # type:ignore
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and flight.task is not None and not flight.task.done():
+                self.statistics.cancelled += 1
+                flight.budget.cancel()
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def _run(
+        self,
+        key: CacheKey,
+        flight: _Flight,
+        func: Callable[..., X],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> X:
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._semaphore:
+                rv = await loop.run_in_executor(
+                    self.executor,
+                    functools.partial(_run_with_budget, flight.budget, func, args, kwargs),
+                )
+        finally:
+            if self._in_flight.get(key) is flight:
+                del self._in_flight[key]
+        self._put(key, rv)
+        return rv
+
+    def _put(self, key: CacheKey, value: Any) -> None:
+        if self.cache_size == 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        if self.cache_size is not None:
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        self.statistics.size = len(self._cache)
+
+
+_DEFAULT_SERVICES: WeakKeyDictionary[asyncio.AbstractEventLoop, IdentificationService] = (
+    WeakKeyDictionary()
+)
+_DEFAULT_SERVICES_LOCK = threading.Lock()
+
+
+def get_default_service() -> IdentificationService:
+    """Get the service shared by the module-level functions, like :func:`aidentify_outcomes`.
+
+    Each event loop gets its own default service, since a service's semaphore and the
+    computations it has in flight are bound to the loop they were created in. The services
+    of loops that have been closed are shut down the next time this is called.
+
+    :returns: The default service of the running event loop
+    :raises RuntimeError: if there is no running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _DEFAULT_SERVICES_LOCK:
+        for other, service in list(_DEFAULT_SERVICES.items()):
+            if other.is_closed():
+                service.shutdown()
+                del _DEFAULT_SERVICES[other]
+        rv = _DEFAULT_SERVICES.get(loop)
+        if rv is None:
+            rv = _DEFAULT_SERVICES[loop] = IdentificationService()
+    return rv
+
+
+async def aidentify_outcomes(
+    graph: NxMixedGraph,
+    treatments: Variable | set[Variable],
+    outcomes: Variable | set[Variable],
+    conditions: Variable | set[Variable] | None = None,
+) -> Expression | None:
+    """Run :func:`y0.algorithm.identify.identify_outcomes` with the default service.
+
+    :param graph: An acyclic directed mixed graph
+    :param treatments: The node or nodes that are treated
+    :param outcomes: The node or nodes that are outcomes
+    :param conditions: Optional condition or condition nodes.
+    :returns: An expression representing the estimand if the query is identifiable,
+        otherwise none.
+    """
+    return await get_default_service().identify_outcomes(
+        graph, treatments, outcomes, conditions=conditions
+    )
+
+
+async def aid_star(graph: NxMixedGraph, event: Event) -> Expression:
+    """Run :func:`y0.algorithm.identify.id_star` with the default service.
+
+    :param graph: An acyclic directed mixed graph
+    :param event: The counterfactual event
+    :returns: An expression for the probability of the event
+    """
+    return await get_default_service().id_star(graph, event)
+
+
+async def aidc_star(graph: NxMixedGraph, outcomes: Event, conditions: Event) -> Expression:
+    """Run :func:`y0.algorithm.identify.idc_star` with the default service.
+
+    :param graph: An acyclic directed mixed graph
+    :param outcomes: The outcome events
+    :param conditions: The condition events
+    :returns: An expression for the conditional probability of the outcomes
+    """
+    return await get_default_service().idc_star(graph, outcomes, conditions)
+
+
+async def aidentify_target_outcomes(
+    graph: NxMixedGraph,
+    *,
+    target_outcomes: set[Variable],
+    target_interventions: set[Variable],
+    surrogate_outcomes: dict[Population, set[Variable]],
+    surrogate_interventions: dict[Population, set[Variable]],
+) -> Expression | None:
+    """Run :func:`y0.algorithm.transport.identify_target_outcomes` with the default service.
+
+    :param graph: The graph of the target domain.
+    :param target_outcomes: A set of target variables for causal effects.
+    :param target_interventions: A set of interventions for the target domain.
+    :param surrogate_outcomes: A dictionary of outcomes in other populations
+    :param surrogate_interventions: A dictionary of interventions in other populations
+    :returns: An expression for the transported query, or none if it can't be transported
+    """
+    return await get_default_service().identify_target_outcomes(
+        graph,
+        target_outcomes=target_outcomes,
+        target_interventions=target_interventions,
+        surrogate_outcomes=surrogate_outcomes,
+        surrogate_interventions=surrogate_interventions,
+    )
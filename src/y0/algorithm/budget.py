@@ -0,0 +1,238 @@
+"""Cooperative time and size budgets for identification and transport algorithms.
+
+The recursive algorithms in :mod:`y0.algorithm.identify`, :mod:`y0.algorithm.transport`,
+and :mod:`y0.algorithm.counterfactual_transport` can take a long time on adversarial graphs.
+A :class:`Budget` bounds them in-process. It is used as a context manager, and the algorithms
+check it each time they recur and each time they assemble a larger expression:
+
+.. code-block:: python
+
+    from y0.algorithm.budget import Budget, BudgetExceededError
+    from y0.algorithm.identify import identify_outcomes
+
+    try:
+        with Budget(timeout=0.5, max_recursions=10_000):
+            estimand = identify_outcomes(graph, treatments=X, outcomes=Y)
+    except BudgetExceededError as e:
+        print(e.reason, e.statistics.elapsed, e.statistics.recursions)
+
+Budgets are stored in a :class:`contextvars.ContextVar`, so budgets entered in different threads
+or :mod:`asyncio` tasks do not interfere with each other. When budgets are nested, the
+algorithms check the innermost budget and every budget that encloses it. A budget can also
+be cancelled from another thread with :meth:`Budget.cancel`, which makes the algorithm
+running inside it raise :class:`BudgetExceededError` at its next check.
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+from ..complexity import complexity
+from ..dsl import Expression
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+__all__ = [
+    "Budget",
+    "BudgetExceededError",
+    "BudgetStatistics",
+    "check_budget",
+    "get_current_budget",
+]
+
+_CURRENT_BUDGET: ContextVar[Budget | None] = ContextVar("y0_budget", default=None)
+
+
+@dataclass(frozen=True)
+class BudgetStatistics:
+    """A snapshot of how much of a budget has been consumed."""
+
+    #: The number of seconds elapsed since the budget was entered
+    elapsed: float
+    #: The number of recursive calls made since the budget was entered
+    recursions: int
+    #: The complexity of the largest expression observed, as calculated
+    #: by :func:`y0.complexity.complexity`. This is only tracked when a
+    #: maximum expression size has been set.
+    largest_expression: float
+
+
+class BudgetExceededError(Exception):
+    """Raised when an algorithm runs over its budget.
+
+    This intentionally does not subclass :class:`y0.algorithm.identify.Unidentifiable`,
+    since running out of budget says nothing about whether a query is identifiable.
+    """
+
+    def __init__(self, reason: str, statistics: BudgetStatistics) -> None:
+        """Instantiate the exception.
+
+        :param reason: A human-readable description of which limit was exceeded
+        :param statistics: The consumption of the budget when it was exceeded
+        """
+        super().__init__(reason, statistics)
+        self.reason = reason
+        self.statistics = statistics
+
+    def __str__(self) -> str:
+        return (
+            f"{self.reason} (elapsed={self.statistics.elapsed:.3f}s, "
+            f"recursions={self.statistics.recursions}, "
+            f"largest_expression={self.statistics.largest_expression})"
+        )
+
+
+class Budget:
+    """A context manager bounding the time, recursion, and expression size of an algorithm."""
+
+    def __init__(
+        self,
+        *,
+        timeout: float | None = None,
+        max_recursions: int | None = None,
+        max_expression_size: float | None = None,
+    ) -> None:
+        """Instantiate the budget.
+
+        :param timeout: The maximum number of seconds to spend inside the budget
+        :param max_recursions: The maximum number of recursive calls to make inside the budget
+        :param max_expression_size: The maximum complexity (as calculated by
+            :func:`y0.complexity.complexity`) of any intermediate expression
+        :raises ValueError: if any of the limits are not positive
+        """
+        for name, value in [
+            ("timeout", timeout),
+            ("max_recursions", max_recursions),
+            ("max_expression_size", max_expression_size),
+        ]:
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} should be positive, got {value}")
+        self.timeout = timeout
+        self.max_recursions = max_recursions
+        self.max_expression_size = max_expression_size
+        self.recursions = 0
+        self.largest_expression = 0.0
+        self._cancelled = False
+        self._start: float | None = None
+        self._parent: Budget | None = None
+        self._token: Token[Budget | None] | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Budget(timeout={self.timeout}, max_recursions={self.max_recursions}, "
+            f"max_expression_size={self.max_expression_size})"
+        )
+
+    def __enter__(self) -> Self:
+        if self._token is not None:
+            raise RuntimeError("a budget can not be entered more than once at a time")
+        self.recursions = 0
+        self.largest_expression = 0.0
+        self._start = time.perf_counter()
+        self._parent = _CURRENT_BUDGET.get()
+        self._token = _CURRENT_BUDGET.set(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._token is not None:
+            _CURRENT_BUDGET.reset(self._token)
+        self._token = None
+        self._parent = None
+
+    def cancel(self) -> None:
+        """Cancel the algorithm running inside this budget at its next check.
+
+        This is safe to call from a different thread than the one running the algorithm.
+        """
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        """Get if this budget has been cancelled."""
+        return self._cancelled
+
+    @property
+    def elapsed(self) -> float:
+        """Get the number of seconds elapsed since the budget was entered."""
+        if self._start is None:
+            return 0.0
+        return time.perf_counter() - self._start
+
+    @property
+    def statistics(self) -> BudgetStatistics:
+        """Get a snapshot of the consumption of this budget."""
+        return BudgetStatistics(
+            elapsed=self.elapsed,
+            recursions=self.recursions,
+            largest_expression=self.largest_expression,
+        )
+
+    def check(self, expression: Expression | None = None, *, recursion: bool = True) -> None:
+        """Account for a step of an algorithm and raise if this budget or any enclosing one is exceeded.
+
+        :param expression: An intermediate expression whose size should be checked
+        :param recursion: Should this check count as a recursive call?
+        """
+        budget: Budget | None = self
+        size = None
+        while budget is not None:
+            if expression is not None and budget.max_expression_size is not None and size is None:
+                size = complexity(expression)
+            budget._check(size, recursion=recursion)
+            budget = budget._parent
+
+    def _check(self, size: float | None, *, recursion: bool) -> None:
+        if recursion:
+            self.recursions += 1
+        if self._cancelled:
+            raise BudgetExceededError("cancelled", self.statistics)
+        if size is not None and size > self.largest_expression:
+            self.largest_expression = size
+        if self.max_recursions is not None and self.recursions > self.max_recursions:
+            raise BudgetExceededError(
+                f"exceeded maximum of {self.max_recursions} recursions", self.statistics
+            )
+        if (
+            self.max_expression_size is not None
+            and size is not None
+            and size > self.max_expression_size
+        ):
+            raise BudgetExceededError(
+                f"exceeded maximum expression size of {self.max_expression_size}",
+                self.statistics,
+            )
+        if self.timeout is not None and self.elapsed > self.timeout:
+            raise BudgetExceededError(
+                f"exceeded timeout of {self.timeout} seconds", self.statistics
+            )
+
+
+def get_current_budget() -> Budget | None:
+    """Get the innermost budget that has been entered in the current context, if any."""
+    return _CURRENT_BUDGET.get()
+
+
+def check_budget(expression: Expression | None = None, *, recursion: bool = True) -> None:
+    """Check the current budget, if one has been entered.
+
+    :param expression: An intermediate expression whose size should be checked
+    :param recursion: Should this check count as a recursive call? Set this to false
+        when only checking the size of an expression that has been assembled.
+    :raises BudgetExceededError: if the current budget or any enclosing one is exceeded
+
+    This is a no-op when no budget has been entered, so it is cheap to call
+    at the top of each recursive call of an algorithm.
+    """
+    budget = _CURRENT_BUDGET.get()
+    if budget is not None:
+        budget.check(expression, recursion=recursion)
@@ -0,0 +1,770 @@
+"""A persistent, on-disk cache for the results of identification and transport algorithms.
+
+Identification results are deterministic functions of the graph and the query, so they can be
+stored and shared between processes. The :class:`EstimandCache` stores them in a local SQLite
+database, keyed by the graph's :meth:`y0.graph.NxMixedGraph.fingerprint`, the query, the name
+of the algorithm, and a version string that changes whenever the algorithm's results could.
+
+.. code-block:: python
+
+    from y0.algorithm.cache import EstimandCache
+
+    with EstimandCache("estimands.sqlite", max_entries=100_000, max_age=7 * 24 * 60 * 60) as cache:
+        estimand = cache.identify_outcomes(graph, treatments=X, outcomes=Y)
+
+The database uses SQLite's write-ahead log, so many worker processes can read from and
+write to the same file at the same time. Each thread and process opens its own connection.
+Results are stored as zlib-compressed JSON, which is decoded into :mod:`y0.dsl` objects
+from a fixed set of types, so a database written by another process can't run code.
+
+The :class:`DSeparationCache` stores d-separation judgements in the same way, in memory and
+optionally in a SQLite database. Both caches evict the least recently used rows in batches.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar
+
+from .counterfactual_transport import (
+    CFTDomain,
+    ConditionalCFTResult,
+    UnconditionalCFTResult,
+    conditional_cft,
+    unconditional_cft,
+)
+from .identify import Identification, id_star, idc, identify_outcomes
+from .transport import TRSOQuery, trso
+from ..dsl import (
+    CounterfactualVariable,
+    Distribution,
+    Event,
+    Expression,
+    Fraction,
+    Intervention,
+    One,
+    Population,
+    PopulationProbability,
+    Probability,
+    Product,
+    QFactor,
+    Sum,
+    Variable,
+    Zero,
+)
+from ..graph import NxMixedGraph
+from ..struct import DSeparationJudgement
+from ..util.caching import LRUCache
+from ..version import get_version
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+__all__ = [
+    "ALGORITHM_VERSIONS",
+    "DSeparationCache",
+    "EstimandCache",
+    "event_key",
+    "populations_key",
+    "variables_key",
+]
+
+X = TypeVar("X")
+
+#: Versions of each algorithm's results. Bump one of these when a change to an algorithm
+#: changes its results, so previously cached results are no longer used.
+ALGORITHM_VERSIONS: dict[str, str] = {
+    "identify_outcomes": "1",
+    "idc": "1",
+    "id_star": "1",
+    "trso": "1",
+    "unconditional_cft": "1",
+    "conditional_cft": "1",
+}
+
+#: The format results are stored in. Results stored in other formats are never looked up,
+#: and are eventually evicted.
+_FORMAT = "json-1"
+
+#: The types that can appear in stored results
+_TYPES: dict[str, type[Any]] = {
+    cls.__name__: cls
+    for cls in [
+        Variable,
+        Intervention,
+        CounterfactualVariable,
+        Distribution,
+        Probability,
+        PopulationProbability,
+        Product,
+        Sum,
+        Fraction,
+        QFactor,
+        One,
+        Zero,
+        UnconditionalCFTResult,
+        ConditionalCFTResult,
+    ]
+}
+
+#: The number of writes after which a cache counts its rows, even if its approximate count
+#: doesn't exceed its maximum number of entries
+_EVICT_EVERY = 1024
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS estimands (
+    key TEXT PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS estimands_created ON estimands (created);
+CREATE INDEX IF NOT EXISTS estimands_accessed ON estimands (accessed);
+"""
+
+_D_SEPARATION_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS judgements (
+    key TEXT PRIMARY KEY,
+    separated INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS judgements_accessed ON judgements (accessed);
+"""
+
+
+def _encode(value: Any) -> Any:
+    """Encode a result as JSON-serializable data that :func:`_decode` turns back into it."""
+    if value is None or isinstance(value, str | int | float | bool):
+        return value
+    if isinstance(value, list):
+        return [_encode(element) for element in value]
+    if isinstance(value, tuple) and not hasattr(value, "_fields"):
+        return {"@": "tuple", "items": [_encode(element) for element in value]}
+    if isinstance(value, frozenset | set):
+        return {"@": "frozenset", "items": [_encode(element) for element in value]}
+    if isinstance(value, dict):
+        return {"@": "dict", "items": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    name = type(value).__name__
+    if _TYPES.get(name) is not type(value):
+        raise TypeError(f"can not store {type(value)} in the estimand cache")
+    if dataclasses.is_dataclass(value):
+        fields = {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+    elif hasattr(value, "_asdict"):
+        fields = value._asdict()
+    else:
+        fields = {}
+    return {"@": name, **{key: _encode(field) for key, field in fields.items()}}
+
+
+def _decode(data: Any) -> Any:
+    """Decode data made by :func:`_encode`, only instantiating types from a fixed set."""
+    if isinstance(data, list):
+        return [_decode(element) for element in data]
+    if not isinstance(data, dict):
+        return data
+    name = data["@"]
+    if name in {"tuple", "frozenset"}:
+        items = (_decode(element) for element in data["items"])
+        return tuple(items) if name == "tuple" else frozenset(items)
+    if name == "dict":
+        return {_decode(k): _decode(v) for k, v in data["items"]}
+    cls = _TYPES[name]
+    return cls(**{key: _decode(field) for key, field in data.items() if key != "@"})
+
+
+def variables_key(variables: Variable | Iterable[Variable] | None) -> list[str]:
+    """Get a canonical, JSON-serializable key for a set of variables."""
+    if variables is None:
+        return []
+    if isinstance(variables, Variable):
+        variables = [variables]
+    return sorted({variable.to_y0() for variable in variables})
+
+
+def event_key(event: Event | Iterable[tuple[Variable, Any]]) -> list[list[str]]:
+    """Get a canonical, JSON-serializable key for an event."""
+    items = event.items() if isinstance(event, Mapping) else event
+    return sorted(
+        [variable.to_y0(), "" if value is None else value.to_y0()] for variable, value in items
+    )
+
+
+def populations_key(data: Mapping[Population, Iterable[Variable]]) -> list[list[Any]]:
+    """Get a canonical, JSON-serializable key for variables associated with populations."""
+    return sorted(
+        [population.to_y0(), variables_key(variables)] for population, variables in data.items()
+    )
+
+
+def _trso_query_key(query: TRSOQuery) -> list[Any]:
+    return [
+        variables_key(query.target_interventions),
+        variables_key(query.target_outcomes),
+        query.expression.to_y0(),
+        variables_key(query.active_interventions),
+        query.domain.to_y0(),
+        variables_key(query.domains),
+        sorted(
+            [population.to_y0(), graph.fingerprint()] for population, graph in query.graphs.items()
+        ),
+        populations_key(query.surrogate_interventions),
+    ]
+
+
+def _domains_key(domains: Iterable[CFTDomain]) -> list[Any]:
+    return [
+        [
+            domain.graph.fingerprint(),
+            domain.population.to_y0(),
+            variables_key(domain.policy_variables),
+            None if domain.ordering is None else [node.to_y0() for node in domain.ordering],
+        ]
+        for domain in domains
+    ]
+
+
+class _SQLiteCache:
+    """Plumbing shared by caches that are stored in a SQLite database.
+
+    Each thread and process opens its own connection. Counting the rows takes time linear
+    in their number, so the size of the table is tracked approximately in memory instead of
+    being counted on every write. Once the tracked size exceeds ``max_entries`` (or after
+    :data:`_EVICT_EVERY` writes, which also picks up rows written by other processes), the
+    rows are counted and the least recently accessed ones are evicted down to 90% of
+    ``max_entries``, so the next eviction is a batch of writes away.
+    """
+
+    #: The name of the table, which needs an ``accessed`` column
+    table: ClassVar[str]
+    #: A script that creates the table and its indexes if they don't exist
+    schema: ClassVar[str]
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        *,
+        max_entries: int | None,
+        timeout: float,
+    ) -> None:
+        self.path = None if path is None else Path(path).expanduser().resolve()
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # the approximate number of rows, which is none until they're first counted
+        self._size: int | None = None
+        self._writes = 0
+        if self.path is not None:
+            # create the schema eagerly, so the file is valid as soon as the cache is constructed
+            self._connect()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        # connections can't be shared with a forked process
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        if self.path is None:
+            raise ValueError("cache doesn't have a database")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.executescript(self.schema)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        """Close this thread's connection to the database, if there is one."""
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
+
+    def _written(self, count: int) -> None:
+        """Track rows written to the database, and evict once they might be too many."""
+        with self._lock:
+            self._writes += count
+            if self._size is not None:
+                self._size += count
+            due = self._writes >= _EVICT_EVERY or (
+                self.max_entries is not None
+                and (self._size is None or self._size > self.max_entries)
+            )
+        if due:
+            self.evict()
+
+    def _evict_expired(self, connection: sqlite3.Connection) -> int:
+        """Evict expired rows, which is a hook for subclasses that have an expiry."""
+        return 0
+
+    def evict(self) -> int:
+        """Evict expired rows, and if there are too many, the least recently accessed rows.
+
+        :returns: The number of rows evicted
+        """
+        if self.path is None:
+            return 0
+        connection = self._connect()
+        rv = self._evict_expired(connection)
+        size = None
+        if self.max_entries is not None:
+            count_query = f"SELECT COUNT(*) FROM {self.table}"  # noqa:S608
+            (size,) = connection.execute(count_query).fetchone()
+            if size > self.max_entries:
+                # only the excess is looked up, using the index on the access time
+                cursor = connection.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "  # noqa:S608
+                    f"(SELECT key FROM {self.table} ORDER BY accessed LIMIT ?)",
+                    (size - self.max_entries + self.max_entries // 10,),
+                )
+                size -= cursor.rowcount
+                rv += cursor.rowcount
+        with self._lock:
+            self._size = size
+            self._writes = 0
+        return rv
+
+    def clear(self) -> None:
+        """Remove all rows and reset the statistics."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self._size = 0
+            self._writes = 0
+        if self.path is not None:
+            self._connect().execute(f"DELETE FROM {self.table}")  # noqa:S608
+
+
+class EstimandCache(_SQLiteCache):
+    """A persistent cache of estimands, stored in a SQLite database."""
+
+    table = "estimands"
+    schema = _SCHEMA
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        max_entries: int | None = None,
+        max_age: float | None = None,
+        timeout: float = 30.0,
+    ) -> None:
+        """Instantiate the cache.
+
+        :param path: The path to the SQLite database. It is created if it doesn't exist.
+        :param max_entries: The maximum number of results to keep. When exceeded, the least
+            recently used results are evicted.
+        :param max_age: The maximum age of results to keep, in seconds
+        :param timeout: The number of seconds to wait for a lock held by another process
+        """
+        self.max_age = max_age
+        super().__init__(path, max_entries=max_entries, timeout=timeout)
+
+    def __repr__(self) -> str:
+        return f"EstimandCache({str(self.path)!r})"
+
+    def __len__(self) -> int:
+        (count,) = self._connect().execute("SELECT COUNT(*) FROM estimands").fetchone()
+        return int(count)
+
+    @staticmethod
+    def make_key(algorithm: str, graph: NxMixedGraph | None, query: Any) -> str:
+        """Make a key for the result of an algorithm on a graph and query.
+
+        :param algorithm: The name of the algorithm
+        :param graph: The graph, if the query doesn't already contain one
+        :param query: A JSON-serializable, canonical representation of the query
+        :returns: A hex digest that also includes the versions of :mod:`y0` and the algorithm
+        """
+        payload = json.dumps(
+            [
+                algorithm,
+                _FORMAT,
+                get_version(),
+                ALGORITHM_VERSIONS.get(algorithm),
+                None if graph is None else graph.fingerprint(),
+                query,
+            ],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Look up a result.
+
+        :param key: A key made with :meth:`make_key`
+        :returns: A pair of whether the result was found and the result itself
+        """
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT value, created FROM estimands WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or (self.max_age is not None and row[1] < now - self.max_age):
+            with self._lock:
+                self.misses += 1
+            return False, None
+        connection.execute("UPDATE estimands SET accessed = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.hits += 1
+        return True, _decode(json.loads(zlib.decompress(row[0])))
+
+    def set(self, key: str, algorithm: str, value: Any) -> None:
+        """Store a result, then evict expired and excess results if they might be too many.
+
+        :param key: A key made with :meth:`make_key`
+        :param algorithm: The name of the algorithm
+        :param value: The result
+        :raises TypeError: if the result contains objects that can't be stored
+        """
+        blob = zlib.compress(json.dumps(_encode(value), separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO estimands (key, algorithm, version, value, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, algorithm, ALGORITHM_VERSIONS.get(algorithm, ""), blob, now, now),
+        )
+        self._written(1)
+
+    def _evict_expired(self, connection: sqlite3.Connection) -> int:
+        if self.max_age is None:
+            return 0
+        cursor = connection.execute(
+            "DELETE FROM estimands WHERE created < ?", (time.time() - self.max_age,)
+        )
+        return cursor.rowcount
+
+    def cached(
+        self,
+        algorithm: str,
+        graph: NxMixedGraph | None,
+        query: Any,
+        func: Callable[..., X],
+        *args: Any,
+        **kwargs: Any,
+    ) -> X:
+        """Look up the result of an algorithm, or calculate and store it.
+
+        :param algorithm: The name of the algorithm
+        :param graph: The graph, if the query doesn't already contain one
+        :param query: A JSON-serializable, canonical representation of the query
+        :param func: The function that calculates the result
+        :param args: Positional arguments to pass to the function
+        :param kwargs: Keyword arguments to pass to the function
+        :returns: The result
+
+        Exceptions, like :class:`y0.algorithm.identify.Unidentifiable`, are not cached.
+        """
+        key = self.make_key(algorithm, graph, query)
+        found, value = self.get(key)
+        if found:
+            return value  # type:ignore
+        value = func(*args, **kwargs)
+        self.set(key, algorithm, value)
+        return value
+
+    def identify_outcomes(
+        self,
+        graph: NxMixedGraph,
+        treatments: Variable | set[Variable],
+        outcomes: Variable | set[Variable],
+        conditions: Variable | set[Variable] | None = None,
+    ) -> Expression | None:
+        """Run :func:`y0.algorithm.identify.identify_outcomes` through the cache.
+
+        :param graph: An acyclic directed mixed graph
+        :param treatments: The node or nodes that are treated
+        :param outcomes: The node or nodes that are outcomes
+        :param conditions: Optional condition or condition nodes.
+        :returns: An expression representing the estimand if the query is identifiable,
+            otherwise none.
+        """
+        query = [
+            variables_key(treatments),
+            variables_key(outcomes),
+            None if conditions is None else variables_key(conditions),
+        ]
+        return self.cached(
+            "identify_outcomes",
+            graph,
+            query,
+            identify_outcomes,
+            graph,
+            treatments,
+            outcomes,
+            conditions=conditions,
+        )
+
+    def idc(self, identification: Identification) -> Expression:
+        """Run :func:`y0.algorithm.identify.idc` through the cache.
+
+        :param identification: The identification tuple
+        :returns: An expression created by the IDC algorithm
+        """
+        query = [
+            variables_key(identification.treatments),
+            variables_key(identification.outcomes),
+            variables_key(identification.conditions),
+            identification.estimand.to_y0(),
+        ]
+        return self.cached("idc", identification.graph, query, idc, identification)
+
+    def id_star(self, graph: NxMixedGraph, event: Event) -> Expression:
+        """Run :func:`y0.algorithm.identify.id_star` through the cache.
+
+        :param graph: An acyclic directed mixed graph
+        :param event: The counterfactual event
+        :returns: An expression for the probability of the event
+        """
+        return self.cached("id_star", graph, event_key(event), id_star, graph, event)
+
+    def trso(self, query: TRSOQuery) -> Expression | None:
+        """Run :func:`y0.algorithm.transport.trso` through the cache.
+
+        :param query: A TRSO query
+        :returns: An expression evaluating the given query, or none
+        """
+        return self.cached("trso", None, _trso_query_key(query), trso, query)
+
+    def unconditional_cft(
+        self,
+        *,
+        event: Variable | list[Variable],
+        target_domain_graph: NxMixedGraph,
+        domains: list[CFTDomain],
+    ) -> UnconditionalCFTResult | None:
+        """Run :func:`y0.algorithm.counterfactual_transport.unconditional_cft` through the cache.
+
+        :param event: The counterfactual variables (with values) in the query
+        :param target_domain_graph: a graph for the target domain.
+        :param domains: A list of :class:`y0.algorithm.counterfactual_transport.CFTDomain`
+        :returns: The result of the query, or none
+        """
+        query = [variables_key(event), _domains_key(domains)]
+        return self.cached(
+            "unconditional_cft",
+            target_domain_graph,
+            query,
+            unconditional_cft,
+            event=event,
+            target_domain_graph=target_domain_graph,
+            domains=domains,
+        )
+
+    def conditional_cft(
+        self,
+        *,
+        outcomes: Variable | list[Variable],
+        conditions: Variable | list[Variable],
+        target_domain_graph: NxMixedGraph,
+        domains: list[CFTDomain],
+    ) -> ConditionalCFTResult | None:
+        """Run :func:`y0.algorithm.counterfactual_transport.conditional_cft` through the cache.
+
+        :param outcomes: The counterfactual outcome variables (with values) in the query
+        :param conditions: The counterfactual condition variables (with values) in the query
+        :param target_domain_graph: a graph for the target domain.
+        :param domains: A list of :class:`y0.algorithm.counterfactual_transport.CFTDomain`
+        :returns: The result of the query, or none
+        """
+        query = [variables_key(outcomes), variables_key(conditions), _domains_key(domains)]
+        return self.cached(
+            "conditional_cft",
+            target_domain_graph,
+            query,
+            conditional_cft,
+            outcomes=outcomes,
+            conditions=conditions,
+            target_domain_graph=target_domain_graph,
+            domains=domains,
+        )
+
+
+#: A key for d-separation judgements, made from the graph's fingerprint, the pair of nodes,
+#: and the conditions
+_DSeparationKey = tuple[str, frozenset[Variable], frozenset[Variable]]
+
+
+class DSeparationCache(_SQLiteCache):
+    """A bounded cache of d-separation judgements that can be shared between threads.
+
+    Judgements are keyed by the graph's :meth:`y0.graph.NxMixedGraph.fingerprint`, the pair
+    of nodes (in either order), and the set of conditions. The least recently used judgements
+    are evicted from memory once there are more than ``maxsize``. If a path is given, all
+    judgements are also stored in a SQLite database, like in :class:`EstimandCache`, so they
+    can be reused by other processes and later runs. The judgements that were least recently
+    stored or read from the database are evicted from it in batches, once there might be
+    more than ``max_entries``.
+
+    .. code-block:: python
+
+        from y0.algorithm.cache import DSeparationCache
+        from y0.algorithm.conditional_independencies import get_conditional_independencies
+
+        cache = DSeparationCache(path="judgements.sqlite")
+        for graph in graphs:
+            judgements = get_conditional_independencies(graph, cache=cache)
+        print(cache.hits, cache.misses)
+
+    When a cache is sent to a worker process, like by
+    :func:`y0.algorithm.conditional_independencies.d_separations` with a
+    :class:`concurrent.futures.ProcessPoolExecutor`, the worker gets an empty copy that
+    uses the same database.
+    """
+
+    table = "judgements"
+    schema = _D_SEPARATION_SCHEMA
+
+    def __init__(
+        self,
+        maxsize: int | None = 2**16,
+        *,
+        path: str | Path | None = None,
+        max_entries: int | None = 2**20,
+        timeout: float = 30.0,
+    ) -> None:
+        """Instantiate the cache.
+
+        :param maxsize: The maximum number of judgements to keep in memory. If none, there's
+            no limit.
+        :param path: The path to an optional SQLite database. It is created if it doesn't exist.
+        :param max_entries: The maximum number of judgements to keep in the database. If none,
+            there's no limit.
+        :param timeout: The number of seconds to wait for a lock held by another process
+        """
+        self.maxsize = maxsize
+        self._judgements: LRUCache[_DSeparationKey, DSeparationJudgement] = LRUCache(maxsize)
+        super().__init__(path, max_entries=max_entries, timeout=timeout)
+
+    def __repr__(self) -> str:
+        return (
+            f"DSeparationCache(maxsize={self.maxsize!r}, path={self.path!r}, "
+            f"max_entries={self.max_entries!r})"
+        )
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "maxsize": self.maxsize,
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "timeout": self.timeout,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)  # type:ignore[misc]
+
+    def __len__(self) -> int:
+        return len(self._judgements)
+
+    @staticmethod
+    def _make_database_key(key: _DSeparationKey) -> str:
+        fingerprint, pair, conditions = key
+        payload = json.dumps(
+            [
+                fingerprint,
+                sorted(node.to_y0() for node in pair),
+                sorted(node.to_y0() for node in conditions),
+            ],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(
+        self, fingerprint: str, a: Variable, b: Variable, conditions: Iterable[Variable]
+    ) -> DSeparationJudgement | None:
+        """Look up a judgement.
+
+        :param fingerprint: The graph's fingerprint
+        :param a: A node in the graph
+        :param b: A node in the graph
+        :param conditions: A collection of graph nodes
+        :returns: The judgement, or none if it isn't in the cache
+        """
+        conditions = frozenset(conditions)
+        key: _DSeparationKey = fingerprint, frozenset((a, b)), conditions
+        rv = self._judgements.get(key)
+        if rv is not None:
+            with self._lock:
+                self.hits += 1
+            return rv
+        row = None
+        if self.path is not None:
+            database_key = self._make_database_key(key)
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT separated FROM judgements WHERE key = ?", (database_key,)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE judgements SET accessed = ? WHERE key = ?", (time.time(), database_key)
+                )
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        rv = DSeparationJudgement.create(
+            left=a, right=b, conditions=conditions, separated=bool(row[0])
+        )
+        self._judgements.set(key, rv)
+        with self._lock:
+            self.hits += 1
+        return rv
+
+    def update(self, fingerprint: str, judgements: Iterable[DSeparationJudgement]) -> None:
+        """Store judgements, then evict excess judgements from the database if there might be any.
+
+        :param fingerprint: The fingerprint of the graph the judgements are about
+        :param judgements: The judgements
+        """
+        items = [
+            ((fingerprint, frozenset((j.left, j.right)), frozenset(j.conditions)), j)
+            for j in judgements
+        ]
+        for key, judgement in items:
+            self._judgements.set(key, judgement)
+        if self.path is not None and items:
+            now = time.time()
+            connection = self._connect()
+            with connection:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    "INSERT OR REPLACE INTO judgements (key, separated, accessed) VALUES (?, ?, ?)",
+                    [
+                        (self._make_database_key(key), int(judgement.separated), now)
+                        for key, judgement in items
+                    ],
+                )
+            self._written(len(items))
+
+    def clear(self) -> None:
+        """Remove all judgements, including from the database, and reset the statistics."""
+        self._judgements.clear()
+        super().clear()
@@ -1,9 +1,17 @@
-"""An implementation to get conditional independencies of an ADMG from [pearl2009]_."""
+"""An implementation to get conditional independencies of an ADMG from [pearl2009]_.
 
-from collections.abc import Callable, Iterable, Sequence
+.. [richardson2003] `Markov Properties for Acyclic Directed Mixed Graphs
+   <https://doi.org/10.1111/1467-9469.00323>`_
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Mapping, MutableMapping, Sequence
+from concurrent.futures import Executor
 from functools import partial
-from itertools import combinations, groupby
-from typing import Any
+from itertools import groupby
+from typing import TYPE_CHECKING, Any, Literal
 
 import networkx as nx
 import pandas as pd
@@ -16,19 +24,39 @@ from ..struct import (
     CITest,
     CITestTuple,
     DSeparationJudgement,
+    DSeparationTable,
+    SetDSeparationJudgement,
     _ensure_method,
+    _sort_key,
 )
 from ..util.combinatorics import powerset
 
+if TYPE_CHECKING:
+    from .cache import DSeparationCache
+
 __all__ = [
+    "DSeparationBackend",
+    "DSeparationStrategy",
+    "add_ci_undirected_edges",
     "are_d_separated",
-    "minimal",
     "get_conditional_independencies",
+    "get_set_conditional_independencies",
+    "local_markov_separations",
+    "minimal",
+    "minimal_sets",
     "test_conditional_independencies",
-    "add_ci_undirected_edges",
 ]
 
 
+#: How to generate conditional independencies. ``"exhaustive"`` searches the powerset of
+#: the other nodes for a d-separation of each pair of nodes with :func:`d_separations`,
+#: ``"local_markov"`` reads a d-separation for each pair of nodes off of the graph with
+#: :func:`local_markov_separations`, and
+#: ``"separators"`` finds a separator for each pair of nodes with
+#: :func:`y0.algorithm.separation.separators.minimal_separations`.
+DSeparationStrategy = Literal["exhaustive", "local_markov", "separators"]
+
+
 def add_ci_undirected_edges(
     graph: NxMixedGraph,
     data: pd.DataFrame,
@@ -36,6 +64,7 @@ def add_ci_undirected_edges(
     method: CITest | None = None,
     significance_level: float | None = None,
     max_conditions: int | None = None,
+    strategy: DSeparationStrategy = "exhaustive",
 ) -> NxMixedGraph:
     """Add undirected edges between d-separated nodes that fail a data-driven conditional independency test.
 
@@ -51,6 +80,8 @@ def add_ci_undirected_edges(
         comparison with the p-value of the test to determine the independence of
         the tested variables. If none, defaults to 0.05.
     :param max_conditions: Longest set of conditions to investigate
+    :param strategy: How to generate conditional independencies,
+        see :func:`get_conditional_independencies`
     :returns: A copy of the input graph potentially with new undirected edges added
     """
     rv = graph.copy()
@@ -61,6 +92,7 @@ def add_ci_undirected_edges(
         boolean=True,
         significance_level=significance_level,
         max_conditions=max_conditions,
+        strategy=strategy,
     ):
         if not result:
             rv.add_undirected_edge(judgement.left, judgement.right)
@@ -76,6 +108,7 @@ def test_conditional_independencies(
     significance_level: float | None = None,
     _method_checked: bool = False,
     max_conditions: int | None = None,
+    strategy: DSeparationStrategy = "exhaustive",
 ) -> list[tuple[DSeparationJudgement, bool | CITestTuple]]:
     """Gets CIs with :func:`get_conditional_independencies` then tests them against data.
 
@@ -92,6 +125,8 @@ def test_conditional_independencies(
         comparison with the p-value of the test to determine the independence of
         the tested variables. If none, defaults to 0.05.
     :param max_conditions: Longest set of conditions to investigate
+    :param strategy: How to generate conditional independencies,
+        see :func:`get_conditional_independencies`
     :returns: A copy of the input graph potentially with new undirected edges added
     """
     if significance_level is None:
@@ -108,7 +143,9 @@ def test_conditional_independencies(
                 _method_checked=True,
             ),
         )
-        for judgement in get_conditional_independencies(graph, max_conditions=max_conditions)
+        for judgement in get_conditional_independencies(
+            graph, max_conditions=max_conditions, strategy=strategy
+        )
     ]
 
 
@@ -120,6 +157,7 @@ def get_conditional_independencies(
     *,
     policy: Policy | None = None,
     max_conditions: int | None = None,
+    strategy: DSeparationStrategy = "exhaustive",
     **kwargs: Any,
 ) -> set[DSeparationJudgement]:
     """Get the conditional independencies from the given ADMG.
@@ -128,19 +166,41 @@ def get_conditional_independencies(
     the unique left/right combinations in all valid d-separation.
 
     :param graph: An acyclic directed mixed graph
-    :param policy: Retention policy when more than one conditional independency option exists (see minimal for details)
+    :param policy: Retention policy when more than one conditional independency option exists
+        (see minimal for details). If none is given, uses the topological policy from
+        :func:`get_topological_policy` with :meth:`y0.struct.DSeparationTable.minimal`.
     :param max_conditions: Longest set of conditions to investigate
-    :param kwargs: Other keyword arguments are passed to :func:`d_separations`
+    :param strategy: How to generate conditional independencies. The exhaustive strategy
+        takes exponential time in the number of nodes, but finds a d-separation with the
+        fewest conditions for every pair of nodes that has one. The local Markov strategy
+        takes polynomial time and finds a d-separation for the same pairs, though not
+        always with the fewest conditions. The separators
+        strategy takes polynomial time and finds the same pairs as the exhaustive strategy,
+        each with a d-separation with the fewest conditions (though not always the same one).
+    :param kwargs: Other keyword arguments are passed to :func:`d_separations`,
+        :func:`local_markov_separations`, or
+        :func:`y0.algorithm.separation.separators.minimal_separations`
     :return: A set of conditional dependencies
+    :raises ValueError: if the strategy is unknown
 
     .. seealso:: Original issue https://github.com/y0-causal-inference/y0/issues/24
     """
+    if strategy == "exhaustive":
+        judgements = d_separations(graph, max_conditions=max_conditions, **kwargs)
+    elif strategy == "local_markov":
+        judgements = local_markov_separations(graph, max_conditions=max_conditions, **kwargs)
+    elif strategy == "separators":
+        # imported here since y0.algorithm.separation re-exports this module's are_d_separated
+        from .separation.separators import minimal_separations
+
+        judgements = minimal_separations(graph, max_conditions=max_conditions, **kwargs)
+    else:
+        raise ValueError(f"unknown d-separation strategy: {strategy}")
     if policy is None:
-        policy = get_topological_policy(graph)
-    return minimal(
-        d_separations(graph, max_conditions=max_conditions, **kwargs),
-        policy=policy,
-    )
+        # same as minimal() with the topological policy, but vectorized
+        table = DSeparationTable.from_judgements(judgements, nodes=graph.nodes())
+        return set(table.minimal(order=graph.topological_sort()).to_judgements())
+    return minimal(judgements, policy=policy)
 
 
 def minimal(
@@ -166,6 +226,112 @@ def minimal(
     return {min(vs, key=policy) for k, vs in groupby(judgements, _judgement_grouper)}
 
 
+def get_set_conditional_independencies(
+    graph: NxMixedGraph,
+    *,
+    max_conditions: int | None = None,
+    strategy: DSeparationStrategy = "exhaustive",
+    **kwargs: Any,
+) -> set[SetDSeparationJudgement]:
+    """Get conditional independencies between sets of nodes from the given ADMG.
+
+    This gets the conditional independencies between pairs of nodes with
+    :func:`get_conditional_independencies`, then merges the ones with the same conditions
+    with :func:`minimal_sets`, using the graph to add any other nodes that are also
+    d-separated. Each resulting judgement can be tested with a single multivariate test,
+    like :func:`y0.struct.partial_canonical_correlation`, instead of one test per pair.
+
+    :param graph: An acyclic directed mixed graph
+    :param max_conditions: Longest set of conditions to investigate
+    :param strategy: How to generate conditional independencies between pairs of nodes,
+        see :func:`get_conditional_independencies`
+    :param kwargs: Other keyword arguments are passed to :func:`get_conditional_independencies`
+    :return: A set of conditional independencies between sets of nodes, which imply all of
+        the ones between pairs of nodes
+    """
+    judgements = get_conditional_independencies(
+        graph, max_conditions=max_conditions, strategy=strategy, **kwargs
+    )
+    return minimal_sets(judgements, graph=graph)
+
+
+def minimal_sets(
+    judgements: Iterable[DSeparationJudgement | SetDSeparationJudgement],
+    *,
+    graph: NxMixedGraph | None = None,
+) -> set[SetDSeparationJudgement]:
+    """Merge d-separations with the same conditions into a few d-separations between sets of nodes.
+
+    Two sets of nodes are d-separated if and only if each pair of nodes from them is, so for
+    each set of conditions, the pairs of nodes that are d-separated given it are covered
+    greedily by pairs of sets whose nodes are all d-separated from each other. Each pair is
+    grown from its own nodes by adding the other nodes (in sorted order) to whichever side
+    they're d-separated from.
+
+    :param judgements: Judgements to merge. Ones that aren't separated are skipped.
+    :param graph: The graph the judgements come from. If given, any node in the graph can be
+        added to a side, as long as it's d-separated from the other side given the conditions.
+        Otherwise, only the pairs of nodes in the judgements are known to be d-separated.
+    :return: A set of judgements between sets of nodes that imply all of the given ones
+    """
+    groups: defaultdict[tuple[Variable, ...], set[frozenset[Variable]]] = defaultdict(set)
+    for judgement in judgements:
+        if not judgement.separated:
+            continue
+        if isinstance(judgement, SetDSeparationJudgement):
+            for pair in judgement.to_judgements():
+                groups[pair.conditions].add(frozenset((pair.left, pair.right)))
+        else:
+            groups[judgement.conditions].add(frozenset((judgement.left, judgement.right)))
+
+    if graph is not None:
+        # imported here since y0.algorithm.separation re-exports this module's are_d_separated
+        from .separation.m_separation import are_m_separated
+
+    rv = set()
+    for conditions, pairs in groups.items():
+        if graph is None:
+            candidates = set().union(*pairs)
+            is_separated = partial(_are_pairs_separated, pairs)
+        else:
+            candidates = set(graph.nodes()).difference(conditions)
+            is_separated = partial(are_m_separated, graph, conditions=conditions)
+        for left, right in _cover_pairs(pairs, candidates, is_separated):
+            rv.add(SetDSeparationJudgement.create(left, right, conditions))
+    return rv
+
+
+def _are_pairs_separated(
+    pairs: set[frozenset[Variable]], node: Variable, others: list[Variable]
+) -> bool:
+    """Check if the node makes a separated pair with each of the other nodes."""
+    return all(frozenset((node, other)) in pairs for other in others)
+
+
+def _cover_pairs(
+    pairs: set[frozenset[Variable]],
+    candidates: Iterable[Variable],
+    is_separated: Callable[[Variable, list[Variable]], bool],
+) -> Iterable[tuple[list[Variable], list[Variable]]]:
+    """Greedily cover the separated pairs with pairs of sets whose nodes are all separated."""
+    ordered = sorted(candidates, key=_sort_key)
+    covered: set[frozenset[Variable]] = set()
+    for pair in sorted(pairs, key=lambda pair: sorted(map(_sort_key, pair))):
+        if pair in covered:
+            continue
+        a, b = sorted(pair, key=_sort_key)
+        left, right = [a], [b]
+        for node in ordered:
+            if node in pair:
+                continue
+            if is_separated(node, right):
+                left.append(node)
+            elif is_separated(node, left):
+                right.append(node)
+        covered.update(frozenset((x, y)) for x in left for y in right)
+        yield left, right
+
+
 def get_topological_policy(
     graph: NxMixedGraph,
 ) -> Callable[[DSeparationJudgement], tuple[int, int]]:
@@ -177,16 +343,16 @@ def get_topological_policy(
     :param graph: a mixed graph
     :return: A function suitable for use as a sort key on d-separations
     """
-    order = list(graph.topological_sort())
-    return partial(_topological_policy, order=order)
+    positions = {node: i for i, node in enumerate(graph.topological_sort())}
+    return partial(_topological_policy, positions=positions)
 
 
 def _topological_policy(
-    judgement: DSeparationJudgement, order: Sequence[Variable]
+    judgement: DSeparationJudgement, positions: Mapping[Variable, int]
 ) -> tuple[int, int]:
     return (
         len(judgement.conditions),
-        sum(order.index(v) for v in judgement.conditions),
+        sum(positions[v] for v in judgement.conditions),
     )
 
 
@@ -200,12 +366,22 @@ def _len_lex(judgement: DSeparationJudgement) -> tuple[int, str]:
     return len(judgement.conditions), ",".join(c.name for c in judgement.conditions)
 
 
-def are_d_separated(
+#: How to check d-separation. ``"bayes_ball"`` searches the graph for open paths with
+#: :func:`y0.algorithm.separation.m_separation.are_m_separated` and ``"moral"`` checks
+#: for a path in the moralized ancestral graph.
+DSeparationBackend = Literal["bayes_ball", "moral"]
+
+
+def are_d_separated(  # noqa:C901
     graph: NxMixedGraph,
     a: Variable,
     b: Variable,
     *,
     conditions: Iterable[Variable] | None = None,
+    backend: DSeparationBackend = "bayes_ball",
+    moral_cache: MutableMapping[frozenset[Variable], nx.Graph] | None = None,
+    cache: DSeparationCache | None = None,
+    fingerprint: str | None = None,
 ) -> DSeparationJudgement:
     """Test if nodes named by a & b are d-separated in G as described in [pearl2009]_.
 
@@ -216,11 +392,32 @@ def are_d_separated(
     :param a: A node in the graph
     :param b: A node in the graph
     :param conditions: A collection of graph nodes
+    :param backend: How to check d-separation. Both give the same judgements, but
+        ``"bayes_ball"`` takes linear time and doesn't construct any intermediate graphs.
+    :param moral_cache: A mapping from sets of ancestors to their moralized graphs, which
+        is used and filled by the ``"moral"`` backend. Since the moralized graph only
+        depends on the ancestors of a, b, and the conditions, it can be reused across
+        calls whose conditions have the same ancestors, as long as the graph is the same.
+    :param cache: A cache of judgements to look this one up in, and to store it in if
+        it isn't there yet
+    :param fingerprint: The graph's :meth:`y0.graph.NxMixedGraph.fingerprint`, which is used
+        to look up judgements in the cache. Fingerprinting takes longer than checking
+        d-separation, so pass it when making many queries on the same graph. If none is
+        given, it's calculated when a cache is given.
     :return: T/F and the final graph (as evidence)
     :raises TypeError: if the left/right arguments or any conditions are
         not Variable instances
     :raises KeyError: if the left/right arguments or any conditions are
         not in the graph
+    :raises ValueError: if the backend is unknown
+
+    .. note::
+
+        Bidirected edges are treated like latent common causes, so this checks
+        m-separation in ADMGs. Before the ``backend`` argument was added, moralization
+        only linked parents of colliders joined by directed edges, so paths of colliders
+        joined by bidirected edges were missed. For example, in ``A -> B <-> C``, A and C
+        were wrongly judged to be d-separated given B.
 
     .. seealso:: NetworkX implementation :func:`nx.d_separated`
     """
@@ -241,14 +438,50 @@ def are_d_separated(
     if missing_conditions:
         raise KeyError(f"conditions missing from graph: {missing_conditions}")
 
-    named = {a, b}.union(conditions)
+    if backend not in {"bayes_ball", "moral"}:
+        raise ValueError(f"unknown d-separation backend: {backend}")
+    if cache is None:
+        return _are_d_separated(graph, a, b, conditions, backend=backend, moral_cache=moral_cache)
+
+    if fingerprint is None:
+        fingerprint = graph.fingerprint()
+    rv = cache.get(fingerprint, a, b, conditions)
+    if rv is None:
+        rv = _are_d_separated(graph, a, b, conditions, backend=backend, moral_cache=moral_cache)
+        cache.update(fingerprint, [rv])
+    return rv
 
-    # Filter to ancestors
-    keep = graph.ancestors_inclusive(named)
-    evidence_graph = graph.subgraph(keep).moralize().disorient()
 
-    keep = set(evidence_graph.nodes) - set(conditions)
-    evidence_graph = evidence_graph.subgraph(keep)
+def _are_d_separated(
+    graph: NxMixedGraph,
+    a: Variable,
+    b: Variable,
+    conditions: set[Variable],
+    *,
+    backend: DSeparationBackend,
+    moral_cache: MutableMapping[frozenset[Variable], nx.Graph] | None,
+) -> DSeparationJudgement:
+    if backend == "bayes_ball":
+        # imported here since y0.algorithm.separation re-exports this module's are_d_separated
+        from .separation.m_separation import are_m_separated
+
+        separated = are_m_separated(graph, a, b, conditions=conditions)
+        return DSeparationJudgement.create(
+            left=a, right=b, conditions=conditions, separated=separated
+        )
+
+    # Filter to ancestors, then link nodes that are connected by a path of colliders
+    keep = frozenset(graph.ancestors_inclusive({a, b}.union(conditions)))
+    evidence_graph = None if moral_cache is None else moral_cache.get(keep)
+    if evidence_graph is None:
+        # imported here since y0.algorithm.separation re-exports this module's are_d_separated
+        from .separation.separators import _get_augmented_graph
+
+        evidence_graph = _get_augmented_graph(graph, keep)
+        if moral_cache is not None:
+            moral_cache[keep] = evidence_graph
+
+    evidence_graph = evidence_graph.subgraph(keep - conditions)
 
     # check for path....
     separated = not nx.has_path(evidence_graph, a, b)  # If no path, then d-separated!
@@ -262,26 +495,195 @@ def d_separations(
     max_conditions: int | None = None,
     verbose: bool | None = False,
     return_all: bool | None = False,
+    backend: DSeparationBackend = "bayes_ball",
+    executor: Executor | None = None,
+    cache: DSeparationCache | None = None,
+    fingerprint: str | None = None,
 ) -> Iterable[DSeparationJudgement]:
     """Generate d-separations in the provided graph.
 
+    Rather than checking each left/right pair given each set of conditions, this finds all
+    right nodes that are d-separated from each left node given each set of conditions in a
+    single search with :func:`y0.algorithm.separation.m_separation.get_m_separated`. Adjacent
+    nodes are never d-separated, so their pairs are skipped.
+
     :param graph: Graph to search for d-separations.
     :param max_conditions: Longest set of conditions to investigate
     :param return_all: If false (default) only returns the first d-separation per left/right pair.
+        Since sets of conditions are checked from smallest to largest, this is one with the
+        fewest conditions.
     :param verbose: If true, prints extra output with tqdm
+    :param backend: How to check d-separation. With ``"moral"``, each pair is checked with
+        :func:`are_d_separated`, and the moralized graphs are cached by their ancestors.
+    :param executor: An executor, like a :class:`concurrent.futures.ProcessPoolExecutor`,
+        in which the d-separations of each left node are searched for. Each left node is
+        independent of the others, so they're searched in parallel, and the progress bar
+        counts the left nodes that are done across all workers. The judgements are yielded
+        in the same order as without an executor.
+    :param cache: A cache of judgements. Only the pairs whose judgements given each set of
+        conditions aren't in the cache are searched for, and their judgements (both separated
+        and not) are stored in it.
+    :param fingerprint: The graph's :meth:`y0.graph.NxMixedGraph.fingerprint`, which is used
+        to look up judgements in the cache. If none is given, it's calculated once when a
+        cache is given.
     :yields: True d-separation judgements
     """
-    vertices = set(graph.nodes())
-    for a, b in tqdm(
-        combinations(vertices, 2),
+    vertices = list(graph.nodes())
+    func = partial(
+        _d_separations_from_left,
+        graph,
+        vertices=vertices,
+        max_conditions=max_conditions,
+        return_all=return_all,
+        backend=backend,
+        cache=cache,
+        fingerprint=None if cache is None else fingerprint or graph.fingerprint(),
+    )
+    if executor is None:
+        # share the moralized graphs across all left nodes
+        results: Iterable[list[DSeparationJudgement]] = map(
+            partial(func, moral_cache={}), range(len(vertices))
+        )
+    else:
+        results = executor.map(func, range(len(vertices)))
+    for judgements in tqdm(
+        results,
         disable=not verbose,
         desc="Checking d-separations",
-        unit="pair",
-        total=len(vertices) * (len(vertices) - 1) // 2,
+        unit="node",
+        total=len(vertices),
     ):
-        for conditions in powerset(vertices - {a, b}, stop=max_conditions):
-            judgement = are_d_separated(graph, a, b, conditions=conditions)
-            if judgement.separated:
-                yield judgement
-                if not return_all:
-                    break
+        yield from judgements
+
+
+def _d_separations_from_left(  # noqa:C901
+    graph: NxMixedGraph,
+    i: int,
+    *,
+    vertices: Sequence[Variable],
+    max_conditions: int | None,
+    return_all: bool | None,
+    backend: DSeparationBackend,
+    cache: DSeparationCache | None = None,
+    fingerprint: str | None = None,
+    moral_cache: MutableMapping[frozenset[Variable], nx.Graph] | None = None,
+) -> list[DSeparationJudgement]:
+    """Get the d-separations between the i-th vertex and the ones after it.
+
+    This is defined at the module level so it can be sent to a process pool.
+    """
+    # imported here since y0.algorithm.separation re-exports this module's are_d_separated
+    from .separation.m_separation import get_m_separated
+
+    if backend not in {"bayes_ball", "moral"}:
+        raise ValueError(f"unknown d-separation backend: {backend}")
+    if moral_cache is None:
+        moral_cache = {}
+
+    a = vertices[i]
+    # the right nodes whose pairs with a don't have a d-separation yet
+    remaining = set(vertices[i + 1 :]).difference(
+        graph.directed.predecessors(a),
+        graph.directed.successors(a),
+        graph.undirected.neighbors(a),
+    )
+    rv = []
+    for conditions in powerset([*vertices[:i], *vertices[i + 1 :]], stop=max_conditions):
+        if not remaining:
+            break
+        targets = remaining.difference(conditions)
+        candidates = set()
+        if cache is not None and fingerprint is not None:
+            unknown = set()
+            for b in targets:
+                judgement = cache.get(fingerprint, a, b, conditions)
+                if judgement is None:
+                    unknown.add(b)
+                elif judgement.separated:
+                    candidates.add(b)
+            targets = unknown
+        if backend == "bayes_ball":
+            separated = get_m_separated(graph, a, targets, conditions=conditions)
+        else:
+            separated = {
+                b
+                for b in targets
+                if are_d_separated(
+                    graph, a, b, conditions=conditions, backend="moral", moral_cache=moral_cache
+                )
+            }
+        if cache is not None and fingerprint is not None:
+            cache.update(
+                fingerprint,
+                (
+                    DSeparationJudgement.create(
+                        left=a, right=b, conditions=conditions, separated=b in separated
+                    )
+                    for b in targets
+                ),
+            )
+        candidates |= separated
+        rv.extend(
+            DSeparationJudgement.create(left=a, right=b, conditions=conditions, separated=True)
+            for b in candidates
+        )
+        if not return_all:
+            remaining -= candidates
+    return rv
+
+
+def local_markov_separations(
+    graph: NxMixedGraph,
+    *,
+    ordering: Sequence[Variable] | None = None,
+    max_conditions: int | None = None,
+    verbose: bool | None = False,
+) -> Iterable[DSeparationJudgement]:
+    """Generate d-separations from the ordered local Markov property in [richardson2003]_.
+
+    For each pair of nodes, the property is applied to the later node in the ordering
+    within the ancestors of the pair. The node is d-separated from the other given its
+    Markov pillow there: its district in the subgraph of the ancestors, and the parents
+    of that district (other than the node itself). In a directed acyclic graph, this is
+    the node's parents, and these d-separations are a basis that implies the rest through
+    the semi-graphoid axioms. If the other node is in the Markov pillow, they're joined by
+    a path of colliders that are all ancestors of the pair, so no d-separation exists. This
+    means that every pair of nodes that has a d-separation gets one, in polynomial time,
+    though unlike with :func:`d_separations`, the conditions aren't always the fewest
+    possible.
+
+    :param graph: An acyclic directed mixed graph
+    :param ordering: A topological ordering of the nodes in the graph. If none is given,
+        one is calculated with :meth:`y0.graph.NxMixedGraph.topological_sort`.
+    :param max_conditions: Longest set of conditions to investigate, like in :func:`d_separations`
+    :param verbose: If true, prints extra output with tqdm
+    :yields: True d-separation judgements
+    """
+    if ordering is None:
+        ordering = graph.topological_sort()
+    directed = graph.directed
+    undirected = graph.undirected
+    ancestors = {node: graph.ancestors_inclusive(node) for node in ordering}
+    before: list[Variable] = []
+    for node in tqdm(ordering, disable=not verbose, desc="Checking d-separations", unit="node"):
+        for other in before:
+            if directed.has_edge(other, node) or undirected.has_edge(other, node):
+                continue
+            keep = ancestors[node] | ancestors[other]
+            # the district of the node in the subgraph of the ancestors of the pair
+            district = {node}
+            stack = [node]
+            while stack:
+                for neighbor in undirected.neighbors(stack.pop()):
+                    if neighbor in keep and neighbor not in district:
+                        district.add(neighbor)
+                        stack.append(neighbor)
+            pillow = district.union(*(directed.predecessors(member) for member in district))
+            pillow.discard(node)
+            if other in pillow:
+                continue
+            if max_conditions is None or len(pillow) < max_conditions:
+                yield DSeparationJudgement.create(
+                    left=node, right=other, conditions=pillow, separated=True
+                )
+        before.append(node)
@@ -7,6 +7,7 @@ from .api import (
     CFTDomain,
     ConditionalCFTResult,
     Event,
+    PreparedCFTDomains,
     UnconditionalCFTResult,
     conditional_cft,
     transport_conditional_counterfactual_query,
@@ -19,6 +20,7 @@ __all__ = [
     "conditional_cft",
     "transport_unconditional_counterfactual_query",
     "transport_conditional_counterfactual_query",
+    "PreparedCFTDomains",
     #
     "Event",
     "CFTDomain",
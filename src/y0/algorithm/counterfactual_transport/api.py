@@ -4,15 +4,18 @@
 .. [correa20a] https://proceedings.neurips.cc/paper/2020/file/7b497aa1b2a83ec63d1777a88676b0c2-Paper.pdf.
 """
 
+import functools
 import itertools as itt
 import logging
 from collections import defaultdict
-from collections.abc import Collection
+from collections.abc import Callable, Collection, Mapping
 from dataclasses import dataclass, field
 from typing import NamedTuple
 
 from networkx import is_directed_acyclic_graph
 
+from y0.algorithm.budget import check_budget
+from y0.algorithm.events import normalize_event
 from y0.algorithm.tian_id import compute_c_factor, identify_district_variables
 from y0.algorithm.transport import is_transport_node, transport_variable
 from y0.dsl import (
@@ -46,6 +49,7 @@ __all__ = [
     "conditional_cft",
     "transport_unconditional_counterfactual_query",
     "transport_conditional_counterfactual_query",
+    "PreparedCFTDomains",
     #
     "Event",
     "CFTDomain",
@@ -94,8 +98,8 @@ def event_to_probability(event: Event) -> Probability:
 
 def _any_variables_with_inconsistent_values(
     *,
-    nonreflexive_variable_to_value_mappings: dict[Variable, set[Intervention | None]],
-    reflexive_variable_to_value_mappings: dict[Variable, set[Intervention | None]],
+    nonreflexive_variable_to_value_mappings: Mapping[Variable, Collection[Intervention | None]],
+    reflexive_variable_to_value_mappings: Mapping[Variable, Collection[Intervention | None]],
 ) -> bool:
     r"""Check for variables with inconsistent values following Line 2 of Algorithm 1 in [correa_22a]_."""
     # Part 1 of Line 2:
@@ -263,16 +267,12 @@ def _remove_repeated_variables_and_values(event: Event) -> dict[Variable, set[In
     :returns:
         A dictionary mapping the event variables to all values associated with each variable in the event.
     """
-    variable_to_value_mappings: defaultdict[Variable, set[Intervention | None]] = defaultdict(set)
-    for variable, value in event:
-        variable_to_value_mappings[variable].add(value)
-    for variable in variable_to_value_mappings.keys():
-        if (
-            len(variable_to_value_mappings[variable]) > 1
-            and None in variable_to_value_mappings[variable]
-        ):
-            variable_to_value_mappings[variable].remove(None)
-    return dict(variable_to_value_mappings)
+    normalized = normalize_event(event)
+    return {
+        variable: set(values)
+        for value_mappings in (normalized.reflexive_values, normalized.nonreflexive_values)
+        for variable, values in value_mappings.items()
+    }
 
 
 def _split_event_by_reflexivity(event: Event) -> tuple[Event, Event]:
@@ -289,49 +289,12 @@ def _split_event_by_reflexivity(event: Event) -> tuple[Event, Event]:
         variables that are not counterfactual variables are considered the equivalent
         of :math: $Y_{\mathbf{y} \in \mathbf{Y}_\ast$ and fall into the latter category.
     """
-    # Y_y
-    reflexive_interventions_event: Event = [
-        (variable, value)
-        for variable, value in event
-        if (
-            isinstance(variable, CounterfactualVariable)
-            and any(
-                intervention.get_base() == variable.get_base()
-                for intervention in variable.interventions
-            )
-        )
-        or not (isinstance(variable, CounterfactualVariable))
-    ]
-    # Y_x
-    nonreflexive_interventions_event: Event = [
-        (variable, value)
-        for variable, value in event
-        if isinstance(variable, CounterfactualVariable)
-        and not any(
-            intervention.get_base() == variable.get_base()
-            for intervention in variable.interventions
-        )
-    ]
-    # for variable, value in event:
-    #    if isinstance(variable, CounterfactualVariable):
-    #        if any(
-    #            [
-    #                intervention.get_base() == variable.get_base()
-    #                for intervention in variable.interventions
-    #            ]
-    #        ):
-    #            reflexive_interventions_event.append((variable, value))
-    #        else:
-    #            nonreflexive_interventions_event.append((variable, value))
-    #    else:
-    #        # A variable with no intervention, Y, is the same thing as Y_y in the event that
-    #        # minimization has already taken place (which is the case here)
-    #        reflexive_interventions_event.append((variable, value))
-    return reflexive_interventions_event, nonreflexive_interventions_event
+    normalized = normalize_event(event)
+    return list(normalized.reflexive), list(normalized.nonreflexive)
 
 
 def _reduce_reflexive_counterfactual_variables_to_interventions(
-    variables: dict[Variable, set[Intervention | None]],
+    variables: Mapping[Variable, Collection[Intervention | None]],
 ) -> dict[Variable, set[Intervention | None]]:
     r"""Simplify counterfactual variables intervening on themselves to Intervention objects with the same base.
 
@@ -435,19 +398,15 @@ def simplify(*, event: Event, graph: NxMixedGraph) -> Event | None:
     minimized_event: Event = minimize_event(event=event, graph=graph)
     # logger.debug("In simplify: minimized_event = " + str(minimized_event))
 
-    # Split the query into Y_x variables and Y_y ("reflexive") variables
-    (
-        reflexive_interventions_event,
-        nonreflexive_interventions_event,
-    ) = _split_event_by_reflexivity(minimized_event)
+    # Split the query into Y_x variables and Y_y ("reflexive") variables, and remove
+    # repeated variables and values from each, in a single sweep over the event.
+    normalized = normalize_event(minimized_event)
 
     # Creating this dict addresses part 1 of Line 3:
     # :math: If there exists $Y_{\mathbf{X}} \in \mathbf{Y_\ast}$ with two consistent values in
     # $\mathbf{y_\ast} \cap Y_{\mathbf{X}}$ then remove repeated variables from
     # $\mathbf{Y_\ast}$ and values $\mathbf{y_\ast}$.
-    minimized_nonreflexive_variable_to_value_mappings: dict[Variable, set[Intervention | None]] = (
-        _remove_repeated_variables_and_values(nonreflexive_interventions_event)
-    )
+    minimized_nonreflexive_variable_to_value_mappings = normalized.nonreflexive_values
     # Creating this dict partly addresses part 2 of Line 3:
     # :math: If there exists $Y_{y} \in \mathbf{Y_\ast}$ with
     # $\mathbf{y_\ast} \cap Y_{y} = y$ then remove repeated variables from
@@ -456,9 +415,7 @@ def simplify(*, event: Event, graph: NxMixedGraph) -> Event | None:
     # There is an exception: we don't yet handle the edge case that the CounterfactualVariable Y_y
     # and the Intervention Y, when observed as part of the same event, are considered repeated
     # variables after minimization has taken place.
-    minimized_reflexive_variable_to_value_mappings: dict[Variable, set[Intervention | None]] = (
-        _remove_repeated_variables_and_values(reflexive_interventions_event)
-    )
+    minimized_reflexive_variable_to_value_mappings = normalized.reflexive_values
 
     # logger.debug(
     #    "In simplify after part 1 of line 3: minimized_nonreflexive_variable_to_value_mappings = "
@@ -489,15 +446,15 @@ def simplify(*, event: Event, graph: NxMixedGraph) -> Event | None:
     # This simultaneously addresses Part 2 of Line 3:
     # :math: **if** there exists $Y_y\in \mathbf{Y}_\ast$ with $\mathbf{y_*} \cap Y_y = y$ **then**
     # remove repeated variables from $\mathbf{Y_\ast}$ and values $\mathbf{y_\ast}$.
-    minimized_reflexive_variable_to_value_mappings = (
+    reduced_reflexive_variable_to_value_mappings = (
         _reduce_reflexive_counterfactual_variables_to_interventions(
             minimized_reflexive_variable_to_value_mappings
         )
     )
 
     # logger.debug(
-    #    "In simplify after part 2 of line 3: minimized_reflexive_variable_to_value_mappings = "
-    #    + str(minimized_reflexive_variable_to_value_mappings)
+    #    "In simplify after part 2 of line 3: reduced_reflexive_variable_to_value_mappings = "
+    #    + str(reduced_reflexive_variable_to_value_mappings)
     # )
 
     # (Original part 2 of Line 3):
@@ -517,7 +474,7 @@ def simplify(*, event: Event, graph: NxMixedGraph) -> Event | None:
     # remove repeated variables from $\mathbf{Y_\ast}$ and values $\mathbf{y_\ast}$.
     if _any_variables_with_inconsistent_values(
         nonreflexive_variable_to_value_mappings=minimized_nonreflexive_variable_to_value_mappings,
-        reflexive_variable_to_value_mappings=minimized_reflexive_variable_to_value_mappings,
+        reflexive_variable_to_value_mappings=reduced_reflexive_variable_to_value_mappings,
     ):
         return None
 
@@ -526,16 +483,18 @@ def simplify(*, event: Event, graph: NxMixedGraph) -> Event | None:
     #    + str(minimized_nonreflexive_variable_to_value_mappings)
     # )
     # logger.debug(
-    #    "                                    minimized_reflexive_variable_to_value_mappings = "
-    #    + str(minimized_reflexive_variable_to_value_mappings)
+    #    "                                    reduced_reflexive_variable_to_value_mappings = "
+    #    + str(reduced_reflexive_variable_to_value_mappings)
     # )
 
+    # each variable has a single value at this point, and the normalized values are cached
+    # so they're read instead of popped
     simplified_event = [
-        (key, minimized_nonreflexive_variable_to_value_mappings[key].pop())
-        for key in minimized_nonreflexive_variable_to_value_mappings
+        (key, next(iter(values)))
+        for key, values in minimized_nonreflexive_variable_to_value_mappings.items()
     ] + [
-        (key, minimized_reflexive_variable_to_value_mappings[key].pop())
-        for key in minimized_reflexive_variable_to_value_mappings
+        (key, next(iter(values)))
+        for key, values in reduced_reflexive_variable_to_value_mappings.items()
     ]
     # FIXME please replace all instances of concatenating str() with usage of f strings
     logger.debug("In simplify before return: return value = " + str(simplified_event))
@@ -1097,91 +1056,101 @@ def transport_district_intervening_on_parents(
         district=district, domain_graphs=domain_graphs, domain_data=domain_data
     )
     logger.debug("In transport_district_intervening_on_parents: input validated successfully.")
-    # Line 1
-    # FIXME use list comprehension + enumerate
-    for k in range(len(domain_graphs)):
-        # Also Line 1 (the published pseudocode could break the for loop and this test into two lines)
-        logger.debug(" k = " + str(k))
-        logger.debug(
-            " _no_intervention_variables_in_domain: "
-            + str(
-                _no_intervention_variables_in_domain(
-                    district=district, interventions=domain_data[k][0]
-                )
-            )
-        )
-        logger.debug(
-            " _no_transportability_nodes_in_domain: "
-            + str(
-                _no_transportability_nodes_in_domain(
-                    district=district, domain_graph=domain_graphs[k][0]
-                )
+    return _transport_district_intervening_on_parents(
+        district=district, domains=_get_cft_domain_structures(domain_graphs, domain_data)
+    )
+
+
+class _CFTDomainStructure(NamedTuple):
+    """The structure of a domain used by sigma-TR, which doesn't depend on the district."""
+
+    graph: NxMixedGraph
+    topo: list[Variable]
+    policy_variables: Collection[Variable]
+    population: PopulationProbability
+    #: The vertices in the graph that aren't transportability nodes
+    variables: frozenset[Variable]
+    #: The transportability nodes in the graph
+    transport_nodes: frozenset[Variable]
+    #: A mapping from each vertex in the graph to its district
+    districts: dict[Variable, frozenset[Variable]]
+
+
+def _get_cft_domain_structures(
+    domain_graphs: list[tuple[NxMixedGraph, list[Variable]]],
+    domain_data: list[tuple[Collection[Variable], PopulationProbability]],
+) -> list[_CFTDomainStructure]:
+    rv = []
+    for (graph, topo), (policy_variables, population) in zip(
+        domain_graphs, domain_data, strict=True
+    ):
+        nodes = graph.nodes()
+        rv.append(
+            _CFTDomainStructure(
+                graph=graph,
+                topo=topo,
+                policy_variables=policy_variables,
+                population=population,
+                variables=frozenset(_remove_transportability_vertices(vertices=nodes)),
+                transport_nodes=frozenset(node for node in nodes if is_transport_node(node)),
+                districts={node: district for district in graph.districts() for node in district},
             )
         )
-        if _no_intervention_variables_in_domain(
-            district=district, interventions=domain_data[k][0]
-        ) and _no_transportability_nodes_in_domain(
-            district=district, domain_graph=domain_graphs[k][0]
-        ):
-            logger.debug("In transport_district_intervening_on_parents: domain = " + str(k))
-            domain_graph = domain_graphs[k][0]
-            domain_graph_variables = _remove_transportability_vertices(
-                vertices=domain_graph.nodes()
-            )
-            domain_topo = domain_graphs[k][1]
+    return rv
 
-            # Line 2
-            domain_graph_district = frozenset().union(
-                *[domain_graph.get_district(v) for v in district]
-            )  # $B_{i}$
-            logger.debug(
-                "In transport_district_intervening_on_parents: domain_graph_district = "
-                + str(domain_graph_district)
-            )
-            # Sanity check: confirm that $C_{i} \subseteq B_{i}$
-            if any(
-                domain_graph_district != frozenset(domain_graph.get_district(v)) for v in district
-            ):
-                # FIXME use f-string and triple quote. This is unreadable.
-                raise ValueError(
-                    "Error in transport_district_intervening_on_parents: the vertices in an input district "
-                    + "are part of more than one district in a domain graph. Input district: "
-                    + str(district)
-                    + " and domain_graph_district derived from it: "
-                    + str(domain_graph_district)
-                    + ". "
-                    + "Also, here is each domain graph district we are comparing it to:"
-                    + str({frozenset(domain_graph.get_district(v)) for v in district})
-                    + "Domain index: "
-                    + str(k)
-                    + "."
-                )
 
-            # Line 3
-            logger.debug("Subgraph_probability: " + domain_data[k][1].to_latex())
-            domain_graph_district_q_probability = compute_c_factor(
-                district=domain_graph_district,  # district=district,
-                subgraph_variables=domain_graph_variables,
-                subgraph_probability=domain_data[k][1],
-                graph_topo=domain_topo,
-            )
-            logger.debug(
-                "domain_graph_district_q_probability: "
-                + domain_graph_district_q_probability.to_latex()
-            )
-            # Line 4
-            district_q_probability = identify_district_variables(
-                input_variables=frozenset(district),
-                input_district=domain_graph_district,
-                district_probability=domain_graph_district_q_probability,
-                graph=domain_graph,
-                topo=domain_topo,
+def _transport_district_intervening_on_parents(
+    *, district: Collection[Variable], domains: list[_CFTDomainStructure]
+) -> Expression | None:
+    """Run sigma-TR on a district, given the precomputed structure of each domain."""
+    # Line 1
+    for k, domain in enumerate(domains):
+        # Also Line 1 (the published pseudocode could break the for loop and this test into two lines)
+        check_budget()
+        if not _no_intervention_variables_in_domain(
+            district=district, interventions=domain.policy_variables
+        ) or any(transport_variable(v) in domain.transport_nodes for v in district):
+            continue
+        logger.debug("In transport_district_intervening_on_parents: domain = %d", k)
+
+        # Line 2
+        domain_graph_district = frozenset().union(
+            *(domain.districts[v] for v in district)
+        )  # $B_{i}$
+        # Sanity check: confirm that $C_{i} \subseteq B_{i}$
+        if any(domain_graph_district != domain.districts[v] for v in district):
+            raise ValueError(
+                "Error in transport_district_intervening_on_parents: the vertices in an input district "
+                + "are part of more than one district in a domain graph. Input district: "
+                + str(district)
+                + " and domain_graph_district derived from it: "
+                + str(domain_graph_district)
+                + ". "
+                + "Also, here is each domain graph district we are comparing it to:"
+                + str({domain.districts[v] for v in district})
+                + "Domain index: "
+                + str(k)
+                + "."
             )
-            # Incorporate the domain index in the representation for Q
 
-            # Lines 5-7
-            if district_q_probability is not None:
-                return district_q_probability
+        # Line 3
+        domain_graph_district_q_probability = compute_c_factor(
+            district=domain_graph_district,
+            subgraph_variables=domain.variables,
+            subgraph_probability=domain.population,
+            graph_topo=domain.topo,
+        )
+        # Line 4
+        district_q_probability = identify_district_variables(
+            input_variables=frozenset(district),
+            input_district=domain_graph_district,
+            district_probability=domain_graph_district_q_probability,
+            graph=domain.graph,
+            topo=domain.topo,
+        )
+        # Lines 5-7
+        if district_q_probability is not None:
+            return district_q_probability
     # Line 9
     return None
 
@@ -1334,7 +1303,7 @@ def _counterfactual_factor_is_inconsistent(
     # Are different counterfactual factor intervention values inconsistent?
 
 
-def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
+def _validate_transport_unconditional_counterfactual_query_input(
     event: Event,
     target_domain_graph: NxMixedGraph,
     domain_graphs: list[tuple[NxMixedGraph, list[Variable]]],
@@ -1402,50 +1371,57 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
     # 16. If the target domain graph is also in the domain_graphs list (i.e., data were collected for
     #     the target domain), then the target domain graph in the domain_graphs list must be
     #     identical to the target_domain_graph parameter.
-    if not (isinstance(event, list) and all(isinstance(t, tuple) and len(t) == 2 for t in event)):
-        raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the input event "
-            + "must be a list of tuples of length 2. Check your inputs."
-        )
-    if not all(
-        isinstance(variable, Variable) and (value is None or isinstance(value, Intervention))
-        for variable, value in event
-    ):
-        raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: each tuple in the input event "
-            + "must contain a Variable object and its corresponding value (an Intervention or None). "
-            + "Check your inputs."
-        )
+    caller = "_validate_transport_unconditional_counterfactual_query_input"
+    _validate_cft_domains(
+        target_domain_graph=target_domain_graph,
+        domain_graphs=domain_graphs,
+        domain_data=domain_data,
+        caller=caller,
+    )
+    _validate_unconditional_event(
+        event=event, target_domain_graph=target_domain_graph, caller=caller
+    )
+
+
+def _validate_cft_domains(  # noqa:C901
+    *,
+    target_domain_graph: NxMixedGraph,
+    domain_graphs: list[tuple[NxMixedGraph, list[Variable]]],
+    domain_data: list[tuple[Collection[Variable], PopulationProbability]],
+    caller: str,
+) -> None:
+    """Check the target domain graph and the domains for counterfactual transportability.
 
+    These are checks 2-4.5, 7-11, and 14-16 from
+    :func:`_validate_transport_unconditional_counterfactual_query_input`, which don't
+    depend on the event, so they can be run once for many events with
+    :class:`PreparedCFTDomains`.
+
+    :param target_domain_graph: a graph for the target domain.
+    :param domain_graphs: A set of $K$ tuples, one for each of the $K$ domains, each
+        containing a selection diagram and a topologically sorted list of its vertices.
+    :param domain_data: A set of $K$ tuples, one for each of the $K$ domains, each
+        containing the policy variables and an expression for the domain's distribution.
+    :param caller: The name of the function doing the validation, used in error messages
+    :raises TypeError: an input is of the wrong type. See the error message for specifics.
+    :raises ValueError: an input is of valid type but has an invalid value. See
+           the error message for specifics.
+    :raises NotImplementedError: a domain_data probability expression is One() or Zero().
+    """
     # Type checking for inputs consistent with both Algorithms 2 and 3
     # 2.
     if not isinstance(target_domain_graph, NxMixedGraph):
-        raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the target_domain_graph "
-            + "must be an NxMixedGraph object."
-        )
-
-    # Check we have no empty inputs
-    # 5.
-    if len(event) == 0:
-        raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: empty list for "
-            + "the event. Check your inputs."
-        )
+        raise TypeError(f"In {caller}: the target_domain_graph must be an NxMixedGraph object.")
     # 8. (Target domain graph)
     if len(target_domain_graph.nodes()) == 0:
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the target "
-            + "domain graph contained no nodes. Check your inputs."
+            f"In {caller}: the target domain graph contained no nodes. Check your inputs."
         )
 
     # Type checking for inputs consistent with Algorithms 2,3, and 4
     # 3.
     if not (isinstance(domain_graphs, list) and all(isinstance(t, tuple) for t in domain_graphs)):
-        raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the "
-            + "domain_graphs input parameter must be a list of tuples."
-        )
+        raise TypeError(f"In {caller}: the domain_graphs input parameter must be a list of tuples.")
     if not all(
         isinstance(g, NxMixedGraph)
         and isinstance(l_variables, list)
@@ -1453,18 +1429,15 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         for g, l_variables in domain_graphs
     ):
         raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the input domain "
+            f"In {caller}: the input domain "
             + "graph tuples must all contain NxMixedGraph objects and lists of variables."
         )
     # 4 and 4.5.
     if not (isinstance(domain_data, list) and all(isinstance(t, tuple) for t in domain_data)):
-        raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the "
-            + "input domain data must be a list of tuples."
-        )
+        raise TypeError(f"In {caller}: the input domain data must be a list of tuples.")
     if any(e == Zero() or e == One() for _, e in domain_data):
         raise NotImplementedError(
-            "In _validate_transport_unconditional_counterfactual_query_input: this algorithm "
+            f"In {caller}: this algorithm "
             + "does not currently handle domain_data probability expressions that are of type "
             + "One() or Zero()."
         )
@@ -1475,43 +1448,34 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         for sigma_z, pp in domain_data
     ):
         raise TypeError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the input "
+            f"In {caller}: the input "
             + "domain data tuples must all contain Collections of Variable objects "
             + "(first element) and PopulationProbability expressions (second element)."
         )
 
-    # 6. (Skipped for the conditional transportability algorithm, included for unconditional
-    #    transportability) Make sure at least one event element has a non-None value
-    if all(value is None for _, value in event):
-        raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the event list "
-            + "must contain at least one variable with a value that is not None. Check your inputs."
-        )
-
     # Check we have no empty inputs (Algorithms 2, 3, and 4)
     # 7.
     if len(domain_graphs) == 0 or len(domain_data) == 0:
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: empty list for "
+            f"In {caller}: empty list for "
             + "either domain_graphs or domain_data. Check your inputs."
         )
     # 8.
     if any(len(g.nodes()) == 0 for g, _ in domain_graphs):
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: at least one input "
+            f"In {caller}: at least one input "
             + "domain graph contained no nodes. Check your inputs."
         )
     # 9.
     if any(len(topo) == 0 for _, topo in domain_graphs):
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: an input set of "
+            f"In {caller}: an input set of "
             + "topologically sorted vertices was empty. Check your inputs."
         )
     # 9.5.
     if len(domain_graphs) != len(domain_data):
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the length of the "
-            + "domain_graphs and domain_data must be the same."
+            f"In {caller}: the length of the domain_graphs and domain_data must be the same."
         )
 
     # Check the target domain graph contains no transportability nodes and is a directed acyclic graph
@@ -1520,12 +1484,12 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         _remove_transportability_vertices(vertices=target_domain_graph.nodes())
     ):
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the target domain graph "
+            f"In {caller}: the target domain graph "
             + "cannot contain a transportability node. Check your inputs."
         )
     if not is_directed_acyclic_graph(target_domain_graph.directed):
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: the directed edges in "
+            f"In {caller}: the directed edges in "
             + "the target domain graph cannot form a cycle. Check your inputs."
         )
     # Check the domain graph vertices are all the same as the target domain graph vertices,
@@ -1537,27 +1501,10 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         for domain_graph, _ in domain_graphs
     ):
         raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: a domain graph contained"
+            f"In {caller}: a domain graph contained"
             + " different vertices than the target domain graph after excluding transportability "
             + "nodes. Check your inputs."
         )
-    # Check the event vertices are in the target domain graph (given the above check, that means they're in every graph)
-    # 12.
-    if any(variable.get_base() not in target_domain_graph.nodes() for variable, _ in event):
-        raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: one of the input "
-            + "event variables is not in the target domain graph. Check your inputs. "
-        )
-    # 13.
-    if any(
-        value is not None and variable.get_base() != value.get_base() for variable, value in event
-    ):
-        raise ValueError(
-            "In _validate_transport_unconditional_counterfactual_query_input: all input "
-            + "event variables must either have values of None or the same base variable "
-            + "as their corresponding values (e.g., your variable is (W @ -X) and its value "
-            + "must be +W or -W, but it's -X). Check your inputs."
-        )
 
     # Technically the topologically sorted vertices could be for a superset of the vertices
     # in the input graphs, but we currently require them to be for the vertices in the input graphs.
@@ -1572,7 +1519,7 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         # 14.
         if topo_vertices != graph_vertices:
             raise ValueError(
-                "In _validate_transport_unconditional_counterfactual_query_input: the vertices "
+                f"In {caller}: the vertices "
                 + "in each domain graph must match those in the "
                 + "corresponding topologically sorted list of vertices. Check your inputs and "
                 + "note that the topologically sorted vertex lists "
@@ -1592,7 +1539,7 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         # 15.
         if not all(v in expression_vertices for v in graph_vertices_without_transportability_nodes):
             raise ValueError(
-                "In _validate_transport_unconditional_counterfactual_query_input: some of the "
+                f"In {caller}: some of the "
                 + "vertices in a domain graph do not appear in the expression"
                 + " for the probability of the graph. Check your inputs. Graph vertices: "
                 + str(graph_vertices_without_transportability_nodes)
@@ -1604,7 +1551,7 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         # 15.5.
         if not all(v in graph_vertices_without_transportability_nodes for v in policy_vertices):
             raise ValueError(
-                "In _validate_transport_unconditional_counterfactual_query_input: the set of "
+                f"In {caller}: the set of "
                 + "vertices for which a policy has been applied for one "
                 + "of the domains contains at least one vertex not in the domain graph. Check your inputs. "
                 + "Policy vertices: "
@@ -1617,7 +1564,7 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         # 9.7. (The directed acyclic graph check must come before the topological order check)
         if not is_directed_acyclic_graph(domain_graphs[k][0].directed):
             raise ValueError(
-                "In _validate_transport_unconditional_counterfactual_query_input: the directed edges in "
+                f"In {caller}: the directed edges in "
                 + "domain graph entry "
                 + str(k)
                 + " (zero-indexed) form a cycle and the graph must be a "
@@ -1626,7 +1573,7 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         # 10.
         if not _valid_topo_list(topo=domain_graphs[k][1], graph=domain_graphs[k][0]):
             raise ValueError(
-                "In _validate_transport_unconditional_counterfactual_query_input: the provided topologically "
+                f"In {caller}: the provided topologically "
                 + "sorted order of the vertices ("
                 + str(domain_graphs[k][1])
                 + ") for domain graph entry "
@@ -1647,66 +1594,229 @@ def _validate_transport_unconditional_counterfactual_query_input(  # noqa:C901
         if str(domain_data[k][1].population) == str(TARGET_DOMAIN):
             if domain_graphs[k][0] != target_domain_graph:
                 raise ValueError(
-                    "In _validate_transport_unconditional_counterfactual_query_input: the domain_data input contains "
+                    f"In {caller}: the domain_data input contains "
                     + 'a graph probability expression from the target domain (i.e., "pi*"), but the corresponding '
                     + "domain_graph is not the same graph as the target_domain_graph. Check your inputs. Domain index "
                     + "(zero-indexed): "
                     + str(k)
                 )
-    return
 
 
-@dataclass
-class CFTDomain:
-    r"""Represents a counterfactual transport domain.
+def _validate_unconditional_event(
+    *, event: Event, target_domain_graph: NxMixedGraph, caller: str
+) -> None:
+    """Check an event for unconditional counterfactual transportability.
 
-    Each CFTDomain class contains a selection diagram for that domain,
-    an expression denoting the probability distribution
-    $P^{k}(\mathbf{V};\sigma_{\mathbf{Z}\_{j}})|{\mathbf{Z}_{j}} \in \mathcal{Z}^{i}$,
-    a set of policy variables corresponding to $\sigma_{\mathbf{Z}_{k}}$,
-    and a topologically sorted list of all the vertices in the corresponding graph
-    that are not transportability nodes. (Nodes that have no parents come first in
-    such lists.) The selection diagram contains a transportability node for every
-    vertex that is distributed differently in the domain in question than in the
-    target domain (e.g., Vertex Z in Figure 3(a) in [correa22a]_), and it is a causal
-    diagram such that its edges represent the state of the graph after a regime
-    corresponding to domain $k$ has been applied (e.g., policy $\sigma_{X}$ in Figure
-    4 of [correa22a]_).
-    """
+    These are checks 1, 5, 6, 12, and 13 from
+    :func:`_validate_transport_unconditional_counterfactual_query_input`.
 
-    #: The domain graph (a selection diagram, containing transportability nodes)
-    graph: NxMixedGraph
-    #: An expression for the joint probability of the vertices in the domain graph,
-    #: which may be a conditional probability with vertices not in the graph to the
-    #: right of the conditioning bar (i.e., we may be getting a subgraph of something larger).
-    #: Can also directly give a Variable, in which case, the population probability is inferred
-    #: to be the joint population probability over all non-transport nodes in the graph
-    population: PopulationProbability
-    #: The variables in the domain receiving an intervention, which may be stochastic
-    #: (i.e., intervening on the variable does not necessarily break all incoming
-    #: edges and may even add some edges)
-    policy_variables: Collection[Variable] = field(default_factory=set)
-    #: Topological ordering of the vertices in the domain graph (optional)
-    ordering: list[Variable] | None = None
+    :param event: The event to check
+    :param target_domain_graph: a graph for the target domain, which has already been checked.
+    :param caller: The name of the function doing the validation, used in error messages
+    :raises TypeError: the event is of the wrong type.
+    :raises ValueError: the event is empty, has no values, or doesn't match the target domain graph.
+    """
+    if not (isinstance(event, list) and all(isinstance(t, tuple) and len(t) == 2 for t in event)):
+        raise TypeError(
+            f"In {caller}: the input event "
+            + "must be a list of tuples of length 2. Check your inputs."
+        )
+    if not all(
+        isinstance(variable, Variable) and (value is None or isinstance(value, Intervention))
+        for variable, value in event
+    ):
+        raise TypeError(
+            f"In {caller}: each tuple in the input event "
+            + "must contain a Variable object and its corresponding value (an Intervention or None). "
+            + "Check your inputs."
+        )
 
-    def __post_init__(self) -> None:
-        if isinstance(self.population, Population):
-            nodes = [node for node in self.graph.nodes() if not is_transport_node(node)]
-            self.population = PP[self.population](nodes)
+    # Check we have no empty inputs
+    # 5.
+    if len(event) == 0:
+        raise ValueError(f"In {caller}: empty list for the event. Check your inputs.")
 
+    # 6. (Skipped for the conditional transportability algorithm, included for unconditional
+    #    transportability) Make sure at least one event element has a non-None value
+    if all(value is None for _, value in event):
+        raise ValueError(
+            f"In {caller}: the event list "
+            + "must contain at least one variable with a value that is not None. Check your inputs."
+        )
+    # Check the event vertices are in the target domain graph (given the above check, that means they're in every graph)
+    # 12.
+    if any(variable.get_base() not in target_domain_graph.nodes() for variable, _ in event):
+        raise ValueError(
+            f"In {caller}: one of the input "
+            + "event variables is not in the target domain graph. Check your inputs. "
+        )
+    # 13.
+    if any(
+        value is not None and variable.get_base() != value.get_base() for variable, value in event
+    ):
+        raise ValueError(
+            f"In {caller}: all input "
+            + "event variables must either have values of None or the same base variable "
+            + "as their corresponding values (e.g., your variable is (W @ -X) and its value "
+            + "must be +W or -W, but it's -X). Check your inputs."
+        )
 
-class UnconditionalCFTResult(NamedTuple):
-    """Represents the result from an unconditional counterfactual transportability query."""
 
-    expression: Expression
-    event: Event | None
+def _validate_conditional_events(  # noqa:C901
+    *,
+    outcomes: list[tuple[Variable, Intervention]],
+    conditions: list[tuple[Variable, Intervention]],
+    target_domain_graph: NxMixedGraph,
+    caller: str,
+) -> None:
+    """Check the outcomes and conditions for conditional counterfactual transportability.
 
-    def display(self) -> None:
-        """Display this result."""
-        from IPython.display import display
+    These are checks 1, 5, 12, and 13 from
+    :func:`_validate_transport_conditional_counterfactual_query_input`.
 
-        display(event_to_probability(self.event))  # type:ignore
-        display(self.expression)
+    :param outcomes: The outcomes to check
+    :param conditions: The conditions to check
+    :param target_domain_graph: a graph for the target domain, which has already been checked.
+    :param caller: The name of the function doing the validation, used in error messages
+    :raises TypeError: the outcomes or conditions are of the wrong type.
+    :raises ValueError: the outcomes or conditions are empty or don't match the target domain graph.
+    """
+    # Preliminary checks, starting with type checking for inputs unique to Algorithm 3
+    # 1.
+    if not (
+        isinstance(outcomes, list) and all(isinstance(t, tuple) and len(t) == 2 for t in outcomes)
+    ):
+        raise TypeError(
+            f"In {caller}: the input outcomes "
+            + "must be a list of tuples of length 2. Check your inputs."
+        )
+    if not all(
+        isinstance(variable, Variable) and isinstance(value, Intervention)
+        for variable, value in outcomes
+    ):
+        raise TypeError(
+            f"In {caller}: each tuple in the input outcomes "
+            + "must contain a Variable object and its corresponding value (an Intervention). Check your inputs."
+        )
+    if not (
+        isinstance(conditions, list)
+        and all(isinstance(t, tuple) and len(t) == 2 for t in conditions)
+    ):
+        raise TypeError(
+            f"In {caller}: the input conditions "
+            + "must be a list of tuples of length 2. Check your inputs."
+        )
+    if not all(
+        isinstance(variable, Variable) and isinstance(value, Intervention)
+        for variable, value in conditions
+    ):
+        raise TypeError(
+            f"In {caller}: each tuple in the input conditions "
+            + "must contain a Variable object and its corresponding value (an Intervention). Check your inputs."
+        )
+
+    # Check we have no empty inputs, for inputs unique to Algorithm 3
+    # 5.
+    if len(conditions) == 0:
+        raise ValueError(
+            f"In {caller}: empty list for "
+            + "the conditions. Check your inputs or consider directly calling "
+            + "transport_unconditional_counterfactual_query()."
+        )
+    if len(outcomes) == 0:
+        raise ValueError(f"In {caller}: empty list for the outcomes. Check your inputs.")
+
+    # 17.
+    # conditioned_variables = {variable.get_base() for variable, _ in conditions}
+    # outcome_variables = {variable.get_base() for variable, _ in outcomes}
+    # if conditioned_variables.intersection(outcome_variables) != set():
+    #    raise NotImplementedError(
+    #        f"In {caller}: currently this "
+    #        + "algorithm does not allow for the conditioned and outcome variables to share common"
+    #        + " vertices. Overlapping graph vertices (i.e., without their interventions): "
+    #        + str(conditioned_variables.intersection(outcome_variables))
+    #    )
+
+    # Check the event vertices are in the target domain graph (given the above check, that means they're in every graph)
+    # 12.
+    if any(variable.get_base() not in target_domain_graph.nodes() for variable, _ in conditions):
+        raise ValueError(
+            f"In {caller}: one of the input "
+            + "conditioned variables is not in the target domain graph. Check your inputs. "
+        )
+    if any(variable.get_base() not in target_domain_graph.nodes() for variable, _ in outcomes):
+        raise ValueError(
+            f"In {caller}: one of the input "
+            + "outcome variables is not in the target domain graph. Check your inputs. "
+        )
+    # 13.
+    if any(variable.get_base() != value.get_base() for variable, value in conditions):
+        raise ValueError(
+            f"In {caller}: one of the input "
+            + "conditioned variables does not have the same base variable as its corresponding"
+            + "value (e.g., your variable is (W @ -X) and its value must be +W or -W, but it's"
+            + "-X). Check your inputs."
+        )
+    if any(variable.get_base() != value.get_base() for variable, value in outcomes):
+        raise ValueError(
+            f"In {caller}: one of the input "
+            + "outcome variables does not have the same base variable as its corresponding"
+            + "value (e.g., your variable is (W @ -X) and its value must be +W or -W, but the "
+            + "value is -X). Check your inputs."
+        )
+
+
+@dataclass
+class CFTDomain:
+    r"""Represents a counterfactual transport domain.
+
+    Each CFTDomain class contains a selection diagram for that domain,
+    an expression denoting the probability distribution
+    $P^{k}(\mathbf{V};\sigma_{\mathbf{Z}\_{j}})|{\mathbf{Z}_{j}} \in \mathcal{Z}^{i}$,
+    a set of policy variables corresponding to $\sigma_{\mathbf{Z}_{k}}$,
+    and a topologically sorted list of all the vertices in the corresponding graph
+    that are not transportability nodes. (Nodes that have no parents come first in
+    such lists.) The selection diagram contains a transportability node for every
+    vertex that is distributed differently in the domain in question than in the
+    target domain (e.g., Vertex Z in Figure 3(a) in [correa22a]_), and it is a causal
+    diagram such that its edges represent the state of the graph after a regime
+    corresponding to domain $k$ has been applied (e.g., policy $\sigma_{X}$ in Figure
+    4 of [correa22a]_).
+    """
+
+    #: The domain graph (a selection diagram, containing transportability nodes)
+    graph: NxMixedGraph
+    #: An expression for the joint probability of the vertices in the domain graph,
+    #: which may be a conditional probability with vertices not in the graph to the
+    #: right of the conditioning bar (i.e., we may be getting a subgraph of something larger).
+    #: Can also directly give a Variable, in which case, the population probability is inferred
+    #: to be the joint population probability over all non-transport nodes in the graph
+    population: PopulationProbability
+    #: The variables in the domain receiving an intervention, which may be stochastic
+    #: (i.e., intervening on the variable does not necessarily break all incoming
+    #: edges and may even add some edges)
+    policy_variables: Collection[Variable] = field(default_factory=set)
+    #: Topological ordering of the vertices in the domain graph (optional)
+    ordering: list[Variable] | None = None
+
+    def __post_init__(self) -> None:
+        if isinstance(self.population, Population):
+            nodes = [node for node in self.graph.nodes() if not is_transport_node(node)]
+            self.population = PP[self.population](nodes)
+
+
+class UnconditionalCFTResult(NamedTuple):
+    """Represents the result from an unconditional counterfactual transportability query."""
+
+    expression: Expression
+    event: Event | None
+
+    def display(self) -> None:
+        """Display this result."""
+        from IPython.display import display
+
+        display(event_to_probability(self.event))  # type:ignore
+        display(self.expression)
 
 
 def _event_from_counterfactuals(
@@ -1818,6 +1928,30 @@ def transport_unconditional_counterfactual_query(
         domain_graphs=domain_graphs,  #: list[tuple[NxMixedGraph, list[Variable]]],
         domain_data=domain_data,  #: list[tuple[Collection[Variable], PopulationProbability]],
     )
+    return _transport_unconditional_counterfactual_query(
+        event=event,
+        target_domain_graph=target_domain_graph,
+        transport_district=functools.partial(
+            _transport_district_intervening_on_parents,
+            domains=_get_cft_domain_structures(domain_graphs, domain_data),
+        ),
+    )
+
+
+def _transport_unconditional_counterfactual_query(
+    *,
+    event: Event,
+    target_domain_graph: NxMixedGraph,
+    transport_district: Callable[..., Expression | None],
+) -> UnconditionalCFTResult | None:
+    r"""Run the ctfTRu algorithm on inputs that have already been validated.
+
+    :param event: The event
+    :param target_domain_graph: a graph for the target domain.
+    :param transport_district: A function that takes a ``district`` keyword argument and
+        runs sigma-TR on it, e.g., :meth:`PreparedCFTDomains.transport_district`
+    :returns: an expression for $P^{\ast}(\mathbf{Y_{\ast}}=\mathbf{y_{\ast}})$
+    """
     # Line 1
     simplified_event: Event | None = simplify(event=event, graph=target_domain_graph)
     if simplified_event is None:
@@ -1854,10 +1988,8 @@ def transport_unconditional_counterfactual_query(
             "In transport_unconditional_counterfactual_query: attempting to transport district "
             + str(district_without_interventions)
         )
-        district_probability_intervening_on_parents = transport_district_intervening_on_parents(
-            district=district_without_interventions,
-            domain_graphs=domain_graphs,
-            domain_data=domain_data,
+        district_probability_intervening_on_parents = transport_district(
+            district=district_without_interventions
         )  # The q_value
         if district_probability_intervening_on_parents is None:
             # logger.debug(
@@ -1919,6 +2051,7 @@ def transport_unconditional_counterfactual_query(
         Product.safe(district_probabilities_intervening_on_parents),
         ancestors_excluding_outcomes,
     )
+    check_budget(transported_unconditional_query, recursion=False)
     return UnconditionalCFTResult(
         expression=transported_unconditional_query, event=simplified_event
     )
@@ -2362,7 +2495,39 @@ def transport_conditional_counterfactual_query(
         domain_graphs=domain_graphs,
         domain_data=domain_data,
     )
+    return _transport_conditional_counterfactual_query(
+        outcomes=outcomes,
+        conditions=conditions,
+        target_domain_graph=target_domain_graph,
+        domain_data=domain_data,
+        transport_unconditional=functools.partial(
+            transport_unconditional_counterfactual_query,
+            target_domain_graph=target_domain_graph,
+            domain_graphs=domain_graphs,
+            domain_data=domain_data,
+        ),
+    )
+
+
+def _transport_conditional_counterfactual_query(
+    *,
+    outcomes: list[tuple[Variable, Intervention]],
+    conditions: list[tuple[Variable, Intervention]],
+    target_domain_graph: NxMixedGraph,
+    domain_data: list[tuple[Collection[Variable], PopulationProbability]],
+    transport_unconditional: Callable[..., UnconditionalCFTResult | None],
+) -> ConditionalCFTResult | None:
+    """Run the ctfTR algorithm on inputs that have already been validated.
 
+    :param outcomes: The outcomes
+    :param conditions: The conditions
+    :param target_domain_graph: a graph for the target domain.
+    :param domain_data: The policy variables and probability expression for each domain
+    :param transport_unconditional: A function that takes an ``event`` keyword argument and
+        runs ctfTRu on it, e.g.,
+        :meth:`PreparedCFTDomains.transport_unconditional_counterfactual_query`
+    :returns: The result of ctfTR, or None if it fails
+    """
     # Initialize data structures
     (
         conditioned_variables,
@@ -2396,11 +2561,8 @@ def transport_conditional_counterfactual_query(
     )
 
     # Line 3
-    unconditional_query_result = transport_unconditional_counterfactual_query(
-        event=outcome_ancestral_component_query_in_counterfactual_factor_form,
-        target_domain_graph=target_domain_graph,
-        domain_graphs=domain_graphs,
-        domain_data=domain_data,
+    unconditional_query_result = transport_unconditional(
+        event=outcome_ancestral_component_query_in_counterfactual_factor_form
     )
     if unconditional_query_result is None:
         # Technically the logic of possibly returning FAIL if Algorithm 2 of [correa22a]_ returns FAIL is
@@ -2430,7 +2592,151 @@ def transport_conditional_counterfactual_query(
         )
 
 
-def _validate_transport_conditional_counterfactual_query_input(  # noqa:C901
+class PreparedCFTDomains:
+    """Answer many counterfactual transportability queries against the same domains.
+
+    The domains are validated and the structure of each domain that sigma-TR uses
+    (its districts, its non-transportability vertices, and its transportability nodes)
+    is computed once on construction. Each query then only validates its event, and
+    the results of sigma-TR are cached on the district, since different events
+    often factorize into the same districts.
+
+    .. code-block:: python
+
+        from y0.algorithm.counterfactual_transport import PreparedCFTDomains
+
+        prepared = PreparedCFTDomains.from_cft_domains(
+            target_domain_graph=target_domain_graph, domains=domains
+        )
+        for event in events:
+            result = prepared.unconditional_cft(event)
+    """
+
+    def __init__(
+        self,
+        *,
+        target_domain_graph: NxMixedGraph,
+        domain_graphs: list[tuple[NxMixedGraph, list[Variable]]],
+        domain_data: list[tuple[Collection[Variable], PopulationProbability]],
+    ) -> None:
+        """Validate the domains and precompute their structure.
+
+        :param target_domain_graph: a graph for the target domain.
+        :param domain_graphs: A set of $K$ tuples, one for each of the $K$ domains, as in
+            :func:`transport_unconditional_counterfactual_query`
+        :param domain_data: The policy variables and probability expression for each domain,
+            as in :func:`transport_unconditional_counterfactual_query`
+        """
+        _validate_cft_domains(
+            target_domain_graph=target_domain_graph,
+            domain_graphs=domain_graphs,
+            domain_data=domain_data,
+            caller="PreparedCFTDomains",
+        )
+        self.target_domain_graph = target_domain_graph
+        self.domain_graphs = domain_graphs
+        self.domain_data = domain_data
+        self._domains = _get_cft_domain_structures(domain_graphs, domain_data)
+        self._districts: dict[frozenset[Variable], Expression | None] = {}
+
+    @classmethod
+    def from_cft_domains(
+        cls, *, target_domain_graph: NxMixedGraph, domains: list[CFTDomain]
+    ) -> "PreparedCFTDomains":
+        """Prepare a list of domains.
+
+        :param target_domain_graph: a graph for the target domain.
+        :param domains: A set of $K$ CFTDomain classes, one for each of the $K$ domains.
+        :returns: The prepared domains
+        """
+        return cls(
+            target_domain_graph=target_domain_graph,
+            domain_graphs=[
+                (domain.graph, domain.ordering or domain.graph.topological_sort())
+                for domain in domains
+            ],
+            domain_data=[(domain.policy_variables, domain.population) for domain in domains],
+        )
+
+    def transport_district(self, district: Collection[Variable]) -> Expression | None:
+        """Run sigma-TR on a district, reusing previous results for the same district.
+
+        :param district: A set of variables in one district of the target domain graph
+        :returns: The same as :func:`transport_district_intervening_on_parents`
+        """
+        key = frozenset(district)
+        if key not in self._districts:
+            self._districts[key] = _transport_district_intervening_on_parents(
+                district=key, domains=self._domains
+            )
+        return self._districts[key]
+
+    def transport_unconditional_counterfactual_query(
+        self, event: Event
+    ) -> UnconditionalCFTResult | None:
+        r"""Run ctfTRu (Algorithm 2 from [correa22a]_) on the prepared domains.
+
+        :param event: The event, as in :func:`transport_unconditional_counterfactual_query`
+        :returns: an expression for $P^{\ast}(\mathbf{Y_{\ast}}=\mathbf{y_{\ast}})$
+        """
+        _validate_unconditional_event(
+            event=event, target_domain_graph=self.target_domain_graph, caller="PreparedCFTDomains"
+        )
+        return _transport_unconditional_counterfactual_query(
+            event=event,
+            target_domain_graph=self.target_domain_graph,
+            transport_district=self.transport_district,
+        )
+
+    def transport_conditional_counterfactual_query(
+        self,
+        outcomes: list[tuple[Variable, Intervention]],
+        conditions: list[tuple[Variable, Intervention]],
+    ) -> ConditionalCFTResult | None:
+        """Run ctfTR (Algorithm 3 from [correa22a]_) on the prepared domains.
+
+        :param outcomes: The outcomes, as in :func:`transport_conditional_counterfactual_query`
+        :param conditions: The conditions, as in :func:`transport_conditional_counterfactual_query`
+        :returns: The result of the query, or None if it fails
+        """
+        _validate_conditional_events(
+            outcomes=outcomes,
+            conditions=conditions,
+            target_domain_graph=self.target_domain_graph,
+            caller="PreparedCFTDomains",
+        )
+        return _transport_conditional_counterfactual_query(
+            outcomes=outcomes,
+            conditions=conditions,
+            target_domain_graph=self.target_domain_graph,
+            domain_data=self.domain_data,
+            transport_unconditional=self.transport_unconditional_counterfactual_query,
+        )
+
+    def unconditional_cft(self, event: Variable | list[Variable]) -> UnconditionalCFTResult | None:
+        """Run an unconditional query like :func:`unconditional_cft` on the prepared domains.
+
+        :param event: The counterfactual variables, where values are given by their stars
+        :returns: The result of the query as an UnconditionalCFTResult object.
+        """
+        return self.transport_unconditional_counterfactual_query(_event_from_counterfactuals(event))
+
+    def conditional_cft(
+        self, outcomes: Variable | list[Variable], conditions: Variable | list[Variable]
+    ) -> ConditionalCFTResult | None:
+        """Run a conditional query like :func:`conditional_cft` on the prepared domains.
+
+        :param outcomes: The counterfactual outcome variables, where values are given by their stars
+        :param conditions: The counterfactual condition variables, where values are given by their stars
+        :returns: The result of the query as a ConditionalCFTResult object.
+        """
+        return self.transport_conditional_counterfactual_query(
+            _event_from_counterfactuals_strict(outcomes),
+            _event_from_counterfactuals_strict(conditions),
+        )
+
+
+def _validate_transport_conditional_counterfactual_query_input(
     outcomes: list[tuple[Variable, Intervention]],
     conditions: list[tuple[Variable, Intervention]],
     target_domain_graph: NxMixedGraph,
@@ -2505,295 +2811,19 @@ def _validate_transport_conditional_counterfactual_query_input(  # noqa:C901
     #     identical to the target_domain_graph parameter.
     # 17. Make sure the conditioned variable and outcome variable sets don't share graph vertices
 
-    # Preliminary checks, starting with type checking for inputs unique to Algorithm 3
-    # 1.
-    if not (
-        isinstance(outcomes, list) and all(isinstance(t, tuple) and len(t) == 2 for t in outcomes)
-    ):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the input outcomes "
-            + "must be a list of tuples of length 2. Check your inputs."
-        )
-    if not all(
-        isinstance(variable, Variable) and isinstance(value, Intervention)
-        for variable, value in outcomes
-    ):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: each tuple in the input outcomes "
-            + "must contain a Variable object and its corresponding value (an Intervention). Check your inputs."
-        )
-    if not (
-        isinstance(conditions, list)
-        and all(isinstance(t, tuple) and len(t) == 2 for t in conditions)
-    ):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the input conditions "
-            + "must be a list of tuples of length 2. Check your inputs."
-        )
-    if not all(
-        isinstance(variable, Variable) and isinstance(value, Intervention)
-        for variable, value in conditions
-    ):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: each tuple in the input conditions "
-            + "must contain a Variable object and its corresponding value (an Intervention). Check your inputs."
-        )
-    # Type checking for inputs consistent with both Algorithms 2 and 3
-    # 2.
-    if not isinstance(target_domain_graph, NxMixedGraph):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the target_domain_graph "
-            + "must be an NxMixedGraph object."
-        )
-
-    # Check we have no empty inputs, for inputs unique to Algorithm 3
-    # 5.
-    if len(conditions) == 0:
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: empty list for "
-            + "the conditions. Check your inputs or consider directly calling "
-            + "transport_unconditional_counterfactual_query()."
-        )
-    if len(outcomes) == 0:
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: empty list for "
-            + "the outcomes. Check your inputs."
-        )
-    if len(target_domain_graph.nodes()) == 0:
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: the target "
-            + "domain graph contained no nodes. Check your inputs."
-        )
-
-    # Type checking for inputs consistent with Algorithms 2,3, and 4
-    # 3.
-    if not (isinstance(domain_graphs, list) and all(isinstance(t, tuple) for t in domain_graphs)):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the "
-            + "domain_graphs input parameter must be a list of tuples."
-        )
-    if not all(
-        isinstance(g, NxMixedGraph)
-        and isinstance(l_variables, list)
-        and all(isinstance(v, Variable) for v in l_variables)
-        for g, l_variables in domain_graphs
-    ):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the input domain "
-            + "graph tuples must all contain NxMixedGraph objects and lists of variables."
-        )
-    # 4 and 4.5.
-    if not (isinstance(domain_data, list) and all(isinstance(t, tuple) for t in domain_data)):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the "
-            + "input domain data must be a list of tuples."
-        )
-    if any(e == Zero() or e == One() for _, e in domain_data):
-        raise NotImplementedError(
-            "In _validate_transport_conditional_counterfactual_query_input: this algorithm "
-            + "does not currently handle domain_data probability expressions that are of type "
-            + "One() or Zero()."
-        )
-    if not all(
-        isinstance(sigma_z, Collection)
-        and all(isinstance(v, Variable) for v in sigma_z)
-        and isinstance(pp, PopulationProbability)
-        for sigma_z, pp in domain_data
-    ):
-        raise TypeError(
-            "In _validate_transport_conditional_counterfactual_query_input: the input "
-            + "domain data tuples must all contain Collections of Variable objects "
-            + "(first element) and PopulationProbability expressions (second element)."
-        )
-
-    # 17.
-    # conditioned_variables = {variable.get_base() for variable, _ in conditions}
-    # outcome_variables = {variable.get_base() for variable, _ in outcomes}
-    # if conditioned_variables.intersection(outcome_variables) != set():
-    #    raise NotImplementedError(
-    #        "In _validate_transport_conditional_counterfactual_query_input: currently this "
-    #        + "algorithm does not allow for the conditioned and outcome variables to share common"
-    #        + " vertices. Overlapping graph vertices (i.e., without their interventions): "
-    #        + str(conditioned_variables.intersection(outcome_variables))
-    #    )
-
-    # Check we have no empty inputs (Algorithms 2, 3, and 4)
-    # 7.
-    if len(domain_graphs) == 0 or len(domain_data) == 0:
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: empty list for "
-            + "either domain_graphs or domain_data. Check your inputs."
-        )
-    # 8.
-    if any(len(g.nodes()) == 0 for g, _ in domain_graphs):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: at least one input "
-            + "domain graph contained no nodes. Check your inputs."
-        )
-    # 9.
-    if any(len(topo) == 0 for _, topo in domain_graphs):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: an input set of "
-            + "topologically sorted vertices was empty. Check your inputs."
-        )
-    # 9.5.
-    if len(domain_graphs) != len(domain_data):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: the length of the "
-            + "domain_graphs and domain_data must be the same."
-        )
-
-    # Check the target domain graph contains no transportability nodes and is a directed acyclic graph
-    # 9.2.
-    if frozenset(target_domain_graph.nodes()) != frozenset(
-        _remove_transportability_vertices(vertices=target_domain_graph.nodes())
-    ):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: the target domain graph "
-            + "cannot contain a transportability node. Check your inputs."
-        )
-    if not is_directed_acyclic_graph(target_domain_graph.directed):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: the directed edges in "
-            + "the target domain graph cannot form a cycle. Check your inputs."
-        )
-    # Check the domain graph vertices are all the same as the target domain graph vertices,
-    #    net of transportability nodes
-    # 11.
-    if any(
-        frozenset(target_domain_graph.nodes())
-        != frozenset(_remove_transportability_vertices(vertices=domain_graph.nodes()))
-        for domain_graph, _ in domain_graphs
-    ):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: a domain graph contained"
-            + " different vertices than the target domain graph after excluding transportability "
-            + "nodes. Check your inputs."
-        )
-    # Check the event vertices are in the target domain graph (given the above check, that means they're in every graph)
-    # 12.
-    if any(variable.get_base() not in target_domain_graph.nodes() for variable, _ in conditions):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: one of the input "
-            + "conditioned variables is not in the target domain graph. Check your inputs. "
-        )
-    if any(variable.get_base() not in target_domain_graph.nodes() for variable, _ in outcomes):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: one of the input "
-            + "outcome variables is not in the target domain graph. Check your inputs. "
-        )
-    # 13.
-    if any(variable.get_base() != value.get_base() for variable, value in conditions):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: one of the input "
-            + "conditioned variables does not have the same base variable as its corresponding"
-            + "value (e.g., your variable is (W @ -X) and its value must be +W or -W, but it's"
-            + "-X). Check your inputs."
-        )
-    if any(variable.get_base() != value.get_base() for variable, value in outcomes):
-        raise ValueError(
-            "In _validate_transport_conditional_counterfactual_query_input: one of the input "
-            + "outcome variables does not have the same base variable as its corresponding"
-            + "value (e.g., your variable is (W @ -X) and its value must be +W or -W, but the "
-            + "value is -X). Check your inputs."
-        )
-
-    # Technically the topologically sorted vertices could be for a superset of the vertices
-    # in the input graphs, but we currently require them to be for the vertices in the input graphs.
-    for k in range(len(domain_graphs)):
-        # logger.debug("k = " + str(k))
-        topo_vertices = frozenset(domain_graphs[k][1])
-        expression_vertices = frozenset(domain_data[k][1].get_variables())
-        graph_vertices = frozenset(domain_graphs[k][0].nodes())
-        graph_vertices_without_transportability_nodes = frozenset(
-            _remove_transportability_vertices(vertices=graph_vertices)
-        )
-        policy_vertices = frozenset(domain_data[k][0])
-        # 14.
-        if topo_vertices != graph_vertices:
-            raise ValueError(
-                "In _validate_transport_conditional_counterfactual_query_input: the vertices "
-                + "in each domain graph must match those in the "
-                + "corresponding topologically sorted list of vertices. Check your inputs and "
-                + "note that the topologically sorted vertex lists "
-                + "must contain any transportability nodes. An easy way to "
-                + "generate a usable list is to call "
-                + "[graph_name].topological_sort() on the graph. "
-                + "Graph vertices: "
-                + str(graph_vertices)
-                + ". Topologically sorted list of vertices: "
-                + str(topo_vertices)
-                + ". Domain index (zero-indexed): "
-                + str(k)
-            )
-        # It's possible for a graph probability expression to contain vertices not in the graph
-        # due to conditioning on vertices outside the graph. But the graph vertices must all be
-        # represented in that graph probability expression.
-        # 15.
-        if not all(v in expression_vertices for v in graph_vertices_without_transportability_nodes):
-            raise ValueError(
-                "In _validate_transport_conditional_counterfactual_query_input: some of the "
-                + "vertices in a domain graph do not appear in the expression"
-                + " for the probability of the graph. Check your inputs. Graph vertices: "
-                + str(graph_vertices_without_transportability_nodes)
-                + ". Expression vertices: "
-                + str(expression_vertices)
-                + ". Domain index (zero-indexed): "
-                + str(k)
-            )
-        # 15.5.
-        if not all(v in graph_vertices_without_transportability_nodes for v in policy_vertices):
-            raise ValueError(
-                "In _validate_transport_conditional_counterfactual_query_input: the set of "
-                + "vertices for which a policy has been applied for one "
-                + "of the domains contains at least one vertex not in the domain graph. Check your inputs. "
-                + "Policy vertices: "
-                + str(policy_vertices)
-                + ". Graph vertices: "
-                + str(graph_vertices_without_transportability_nodes)
-                + ". Domain index (zero-indexed): "
-                + str(k)
-            )
-        # 9.7. (The directed acyclic graph check must come before the topological order check)
-        if not is_directed_acyclic_graph(domain_graphs[k][0].directed):
-            raise ValueError(
-                "In _validate_transport_conditional_counterfactual_query_input: the directed edges in "
-                + "domain graph entry "
-                + str(k)
-                + " (zero-indexed) form a cycle and the graph must be a "
-                + "directed acyclic graph. Check your inputs."
-            )
-        # 10.
-        if not _valid_topo_list(topo=domain_graphs[k][1], graph=domain_graphs[k][0]):
-            raise ValueError(
-                "In _validate_transport_conditional_counterfactual_query_input: the provided topologically "
-                + "sorted order of the vertices ("
-                + str(domain_graphs[k][1])
-                + ") for domain graph entry "
-                + str(k)
-                + " (zero-indexed) "
-                + "is not valid, given the input domain_graph. Check your inputs."
-            )
-        # 16. If the target domain graph is also in the domain_graphs list (i.e., data were collected for
-        #     the target domain), then the target domain graph in the domain_graphs list must be
-        #     identical to the target_domain_graph parameter.
-        # TODO: relax the code base to allow Expressions in the domain_data instead of
-        #     PopulationProbability types as follows:
-        # if isinstance(domain_data[k][1], PopulationProbability) and
-        #    str(domain_data[k][1].population)==str(TARGET_DOMAIN):
-        #    That covers a corner case where a user wishes to run this algorithm with a single domain and
-        #    without specifying a population for the graph probability. In that case the problem reduces
-        #    to running ID* anyway, so it's not likely to get much usage.
-        if str(domain_data[k][1].population) == str(TARGET_DOMAIN):
-            if domain_graphs[k][0] != target_domain_graph:
-                raise ValueError(
-                    "In _validate_transport_conditional_counterfactual_query_input: the domain_data contain "
-                    + 'a graph probability expression from the target domain (i.e., "pi*"), but the '
-                    + "corresponding domain_graph is not the same graph as the target_domain_graph. "
-                    + "Check your inputs. Domain index (zero-indexed): "
-                    + str(k)
-                )
-    return
+    caller = "_validate_transport_conditional_counterfactual_query_input"
+    _validate_cft_domains(
+        target_domain_graph=target_domain_graph,
+        domain_graphs=domain_graphs,
+        domain_data=domain_data,
+        caller=caller,
+    )
+    _validate_conditional_events(
+        outcomes=outcomes,
+        conditions=conditions,
+        target_domain_graph=target_domain_graph,
+        caller=caller,
+    )
 
 
 def _valid_topo_list(topo: list[Variable], graph: NxMixedGraph) -> bool:
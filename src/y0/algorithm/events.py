@@ -0,0 +1,258 @@
+"""A compact representation of counterfactual events.
+
+Lines 2 and 3 of :func:`y0.algorithm.identify.id_star` and the SIMPLIFY algorithm in
+:mod:`y0.algorithm.counterfactual_transport` each make several passes over an event,
+comparing the base of each counterfactual variable and its value to the bases of its
+interventions. Since :meth:`y0.dsl.Variable.get_base` builds a new variable on each call,
+this gets slow for events with hundreds of terms.
+
+Here, each base variable in an event is coded as a bit, each term of the event is coded as a
+:class:`CompactTerm` in which the bases of the interventions are a bitmask, and
+:func:`normalize_event` runs all of the passes in a single sweep over the terms. Bits are
+assigned per event, in order of first appearance, so bitmasks are only as wide as the number
+of bases in the event.
+
+.. code-block:: python
+
+    from y0.algorithm.events import normalize_event
+    from y0.dsl import X, Y
+
+    normalized = normalize_event({Y @ -X: -Y, X @ -X: -X}.items())
+    assert not normalized.violates_effectiveness
+    assert normalized.reduced == {Y @ -X: -Y}
+
+Normalized events are cached, so they only contain immutable containers.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import NamedTuple
+
+from ..dsl import CounterfactualVariable, Intervention, Variable
+
+__all__ = [
+    "CompactTerm",
+    "NormalizedEvent",
+    "encode_base",
+    "encode_term",
+    "normalize_event",
+]
+
+#: A term in an event, where the value can be missing in counterfactual transportability
+EventTerm = tuple[Variable, Intervention | None]
+#: A mapping from the names of base variables to their bits, shared by the terms of one event
+BaseCodes = dict[str, int]
+
+
+def encode_base(variable: Variable, codes: BaseCodes) -> int:
+    """Get the bit for the base of the variable.
+
+    :param variable: A variable, counterfactual variable, or intervention
+    :param codes: The bits assigned to the bases seen so far in the same event. If the base
+        of the variable doesn't have a bit yet, the next one is assigned and added.
+    :returns: A power of two that is unique to the base of the variable among the codes
+    """
+    return _get_code(_get_bases(variable)[0], codes)
+
+
+def _get_code(base: str, codes: BaseCodes) -> int:
+    code = codes.get(base)
+    if code is None:
+        code = codes[base] = 1 << len(codes)
+    return code
+
+
+@lru_cache(maxsize=16384)
+def _get_bases(variable: Variable) -> tuple[str, tuple[tuple[str, bool], ...]]:
+    """Get the name of the variable's base and the names and stars of its interventions.
+
+    Bases are identified by their names, which hash faster than variables do.
+    """
+    if not isinstance(variable, CounterfactualVariable):
+        return variable.name, ()
+    return variable.name, tuple(
+        (intervention.name, bool(intervention.star)) for intervention in variable.interventions
+    )
+
+
+class CompactTerm(NamedTuple):
+    """A term of an event, where bases of variables are coded as bits."""
+
+    #: The bit for the base of the variable
+    base: int
+    #: The bits for the bases of the variable's interventions
+    interventions: int
+    #: The bits for the bases of the variable's interventions that are starred
+    starred: int
+    #: The bit for the base of the value, or zero if there's no value
+    value: int
+    #: Whether the value is starred
+    value_star: bool
+
+    @property
+    def is_reflexive(self) -> bool:
+        """Check if the variable is intervened on itself or is not counterfactual."""
+        return not self.interventions or bool(self.base & self.interventions)
+
+    @property
+    def violates_effectiveness(self) -> bool:
+        """Check if the variable is intervened on its value's base with a different value."""
+        return bool(self.value & self.interventions) and (
+            bool(self.value & self.starred) != self.value_star
+        )
+
+    @property
+    def is_tautology(self) -> bool:
+        """Check if the variable is intervened on its value's base with the same value."""
+        return bool(self.value & self.interventions) and (
+            bool(self.value & self.starred) == self.value_star
+        )
+
+
+def _encode_variable(variable: Variable, codes: BaseCodes) -> tuple[int, int, int]:
+    base, intervention_bases = _get_bases(variable)
+    interventions = starred = 0
+    for intervention_base, star in intervention_bases:
+        bit = _get_code(intervention_base, codes)
+        interventions |= bit
+        if star:
+            starred |= bit
+    return _get_code(base, codes), interventions, starred
+
+
+def _encode_value(value: Intervention, codes: BaseCodes) -> tuple[int, bool]:
+    return _get_code(_get_bases(value)[0], codes), bool(value.star)
+
+
+def encode_term(variable: Variable, value: Intervention | None, codes: BaseCodes) -> CompactTerm:
+    """Encode a term of an event.
+
+    :param variable: A variable or counterfactual variable
+    :param value: The value of the variable, if given
+    :param codes: The bits assigned to the bases seen so far in the same event, see
+        :func:`encode_base`
+    :returns: A compact term
+    """
+    base, interventions, starred = _encode_variable(variable, codes)
+    if value is None:
+        return CompactTerm(base, interventions, starred, 0, False)
+    return CompactTerm(base, interventions, starred, *_encode_value(value, codes))
+
+
+@dataclass(frozen=True)
+class NormalizedEvent:
+    """The results of normalizing an event in a single sweep."""
+
+    #: Does any term violate the Axiom of Effectiveness, i.e., is it intervened on
+    #: its own base with a value that is different from its value?
+    violates_effectiveness: bool
+    #: The event without tautological terms, i.e., where a variable is intervened on
+    #: its own base with the same value as its value. Duplicate variables keep their last value.
+    reduced: Mapping[Variable, Intervention | None]
+    #: The interventions of all counterfactual variables in the event
+    interventions: frozenset[Intervention]
+    #: The interventions and (non-missing) values in the event
+    evidence: frozenset[Intervention]
+    #: The terms whose variables are intervened on themselves or aren't counterfactual
+    reflexive: tuple[EventTerm, ...]
+    #: The terms whose variables are counterfactual but not intervened on themselves
+    nonreflexive: tuple[EventTerm, ...]
+    #: A mapping from each reflexive variable to its values, where a missing value
+    #: is dropped if the variable also has a given value
+    reflexive_values: Mapping[Variable, frozenset[Intervention | None]]
+    #: A mapping from each nonreflexive variable to its values, where a missing value
+    #: is dropped if the variable also has a given value
+    nonreflexive_values: Mapping[Variable, frozenset[Intervention | None]]
+
+
+def normalize_event(
+    event: Iterable[EventTerm] | Mapping[Variable, Intervention | None],
+) -> NormalizedEvent:
+    """Normalize an event in a single sweep.
+
+    :param event: An event, either as a dictionary like in :func:`y0.algorithm.identify.id_star`
+        or as a list of pairs like in :mod:`y0.algorithm.counterfactual_transport`
+    :returns: The normalized event. Results are cached on the terms of the event, and
+        are shared between callers.
+    """
+    items = tuple(event.items() if isinstance(event, Mapping) else event)
+    return _normalize_event(items)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_event(items: tuple[EventTerm, ...]) -> NormalizedEvent:
+    codes: BaseCodes = {}
+    violates_effectiveness = False
+    reduced: dict[Variable, Intervention | None] = {}
+    reflexive: tuple[EventTerm, ...] = []
+    nonreflexive: tuple[EventTerm, ...] = []
+    reflexive_values: Mapping[Variable, frozenset[Intervention | None]] = {}
+    nonreflexive_values: dict[Variable, set[Intervention | None]] = {}
+    # bitmasks of the bases that appear unstarred and starred in interventions and values
+    interventions = starred_interventions = values = starred_values = 0
+    for variable, value in items:
+        base, intervened, starred = _encode_variable(variable, codes)
+        interventions |= intervened & ~starred
+        starred_interventions |= starred
+        if value is None:
+            value_bit, value_star = 0, False
+        else:
+            value_bit, value_star = _encode_value(value, codes)
+            if value_star:
+                starred_values |= value_bit
+            else:
+                values |= value_bit
+        if value_bit & intervened:
+            if bool(value_bit & starred) != value_star:
+                violates_effectiveness = True
+                reduced[variable] = value
+        else:
+            reduced[variable] = value
+        if not intervened or base & intervened:
+            reflexive.append((variable, value))
+            reflexive_values.setdefault(variable, set()).add(value)
+        else:
+            nonreflexive.append((variable, value))
+            nonreflexive_values.setdefault(variable, set()).add(value)
+    bases = list(codes)
+    intervention_set = _decode(bases, interventions, False) | _decode(
+        bases, starred_interventions, True
+    )
+    return NormalizedEvent(
+        violates_effectiveness=violates_effectiveness,
+        reduced=MappingProxyType(reduced),
+        interventions=intervention_set,
+        evidence=intervention_set
+        | _decode(bases, values, False)
+        | _decode(bases, starred_values, True),
+        reflexive=tuple(reflexive),
+        nonreflexive=tuple(nonreflexive),
+        reflexive_values=_freeze_values(reflexive_values),
+        nonreflexive_values=_freeze_values(nonreflexive_values),
+    )
+
+
+def _freeze_values(
+    values: dict[Variable, set[Intervention | None]],
+) -> Mapping[Variable, frozenset[Intervention | None]]:
+    """Freeze the values of each variable, dropping a missing value if there's a given one."""
+    return MappingProxyType(
+        {
+            variable: frozenset(value_set - {None} if len(value_set) > 1 else value_set)
+            for variable, value_set in values.items()
+        }
+    )
+
+
+def _decode(bases: list[str], bits: int, star: bool) -> frozenset[Intervention]:
+    """Get the interventions on the bases in the bitmask, given the bases in order of their bits."""
+    rv = set()
+    while bits:
+        bit = bits & -bits
+        rv.add(Intervention(name=bases[bit.bit_length() - 1], star=star))
+        bits ^= bit
+    return frozenset(rv)
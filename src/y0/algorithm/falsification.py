@@ -10,9 +10,14 @@ import pandas as pd
 import statsmodels.stats.multitest
 from tqdm.auto import tqdm
 
-from .conditional_independencies import get_conditional_independencies
+from .conditional_independencies import (
+    DSeparationStrategy,
+    get_conditional_independencies,
+    get_set_conditional_independencies,
+)
+from ..dsl import Variable
 from ..graph import NxMixedGraph
-from ..struct import CITest, DSeparationJudgement, _ensure_method
+from ..struct import CITest, DSeparationJudgement, SetDSeparationJudgement, _ensure_method
 
 __all__ = [
     "get_graph_falsifications",
@@ -46,6 +51,8 @@ def get_graph_falsifications(
     verbose: bool = False,
     method: CITest | None = None,
     sep: str | None = None,
+    strategy: DSeparationStrategy = "exhaustive",
+    sets: bool = False,
 ) -> Falsifications:
     """Test conditional independencies implied by a graph.
 
@@ -57,9 +64,23 @@ def get_graph_falsifications(
     :param method: Conditional independence from :mod:`pgmpy` to use. If none,
         defaults to :func:`pgmpy.estimators.CITests.cressie_read`.
     :param sep: The separator between givens when outputting the dataframe
+    :param strategy: How to generate conditional independencies,
+        see :func:`y0.algorithm.conditional_independencies.get_conditional_independencies`
+    :param sets: If true, merges the conditional independencies with the same givens into
+        ones between sets of variables with
+        :func:`y0.algorithm.conditional_independencies.get_set_conditional_independencies`,
+        so each is checked with a single multivariate test instead of one test per pair
     :return: Falsifications report
     """
-    judgements = get_conditional_independencies(graph, max_conditions=max_given, verbose=verbose)
+    judgements: Iterable[DSeparationJudgement | SetDSeparationJudgement]
+    if sets:
+        judgements = get_set_conditional_independencies(
+            graph, max_conditions=max_given, verbose=verbose, strategy=strategy
+        )
+    else:
+        judgements = get_conditional_independencies(
+            graph, max_conditions=max_given, verbose=verbose, strategy=strategy
+        )
     return get_falsifications(
         judgements=judgements,
         df=df,
@@ -71,7 +92,7 @@ def get_graph_falsifications(
 
 
 def get_falsifications(
-    judgements: NxMixedGraph | Iterable[DSeparationJudgement],
+    judgements: Iterable[DSeparationJudgement | SetDSeparationJudgement],
     df: pd.DataFrame,
     *,
     significance_level: float | None = None,
@@ -82,7 +103,8 @@ def get_falsifications(
 ) -> Falsifications:
     """Test conditional independencies implied by a list of D-separation judgements.
 
-    :param judgements: A list of D-separation judgements to check.
+    :param judgements: A list of D-separation judgements to check. Judgements between sets
+        of variables are each checked with a single multivariate test.
     :param df: Data to check for consistency with a causal implications
     :param verbose: If true, use tqdm for status updates.
     :param method: Conditional independence from :mod:`pgmpy` to use. If none,
@@ -90,7 +112,8 @@ def get_falsifications(
     :param correction: Method used for multiple hypothesis test correction. Defaults to ``holm``.
         See :func:`statsmodels.stats.multitest.multipletests` for possible methods.
     :param significance_level: Significance for p-value test, applied after multiple hypothesis testing correction
-    :param sep: The separator between givens when outputting the dataframe
+    :param sep: The separator between givens when outputting the dataframe. The variables on
+        each side of judgements between sets of variables are separated by commas.
     :return: Falsifications report
     """
     if significance_level is None:
@@ -106,8 +129,8 @@ def get_falsifications(
         result = judgement.test(df, method=method, boolean=False)
         results.append(
             (
-                judgement.left.name,
-                judgement.right.name,
+                _get_name(judgement.left),
+                _get_name(judgement.right),
                 sep.join(c.name for c in judgement.conditions),
                 result.statistic,
                 result.p_value,
@@ -134,3 +157,9 @@ def get_falsifications(
     failures_df = evidence_df.loc[evidence_df["p_adj_significant"], ["left", "right", "given"]]
     failures = failures_df.apply(tuple, axis="columns")
     return Falsifications(failures, evidence_df)
+
+
+def _get_name(side: Variable | tuple[Variable, ...]) -> str:
+    if isinstance(side, Variable):
+        return side.name
+    return ",".join(variable.name for variable in side)
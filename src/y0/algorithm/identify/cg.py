@@ -1,6 +1,7 @@
 """Utilities for parallel world graphs and counterfactual graphs."""
 
-from collections.abc import Iterable
+from collections import defaultdict
+from collections.abc import Collection, Iterable
 from itertools import combinations
 from typing import Any, cast
 
@@ -12,6 +13,7 @@ from y0.dsl import (
     _variable_sort_key,
 )
 from y0.graph import NxMixedGraph
+from y0.util.caching import LRUCache
 
 __all__ = [
     "has_same_function",
@@ -20,6 +22,7 @@ __all__ = [
     "merge_pw",
     "make_counterfactual_graph",
     "make_parallel_worlds_graph",
+    "clear_parallel_worlds_cache",
     "is_not_self_intervened",
 ]
 
@@ -37,6 +40,14 @@ class World(frozenset[Intervention]):
 
 Worlds = set[World]
 
+#: The maximum number of parallel worlds graphs kept by :func:`make_parallel_worlds_graph`
+PARALLEL_WORLDS_CACHE_SIZE = 128
+
+_ParallelWorldsKey = tuple[str, frozenset[World]]
+_PARALLEL_WORLDS_CACHE: LRUCache[_ParallelWorldsKey, NxMixedGraph] = LRUCache(
+    PARALLEL_WORLDS_CACHE_SIZE
+)
+
 
 def has_same_confounders(graph: NxMixedGraph, a: Variable, b: Variable) -> bool:
     """Check if all confounders of the two nodes are the same."""
@@ -219,6 +230,18 @@ def merge_pw(
     Complete Identification Methods for the Causal Hierarchy.
     Journal of Machine Learning Research (2008).
     """
+    rv = graph.copy()
+    preferred_node, eliminated_node = _merge_pw_in_place(rv, node1, node2)
+    return rv, preferred_node, eliminated_node
+
+
+def _merge_pw_in_place(
+    graph: NxMixedGraph, node1: Variable, node2: Variable
+) -> tuple[Variable, Variable]:
+    """Merge node1 and node2 by modifying the graph, as described in :func:`merge_pw`.
+
+    :returns: The preferred node, which is kept, and the eliminated node, which is removed
+    """
     # If we are going to merge two nodes, we want to keep the factual variable.
     if isinstance(node1, CounterfactualVariable) and not isinstance(node2, CounterfactualVariable):
         node1, node2 = node2, node1
@@ -228,37 +251,98 @@ def merge_pw(
         pass
     else:  # both are counterfactual or both are factual, so keep the variable with the lower name
         node1, node2 = sorted([node1, node2], key=_variable_sort_key)
-    directed = [(u, v) for u, v in graph.directed.edges() if node2 not in (u, v)]
-    directed += [(node1, v) for u, v in graph.directed.edges() if node2 == u]
-    # directed += [(u, node1) for u, v in graph.directed.edges() if node2 == v]
-    undirected: set[frozenset[Variable]] = {
-        frozenset({u, v}) for u, v in graph.undirected.edges() if node2 not in (u, v)
-    }
-    undirected.update(
-        frozenset({node1, v}) for u, v in graph.undirected.edges() if node2 == u and node1 != v
-    )
-    undirected.update(
-        frozenset({u, node1}) for u, v in graph.undirected.edges() if node2 == v and node1 != u
-    )
-    parents_of_node1 = [u for u, v in graph.directed.edges() if v == node1]
+    if node2 not in graph:
+        return node1, node2
+    parents_of_node1 = set(graph.directed.pred.get(node1, ()))
     parents_of_node2_not_node1 = [
-        u for u, v in graph.directed.edges() if v == node2 and u not in parents_of_node1
+        u for u in graph.directed.predecessors(node2) if u not in parents_of_node1
     ]
+    # The merged node inherits the children and confounders of the eliminated node,
+    # but not its parents
+    for v in list(graph.directed.successors(node2)):
+        graph.add_directed_edge(node1, v)
+    for v in list(graph.undirected.neighbors(node2)):
+        if v != node1:
+            graph.add_undirected_edge(node1, v)
+    graph.directed.remove_node(node2)
+    graph.undirected.remove_node(node2)
+    # Parents of the eliminated node are dropped if that was their only edge
+    for u in parents_of_node2_not_node1:
+        if not graph.directed.degree(u) and not graph.undirected.degree(u):
+            graph.directed.remove_node(u)
+            graph.undirected.remove_node(u)
+    return node1, node2
+
+
+#: A signature of a node in a parallel worlds graph. See :func:`_get_pw_signature`.
+PWSignature = tuple[Variable, bool, Intervention | None, tuple[Variable, ...], bool]
+
+
+def _get_pw_signature(graph: NxMixedGraph, node: Variable) -> PWSignature:
+    """Get the signature of a node, which must be the same for two nodes to be equivalent.
+
+    The signature consists of the base variable and the value of the self-intervention
+    (from :func:`has_same_function` and :func:`nodes_have_same_domain_of_values`), the
+    bases of the parents (from :func:`parents_attain_same_values`), and whether the node
+    has any confounders (from :func:`has_same_confounders`).
+    """
     return (
-        NxMixedGraph.from_edges(
-            nodes=[
-                node
-                for node in graph.nodes()
-                if node != node2 and node not in parents_of_node2_not_node1
-            ],
-            directed=list(set(directed)),
-            undirected=cast(list[tuple[Variable, Variable]], [tuple(fz) for fz in undirected]),
+        node.get_base(),
+        is_not_self_intervened(node),
+        value_of_self_intervention(node),
+        tuple(
+            sorted(
+                (parent.get_base() for parent in graph.directed.pred[node]), key=_variable_sort_key
+            )
         ),
-        node1,
-        node2,
+        0 < graph.undirected.degree(node),
     )
 
 
+class _SignatureIndex:
+    """An index of nodes in a parallel worlds graph by their signatures.
+
+    This finds the candidates for Lemma 24 by a hash lookup, rather than comparing
+    the parents and confounders of every pair of nodes.
+    """
+
+    def __init__(self, graph: NxMixedGraph, nodes: Iterable[Variable]) -> None:
+        self.graph = graph
+        self.signatures: dict[Variable, PWSignature] = {}
+        self.buckets: defaultdict[PWSignature, set[Variable]] = defaultdict(set)
+        for node in nodes:
+            if node in graph:
+                self._add(node)
+
+    def _add(self, node: Variable) -> None:
+        signature = _get_pw_signature(self.graph, node)
+        self.signatures[node] = signature
+        self.buckets[signature].add(node)
+
+    def _discard(self, node: Variable) -> None:
+        signature = self.signatures.pop(node, None)
+        if signature is not None:
+            self.buckets[signature].discard(node)
+
+    def candidates(self, node: Variable) -> set[Variable]:
+        """Get the nodes with the same signature as the given node, including itself."""
+        signature = self.signatures.get(node)
+        if signature is None:
+            return set()
+        return self.buckets[signature]
+
+    def merge(self, preferred_node: Variable, eliminated_node: Variable) -> None:
+        """Update the index after merging two nodes with :func:`_merge_pw_in_place`.
+
+        Merging nodes with the same base doesn't change the parents of any other nodes
+        with that base, but the preferred node can lose its last confounder, so only its
+        signature needs to be recalculated.
+        """
+        self._discard(eliminated_node)
+        self._discard(preferred_node)
+        self._add(preferred_node)
+
+
 def lemma_24_holds(
     cf_graph: NxMixedGraph, event: Event, node: Variable, node_at_interventions: Variable
 ) -> bool:
@@ -288,12 +372,13 @@ def update_event(event: Event, preferred_node: Variable, eliminated_node: Variab
 
 
 def make_counterfactual_graph(
-    graph: NxMixedGraph, event: Event
+    graph: NxMixedGraph, event: Event, *, fingerprint: str | None = None
 ) -> tuple[NxMixedGraph, Event | None]:
     r"""Make counterfactual graph.
 
     :param graph: A causal graph :math:`G`
     :param event: A conjunction of counterfactual events :math:`\gamma`
+    :param fingerprint: The graph's fingerprint, if it has already been computed
     :returns:
         A counterfactual graph and either a set of new events :math:`\gamma'`
         such that :math:`P(\gamma') = P(\gamma)` or None
@@ -311,21 +396,23 @@ def make_counterfactual_graph(
     * Return :math:`(G', \gamma')`, where :math:`An(\gamma')` is the set of nodes in :math:`G'`
       ancestral to nodes corresponding to variables mentioned in :math:`\gamma'`.
     """
-    worlds = extract_interventions(event)
-    pw_graph = make_parallel_worlds_graph(graph, worlds)
+    worlds = list(extract_interventions(event))
+    # Nodes are merged in place in a single copy of the parallel worlds graph
+    cf_graph = _get_parallel_worlds_graph(graph, worlds, fingerprint=fingerprint).copy()
     new_event = dict(event)
-    cf_graph = NxMixedGraph.from_edges(
-        nodes=pw_graph.nodes(),
-        directed=pw_graph.directed.edges(),
-        undirected=pw_graph.undirected.edges(),
-    )
     for node in graph.topological_sort():
+        # Only nodes with the same signature can be equivalent, so the full
+        # Lemma 24 check is only done on the candidates found in the index
+        index = _SignatureIndex(cf_graph, [node, *(node @ world for world in worlds)])
         for world in worlds:
             node_at_interventions = node @ world
-            if lemma_24_holds(cf_graph, new_event, node, node_at_interventions):
-                cf_graph, preferred_node, eliminated_node = merge_pw(
+            if node_at_interventions in index.candidates(node) and lemma_24_holds(
+                cf_graph, new_event, node, node_at_interventions
+            ):
+                preferred_node, eliminated_node = _merge_pw_in_place(
                     cf_graph, node, node_at_interventions
                 )
+                index.merge(preferred_node, eliminated_node)
                 if is_inconsistent(new_event, preferred_node, eliminated_node):
                     return cf_graph, None
                 new_event = update_event(new_event, preferred_node, eliminated_node)
@@ -334,12 +421,15 @@ def make_counterfactual_graph(
                 node_at_intervention1 = node @ intervention1
                 node_at_intervention2 = node @ intervention2
 
-                if lemma_24_holds(
+                if node_at_intervention2 in index.candidates(
+                    node_at_intervention1
+                ) and lemma_24_holds(
                     cf_graph, new_event, node_at_intervention1, node_at_intervention2
                 ):
-                    cf_graph, preferred_node, eliminated_node = merge_pw(
+                    preferred_node, eliminated_node = _merge_pw_in_place(
                         cf_graph, node_at_intervention1, node_at_intervention2
                     )
+                    index.merge(preferred_node, eliminated_node)
                     if is_inconsistent(new_event, node_at_intervention1, node_at_intervention2):
                         return cf_graph, None
                     new_event = update_event(new_event, preferred_node, eliminated_node)
@@ -475,29 +565,94 @@ def make_parallel_worlds_graph(
     :param graph: A normal graph
     :param worlds: A set of sets of treatments
     :returns: A combine parallel world graph
+
+    Parallel worlds graphs are cached based on the graph's fingerprint and the worlds,
+    since ID* and IDC* build the same one on each recursion. The cache can be emptied
+    with :func:`clear_parallel_worlds_cache`.
     """
-    # Get the undirected edges
-    undirected: set[tuple[Variable, Variable]] = set()
-    # get all the undirected edges in all the parallel worlds
-    undirected |= stitch_counterfactual_and_neighbors(graph, worlds)
-    # Stitch together factual variables with their dopplegangers in other worlds
-    undirected |= stitch_factual_and_dopplegangers(graph, worlds)
-    # Stitch together factual variables with the dopplegangers of their neighbors in other worlds
-    undirected |= stitch_factual_and_doppleganger_neighbors(graph, worlds)
-
-    # Stitch together counterfactual variables with their dopplegangers in other worlds
-    if len(worlds) > 1:
-        undirected |= stitch_counterfactual_and_dopplegangers(graph, worlds)
-        # Stitch together counterfactual variables with the dopplegangers of their neighbors in other worlds
-        undirected |= stitch_counterfactual_and_doppleganger_neighbors(graph, worlds)
-
-    nodes = [
-        *graph.nodes(),
-        *(node @ world for world in worlds for node in graph.nodes()),
-    ]
-    directed = [*graph.directed.edges(), *_get_directed_edges(graph, worlds)]
-    return NxMixedGraph.from_edges(
-        nodes=nodes,
-        directed=directed,
-        undirected=set(graph.undirected.edges()) | undirected,
+    return _get_parallel_worlds_graph(graph, worlds).copy()
+
+
+def clear_parallel_worlds_cache() -> None:
+    """Clear the cache of parallel worlds graphs."""
+    _PARALLEL_WORLDS_CACHE.clear()
+
+
+def _get_parallel_worlds_graph(
+    graph: NxMixedGraph,
+    worlds: Iterable[Iterable[Intervention]],
+    *,
+    fingerprint: str | None = None,
+) -> NxMixedGraph:
+    """Get a parallel worlds graph from the cache, which must not be modified."""
+    if fingerprint is None:
+        fingerprint = graph.fingerprint()
+    key: _ParallelWorldsKey = fingerprint, frozenset(World(world) for world in worlds)
+    return _PARALLEL_WORLDS_CACHE.get_or_compute(
+        key, lambda: _build_parallel_worlds_graph(graph, key[1])
     )
+
+
+def _build_parallel_worlds_graph(graph: NxMixedGraph, worlds: Collection[World]) -> NxMixedGraph:
+    """Build a parallel worlds graph in a single pass over the edges of each world.
+
+    This adds the same edges as the ``stitch_*`` functions and :func:`_get_directed_edges`.
+    """
+    rv = NxMixedGraph()
+    for node in graph.nodes():
+        rv.add_node(node)
+    for u, v in graph.directed.edges():
+        rv.add_directed_edge(u, v)
+    for u, v in graph.undirected.edges():
+        rv.add_undirected_edge(u, v)
+    dopplegangers = [_add_world(rv, graph, world) for world in worlds]
+    for active_1, active_2 in combinations(dopplegangers, 2):
+        _stitch_worlds(rv, graph, active_1, active_2)
+    return rv
+
+
+def _add_world(
+    rv: NxMixedGraph, graph: NxMixedGraph, world: World
+) -> dict[Variable, CounterfactualVariable]:
+    """Add a world's copies of the nodes and their edges, including to the original nodes.
+
+    :returns: The copies of the nodes that aren't intervened upon in the world
+    """
+    copies = {node: node @ world for node in graph.nodes()}
+    for copy in copies.values():
+        rv.add_node(copy)
+    active = {
+        node: copy
+        for node, copy in copies.items()
+        if node_not_an_intervention_in_world(world, node)
+    }
+    for u, v in graph.directed.edges():
+        if v in active:
+            rv.add_directed_edge(copies[u], active[v])
+    for node, copy in active.items():
+        rv.add_undirected_edge(node, copy)
+    for u, v in graph.undirected.edges():
+        if u in active:
+            rv.add_undirected_edge(v, active[u])
+        if v in active:
+            rv.add_undirected_edge(u, active[v])
+            if u in active:
+                rv.add_undirected_edge(active[u], active[v])
+    return active
+
+
+def _stitch_worlds(
+    rv: NxMixedGraph,
+    graph: NxMixedGraph,
+    active_1: dict[Variable, CounterfactualVariable],
+    active_2: dict[Variable, CounterfactualVariable],
+) -> None:
+    """Add the bidirected edges between the copies of the nodes in two worlds."""
+    for node, copy in active_1.items():
+        if node in active_2:
+            rv.add_undirected_edge(copy, active_2[node])
+    for u, v in graph.undirected.edges():
+        if u in active_1 and v in active_2:
+            rv.add_undirected_edge(active_1[u], active_2[v])
+        if v in active_1 and u in active_2:
+            rv.add_undirected_edge(active_1[v], active_2[u])
@@ -3,7 +3,7 @@ import sys
 from collections.abc import Sequence
 from utils import ZIdentification,Identification, Unidentifiable,Z2Identification
 from y0.dsl import Expression, P, Probability, Product, Sum, Variable
-from y0.graph import NxMixedGraph
+from y0.graph import NxMixedGraph, TopologicalIndex
 from copy import deepcopy
 __all__ = [
     "gz-identify",
@@ -79,7 +79,7 @@ def line_7(identification: Identification) -> Identification:
     # line 7
     for district in graph.districts():
         if district_without_treatments < district:
-            parents = list(graph.topological_sort())
+            parents = graph.topological_index()
             return Identification.from_parts(
                 outcomes=outcomes,
                 treatments=treatments.intersection(district),
@@ -91,7 +91,7 @@ def line_7(identification: Identification) -> Identification:
 
 
 
-def p_parents(child: Variable, ordering: Sequence[Variable]) -> Probability:
+def p_parents(child: Variable, ordering: Sequence[Variable] | TopologicalIndex) -> Probability:
     """Get a probability expression based on a topological ordering.
 
     :param child: The child variable
@@ -99,6 +99,8 @@ def p_parents(child: Variable, ordering: Sequence[Variable]) -> Probability:
         child will be used as parents.
     :return: A probability expression
     """
+    if isinstance(ordering, TopologicalIndex):
+        return P(child | ordering.predecessors(child))
     return P(child | ordering[: ordering.index(child)])
 
 def gz_identify(identification: ZIdentification):
@@ -162,9 +164,9 @@ def gz_identify(identification: ZIdentification):
     #line 6
     if(graph_without_treatments.districts() in graph.districts() and len(graph_without_treatments.districts())==1):
         district=graph_without_treatments.districts().pop()
-        parents=list(graph.topological_sort())
+        parents=graph.topological_index().exclude(I.union(J))
         expression=Product.safe(
-            p_parents(v,parents-I.union(J)) for v in district
+            p_parents(v,parents) for v in district
         )
         ranges=district-outcomes
         return Sum.safe(expression,ranges)
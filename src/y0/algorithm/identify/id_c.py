@@ -1,9 +1,14 @@
 """Implementation of the IDC algorithm."""
 
-from .id_std import identify
+from collections.abc import Collection
+
+from .id_std import _get_identification_graph, identify
 from .utils import Identification
-from ..conditional_independencies import are_d_separated
+from ..budget import check_budget
+from ..instrumentation import instrumented, mark_line
+from ..separation.m_separation import are_m_separated
 from ...dsl import Expression, Variable
+from ...graph import NxMixedGraph
 
 __all__ = [
     "idc",
@@ -11,6 +16,7 @@ __all__ = [
 ]
 
 
+@instrumented("IDC", _get_identification_graph)
 def idc(identification: Identification) -> Expression:
     """Run the IDC algorithm from [shpitser2008]_.
 
@@ -19,11 +25,14 @@ def idc(identification: Identification) -> Expression:
 
     Raises "Unidentifiable" if no appropriate identification can be found.
     """
+    check_budget()
     for condition in identification.conditions:
         if rule_2_of_do_calculus_applies(identification=identification, condition=condition):
+            mark_line(2)
             return idc(identification.exchange_observation_with_action(condition))
 
     # Run ID algorithm
+    mark_line(3)
     id_estimand = identify(identification.uncondition())
     return id_estimand.normalize_marginalize(identification.outcomes)
 
@@ -49,8 +58,42 @@ def rule_2_of_do_calculus_applies(identification: Identification, condition: Var
     graph = identification.graph
     treatments = identification.treatments
     conditions = treatments | (identification.conditions - {condition})
-    graph_mod = graph.remove_in_edges(treatments).remove_out_edges(condition)
-    return all(
-        are_d_separated(graph_mod, outcome, condition, conditions=conditions)
-        for outcome in identification.outcomes
+    return _rule_2_applies(
+        graph,
+        treatments=treatments,
+        outcomes=identification.outcomes,
+        condition=condition,
+        conditions=conditions,
+    )
+
+
+def _rule_2_applies(
+    graph: NxMixedGraph,
+    *,
+    treatments: Collection[Variable],
+    outcomes: Collection[Variable],
+    condition: Variable,
+    conditions: Collection[Variable],
+) -> bool:
+    """Check if all outcomes are d-separated from the condition in the mutilated graph.
+
+    This does the same as running :func:`y0.algorithm.conditional_independencies.are_d_separated`
+    for each outcome on ``graph.remove_in_edges(treatments).remove_out_edges(condition)``, but
+    without copying the graph. Instead, the edges of the mutilated graph are skipped while
+    searching for open paths, and all outcomes are checked in a single search.
+
+    :param graph: The (unmutilated) graph
+    :param treatments: The treatments, whose in-edges are removed
+    :param outcomes: The outcomes
+    :param condition: The condition, whose out-edges are removed
+    :param conditions: The nodes on which to condition the d-separation
+    :returns: If all outcomes are d-separated from the condition
+    """
+    return are_m_separated(
+        graph,
+        condition,
+        outcomes,
+        conditions=conditions,
+        remove_in_edges=treatments,
+        remove_out_edges={condition},
     )
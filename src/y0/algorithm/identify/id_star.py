@@ -2,11 +2,15 @@
 
 import itertools as itt
 import logging
-from collections.abc import Collection, Iterable, Mapping
+from collections.abc import Collection, Iterable, Mapping, MutableMapping
+from functools import lru_cache
 from typing import cast
 
 from .cg import is_not_self_intervened, make_counterfactual_graph
 from .utils import Unidentifiable
+from ..budget import check_budget
+from ..events import encode_term, normalize_event
+from ..instrumentation import instrumented, mark_line, record_subgraph
 from ...dsl import (
     CounterfactualVariable,
     Event,
@@ -22,17 +26,71 @@ from ...dsl import (
 from ...graph import NxMixedGraph
 
 __all__ = [
+    "IdStarKey",
+    "IdStarMemo",
     "id_star",
 ]
 
 District = frozenset[Variable]
 DistrictInterventions = Mapping[District, Event]
+EventItems = tuple[tuple[Variable, Intervention], ...]
+
+#: A key for ID* subproblems, made from the graph's fingerprint and the event's items
+IdStarKey = tuple[str, frozenset[tuple[Variable, Intervention]]]
+#: A memo of the results of ID* subproblems
+IdStarMemo = MutableMapping[IdStarKey, Expression]
 
 logger = logging.getLogger(__name__)
 
 
-def id_star(graph: NxMixedGraph, event: Event, *, _number_recursions: int = 0) -> Expression:
-    """Apply the ``ID*`` algorithm to the graph from [shpitser2012]_."""
+@instrumented("ID*")
+def id_star(
+    graph: NxMixedGraph,
+    event: Event,
+    *,
+    memo: IdStarMemo | None = None,
+    _fingerprint: str | None = None,
+    _number_recursions: int = 0,
+) -> Expression:
+    """Apply the ``ID*`` algorithm to the graph from [shpitser2012]_.
+
+    :param graph: The causal graph
+    :param event: A conjunction of counterfactual events
+    :param memo: A memo of the results for the subproblems on each district. By default,
+        a new memo is shared between the recursive calls made on this query. Pass the
+        same dictionary (or another mutable mapping) to several calls to share the results
+        between queries on the same graph.
+    :param _fingerprint: The graph's fingerprint, which is computed once and shared between
+        the recursive calls, since they're all made on the same graph
+    :param _number_recursions: The number of times the algorithm has recurred
+    :returns: An expression for the probability of the event
+    """
+    check_budget()
+    if memo is None:
+        memo = {}
+    if _fingerprint is None:
+        _fingerprint = graph.fingerprint()
+    key: IdStarKey = _fingerprint, frozenset(event.items())
+    rv = memo.get(key)
+    if rv is None:
+        rv = memo[key] = _id_star(
+            graph,
+            event,
+            memo=memo,
+            _fingerprint=_fingerprint,
+            _number_recursions=_number_recursions,
+        )
+    return rv
+
+
+def _id_star(
+    graph: NxMixedGraph,
+    event: Event,
+    *,
+    memo: IdStarMemo,
+    _fingerprint: str,
+    _number_recursions: int,
+) -> Expression:
     logger.debug(
         "[%d]: Calling ID* algorithm with graph G with\n\t nodes: %s\n"
         "\t directed: %s\n\t undirected %s\n"
@@ -46,18 +104,31 @@ def id_star(graph: NxMixedGraph, event: Event, *, _number_recursions: int = 0) -
     # Line 1: There's nothing in the counterfactual event (i.e., an empty conjunction),
     # then its probability is 1, by convention.
     if not event:
+        mark_line(1)
         return One()
+    # Lines 2 and 3 are both checked in a single sweep over the event
+    normalized = normalize_event(event)
     # Line 2: This violates the Axiom of Effectiveness
-    if violates_axiom_of_effectiveness(event):
+    if normalized.violates_effectiveness:
+        mark_line(2)
         return Zero()
     # Line 3: This is a tautological event and can be removed without affecting the probability
-    reduced_event = remove_event_tautologies(event)
-    if reduced_event != event:
+    if normalized.reduced != event:
+        mark_line(3)
+        reduced_event = cast(Event, dict(normalized.reduced))
         logger.debug("[%d] recurring on reduced event %s", _number_recursions, reduced_event)
-        return id_star(graph, reduced_event, _number_recursions=_number_recursions + 1)
+        return id_star(
+            graph,
+            reduced_event,
+            memo=memo,
+            _fingerprint=_fingerprint,
+            _number_recursions=_number_recursions + 1,
+        )
     # Line 4: invokes make-cg to construct a counterfactual graph :math:`G'` , and the
     # corresponding relabeled counterfactual event.
-    cf_graph, new_event = make_counterfactual_graph(graph, event)
+    mark_line(4)
+    cf_graph, new_event = make_counterfactual_graph(graph, event, fingerprint=_fingerprint)
+    record_subgraph(cf_graph)
     logger.debug(
         "[%d] ID* Returned from make_counterfactual_graph(). New event: %s\n"
         "\tcounterfactual graph:\n"
@@ -72,12 +143,14 @@ def id_star(graph: NxMixedGraph, event: Event, *, _number_recursions: int = 0) -
     )
     # Line 5:
     if new_event is None:
+        mark_line(5)
         return Zero()
 
     # Line 6:
     nodes = {node for node in cf_graph.nodes() if is_not_self_intervened(node)}
-    cf_subgraph = cf_graph.subgraph(nodes)
+    cf_subgraph = record_subgraph(cf_graph.subgraph(nodes))
     if not cf_subgraph.is_connected():
+        mark_line(6)
         summand, events_of_each_district = id_star_line_6(cf_graph, new_event)
         logger.debug("[%d] summand: %s", _number_recursions, summand)
         if len(events_of_each_district) <= 1:
@@ -85,20 +158,27 @@ def id_star(graph: NxMixedGraph, event: Event, *, _number_recursions: int = 0) -
         logger.debug(
             "[%d] recurring on each district: %s ", _number_recursions, events_of_each_district
         )
-        return Sum.safe(
-            Product.safe(
-                id_star(graph, events_of_district, _number_recursions=_number_recursions + 1)
-                for events_of_district in events_of_each_district.values()
-            ),
-            summand,
+        product = Product.safe(
+            id_star(
+                graph,
+                events_of_district,
+                memo=memo,
+                _fingerprint=_fingerprint,
+                _number_recursions=_number_recursions + 1,
+            )
+            for events_of_district in events_of_each_district.values()
         )
+        check_budget(product, recursion=False)
+        return Sum.safe(product, summand)
 
     # Line 7:
     conflicts = get_conflicts(cf_subgraph, new_event)
     if conflicts:
+        mark_line(8)
         raise ConflictUnidentifiable(cf_subgraph, new_event, conflicts)
 
     # Line 9
+    mark_line(9)
     return id_star_line_9(cf_subgraph)
 
 
@@ -144,12 +224,7 @@ def violates_axiom_of_effectiveness(event: Event) -> bool:
     :param event: a conjunction of counterfactual variables
     :returns: True if violates axiom of effectiveness
     """
-    return any(
-        intervention.get_base() == value.get_base() and value.star != intervention.star
-        for counterfactual, value in event.items()
-        if isinstance(counterfactual, CounterfactualVariable)
-        for intervention in counterfactual.interventions
-    )
+    return normalize_event(event).violates_effectiveness
 
 
 def remove_event_tautologies(event: Event) -> Event:
@@ -162,21 +237,12 @@ def remove_event_tautologies(event: Event) -> Event:
     :param event: a conjunction of counterfactual variables
     :return: updated event or None
     """
-    return {
-        variable: value
-        for variable, value in event.items()
-        if not is_redundant_counterfactual(variable, value)
-    }
+    return cast(Event, dict(normalize_event(event).reduced))
 
 
 def is_redundant_counterfactual(variable: Variable, value: Intervention) -> bool:
     """Check if a counterfactual variable is intervened on itself and has the same value as the intervention."""
-    if not isinstance(variable, CounterfactualVariable):
-        return False
-    return any(
-        intervention.get_base() == value.get_base() and value.star == intervention.star
-        for intervention in variable.interventions
-    )
+    return encode_term(variable, value, {}).is_tautology
 
 
 def id_star_line_6(
@@ -217,7 +283,7 @@ def get_events_of_each_district(graph: NxMixedGraph, event: Event) -> DistrictIn
     :return: a dictionary of districts and interventions of districts
     """
     nodes = {node for node in graph.nodes() if is_not_self_intervened(node)}
-    subgraph = graph.subgraph(nodes)
+    subgraph = record_subgraph(graph.subgraph(nodes))
     return {
         district: get_events_of_district(graph, district, event)
         for district in subgraph.districts()
@@ -259,13 +325,20 @@ def get_conflicts(cf_graph: NxMixedGraph, event: Event) -> list[tuple[Interventi
     :param event: a joint distribution over counterfactual variables
     :return: A list of pairs of conflicts. The same intervention or value assignment may appear in multiple conflicts
     """
-    interventions = get_cf_interventions(cf_graph.nodes())
-    evidence = get_evidence(event)
-    return [
+    return list(_get_conflicts(frozenset(cf_graph.nodes()), tuple(event.items())))
+
+
+@lru_cache(maxsize=4096)
+def _get_conflicts(
+    nodes: frozenset[Variable], items: EventItems
+) -> tuple[tuple[Intervention, Intervention], ...]:
+    interventions = get_cf_interventions(nodes)
+    evidence = normalize_event(items).evidence
+    return tuple(
         (intervention, ev)
         for intervention, ev in itt.product(interventions, evidence)
         if intervention.name == ev.name and intervention.star != ev.star
-    ]
+    )
 
 
 def get_cf_interventions(nodes: Iterable[Variable]) -> set[Intervention]:
@@ -295,7 +368,7 @@ def get_evidence(event: Event) -> set[Intervention]:
     :param event: a conjunction of counterfactual variables
     :returns: The set of values and interventions in the given counterfactual conjuction
     """
-    return set(event.values()) | get_cf_interventions(event)
+    return set(normalize_event(event).evidence)
 
 
 def id_star_line_9(cf_graph: NxMixedGraph) -> Probability:
@@ -1,16 +1,25 @@
 """An implementation of the identification algorithm."""
 
 from collections.abc import Sequence
+from typing import Any
 
 from .utils import Identification, Unidentifiable
+from ..budget import check_budget
+from ..instrumentation import instrumented, mark_line, record_subgraph
 from ...dsl import Expression, P, Probability, Product, Sum, Variable
-from ...graph import NxMixedGraph
+from ...graph import NxMixedGraph, TopologicalIndex
 
 __all__ = [
     "identify",
 ]
 
 
+def _get_identification_graph(args: tuple[Any, ...], kwargs: dict[str, Any]) -> NxMixedGraph:
+    identification: Identification = args[0] if args else kwargs["identification"]
+    return identification.graph
+
+
+@instrumented("ID", _get_identification_graph)
 def identify(identification: Identification) -> Expression:
     """Run the ID algorithm from [shpitser2006]_.
 
@@ -21,6 +30,7 @@ def identify(identification: Identification) -> Expression:
     See also :func:`identify_outcomes` for a more idiomatic way of running
     the ID algorithm given a graph, treatments, and outcomes.
     """
+    check_budget()
     graph = identification.graph
     treatments = identification.treatments
     outcomes = identification.outcomes
@@ -28,23 +38,28 @@ def identify(identification: Identification) -> Expression:
 
     # line 1
     if not treatments:
+        mark_line(1)
         return line_1(identification)
 
     # line 2
     outcomes_and_ancestors = graph.ancestors_inclusive(outcomes)
     not_outcomes_or_ancestors = vertices.difference(outcomes_and_ancestors)
     if not_outcomes_or_ancestors:
+        mark_line(2)
         return identify(line_2(identification))
 
     # line 3
     no_effect_on_outcome = graph.get_no_effect_on_outcomes(treatments, outcomes)
     if no_effect_on_outcome:
+        mark_line(3)
         return identify(line_3(identification))
 
     # line 4
-    graph_without_treatments = graph.remove_nodes_from(treatments)
+    graph_without_treatments = record_subgraph(graph.remove_nodes_from(treatments))
     if not graph_without_treatments.is_connected():
+        mark_line(4)
         expression = Product.safe(map(identify, line_4(identification)))
+        check_budget(expression, recursion=False)
         return Sum.safe(
             expression=expression,
             ranges=vertices.difference(outcomes | treatments),
@@ -52,13 +67,15 @@ def identify(identification: Identification) -> Expression:
 
     # line 5
     if graph.is_connected():  # e.g., there's only 1 c-component, and it encompasses all vertices
+        mark_line(5)
         raise Unidentifiable(graph.nodes(), graph_without_treatments.districts())
 
     # line 6
     district_without_treatment = _get_single_district(graph_without_treatments)
 
     if district_without_treatment in graph.districts():
-        parents = list(graph.topological_sort())
+        mark_line(6)
+        parents = graph.topological_index()
         expression = Product.safe(p_parents(v, parents) for v in district_without_treatment)
         ranges = district_without_treatment - outcomes
         return Sum.safe(
@@ -67,6 +84,7 @@ def identify(identification: Identification) -> Expression:
         )
 
     # line 7
+    mark_line(7)
     return identify(line_7(identification))
 
 
@@ -117,7 +135,7 @@ def line_2(identification: Identification) -> Identification:
     vertices = set(graph.nodes())
     outcomes_and_ancestors = graph.ancestors_inclusive(outcomes)
     not_outcomes_or_ancestors = vertices.difference(outcomes_and_ancestors)
-    outcome_ancestral_graph = graph.subgraph(outcomes_and_ancestors)
+    outcome_ancestral_graph = record_subgraph(graph.subgraph(outcomes_and_ancestors))
 
     if not not_outcomes_or_ancestors:
         raise ValueError("line 2 precondition not met")
@@ -242,7 +260,7 @@ def line_6(identification: Identification) -> Expression:
     if district_without_treatments not in districts:
         raise ValueError("Line 6 precondition not met")
 
-    parents = list(graph.topological_sort())
+    parents = graph.topological_index()
     expression = Product.safe(p_parents(v, parents) for v in district_without_treatments)
     ranges = district_without_treatments - outcomes
     return Sum.safe(
@@ -288,23 +306,26 @@ def line_7(identification: Identification) -> Identification:
     # line 7
     for district in graph.districts():
         if district_without_treatments < district:
-            parents = list(graph.topological_sort())
+            parents = graph.topological_index()
             return Identification.from_parts(
                 outcomes=outcomes,
                 treatments=treatments & district,
                 estimand=Product.safe(p_parents(v, parents) for v in district),
-                graph=graph.subgraph(district),
+                graph=record_subgraph(graph.subgraph(district)),
             )
 
     raise ValueError("Could not identify suitable district")
 
 
-def p_parents(child: Variable, ordering: Sequence[Variable]) -> Probability:
+def p_parents(child: Variable, ordering: Sequence[Variable] | TopologicalIndex) -> Probability:
     """Get a probability expression based on a topological ordering.
 
     :param child: The child variable
     :param ordering: A topologically ordered sequence of all variables. All occurring before the
-        child will be used as parents.
+        child will be used as parents. When building several factors over the same ordering,
+        pass a :class:`y0.graph.TopologicalIndex` so each lookup is constant time.
     :return: A probability expression
     """
+    if isinstance(ordering, TopologicalIndex):
+        return P(child | ordering.predecessors(child))
     return P(child | ordering[: ordering.index(child)])
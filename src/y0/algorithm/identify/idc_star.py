@@ -4,9 +4,11 @@ import logging
 from collections.abc import Iterable
 
 from .cg import is_not_self_intervened, make_counterfactual_graph
-from .id_star import id_star
+from .id_star import IdStarMemo, id_star
 from .utils import Unidentifiable
-from ..conditional_independencies import are_d_separated
+from ..budget import check_budget
+from ..instrumentation import instrumented, is_instrumented, mark_line, record_subgraph
+from ..separation.m_separation import are_m_separated
 from ...dsl import Event, Expression, Variable, Zero
 from ...graph import NxMixedGraph
 
@@ -53,30 +55,47 @@ def get_remaining_and_missing_events(new_event: Event, old_event: Event) -> tupl
     return remaining, missing
 
 
+@instrumented("IDC*")
 def idc_star(
-    graph: NxMixedGraph, outcomes: Event, conditions: Event, *, _number_recursions: int = 0
+    graph: NxMixedGraph,
+    outcomes: Event,
+    conditions: Event,
+    *,
+    memo: IdStarMemo | None = None,
+    _fingerprint: str | None = None,
+    _number_recursions: int = 0,
 ) -> Expression:
     r"""Run the IDC* algorithm from [shpitser2012]_.
 
     :param graph: The causal graph
     :param outcomes: The outcome events corresponds to :math:`\gamma`
     :param conditions: The condition events corresponds to :math:`\delta`
+    :param memo: A memo of the results of ID* subproblems, see :func:`y0.algorithm.identify.id_star`.
+        By default, a new memo is shared between the calls to ID* made while answering this query.
+    :param _fingerprint: The graph's fingerprint, which is computed once and shared between
+        the recursive calls and the calls to ID*
     :param _number_recursions: The number of times the algorithm has recurred
     :returns: An expression created by the :func:`idc_star` algorithm after simplifying the original query
     :raises ValueError: If ID* returns zero
     """
+    check_budget()
+    if memo is None:
+        memo = {}
+    if _fingerprint is None:
+        _fingerprint = graph.fingerprint()
     logger.debug(
         f"[{_number_recursions}]: Calling IDC* algorithm with graph G with\n\t nodes: {graph.nodes()}\n\t directed: "
         f"{graph.directed.edges()}\n\t undirected {graph.undirected.edges()}\n\t outcomes: {outcomes}\n\t "
         f"and conditions: {conditions}"
     )
+    mark_line(1)
     try:
         logger.debug(
             "[%d]: line 1 IDC* algorithm: call ID* algorithm with events %s",
             _number_recursions,
             conditions,
         )
-        if isinstance(id_star(graph, conditions), Zero):
+        if isinstance(id_star(graph, conditions, memo=memo, _fingerprint=_fingerprint), Zero):
             raise ValueError("The ID* algorithm returned 0, so IDC* cannot be applied.")
         else:
             logger.debug(
@@ -88,13 +107,15 @@ def idc_star(
             _number_recursions,
         )
 
+    mark_line(2)
     _events = outcomes | conditions
     logger.debug(
         "[%d]: line 2 IDC* algorithm: make counterfactual graph. Events: %s",
         _number_recursions,
         _events,
     )
-    cf_graph, new_events = make_counterfactual_graph(graph, _events)
+    cf_graph, new_events = make_counterfactual_graph(graph, _events, fingerprint=_fingerprint)
+    record_subgraph(cf_graph)
     logger.debug(
         f"[{_number_recursions}]: IDC* returned from make_counterfactual_graph with New events: {new_events}\n"
         "\tcounterfactual graph:\n"
@@ -103,6 +124,7 @@ def idc_star(
         f"\t undirected: {cf_graph.undirected.edges()}"
     )
     if new_events is None:
+        mark_line(3)
         logger.debug(
             f"[{_number_recursions}]: line 3 IDC* algorithm: make_counterfactual_graph is inconsistent. Returning Zero."
         )
@@ -118,6 +140,7 @@ def idc_star(
             f"[{_number_recursions}]: line 4 IDC* algorithm: for each condition, check if rule 2 of do calculus applies"
         )
         if cf_rule_2_of_do_calculus_applies(cf_graph, new_outcomes, condition):
+            mark_line(4)
             logger.debug(
                 f"\t[{_number_recursions}]: line 4 IDC* algorithm: rule 2 of do calculus applies:\n\t\t{outcomes} "
                 f"""is D-separated from {condition} in G{"'" * (_number_recursions + 1)} ({condition}_bar)"""
@@ -136,7 +159,12 @@ def idc_star(
                 f"and new conditions {new_conditions}"
             )
             return idc_star(
-                graph, new_outcomes, new_conditions, _number_recursions=_number_recursions + 1
+                graph,
+                new_outcomes,
+                new_conditions,
+                memo=memo,
+                _fingerprint=_fingerprint,
+                _number_recursions=_number_recursions + 1,
             )
         else:
             logger.debug(
@@ -150,8 +178,13 @@ def idc_star(
         f"\t directed: {graph.directed.edges()}\n"
         f"\t undirected: {graph.undirected.edges()}"
     )
+    mark_line(5)
     id_star_estimand = id_star(
-        graph, new_outcomes | new_conditions, _number_recursions=_number_recursions + 1
+        graph,
+        new_outcomes | new_conditions,
+        memo=memo,
+        _fingerprint=_fingerprint,
+        _number_recursions=_number_recursions + 1,
     )
     logger.debug(f"[{_number_recursions}]: Returned from ID* with estimand {id_star_estimand}")
     if len(conditions) == 0:
@@ -191,8 +224,9 @@ def cf_rule_2_of_do_calculus_applies(
     """
     #: also called "blocked nodes"
     conditions = {n for n in cf_graph.nodes() if not is_not_self_intervened(n)}
-    graph_mod = cf_graph.remove_out_edges(condition)
-    return all(
-        are_d_separated(graph_mod, outcome, condition, conditions=conditions)
-        for outcome in outcomes
+    if is_instrumented():
+        # the search ignores the out-edges, so only build the mutilated graph for the report
+        record_subgraph(cf_graph.remove_out_edges(condition))
+    return are_m_separated(
+        cf_graph, condition, outcomes, conditions=conditions, remove_out_edges={condition}
     )
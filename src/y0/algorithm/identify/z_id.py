@@ -4,7 +4,7 @@ import sys
 from collections.abc import Sequence
 from utils import ZIdentification,Identification, Unidentifiable
 from y0.dsl import Expression, P, Probability, Product, Sum, Variable
-from y0.graph import NxMixedGraph
+from y0.graph import NxMixedGraph, TopologicalIndex
 from copy import deepcopy
 __all__ = [
     "z-identify",
@@ -74,8 +74,8 @@ def identify(identification: ZIdentification) -> Expression:
         district_without_treatment = _get_single_district(graph_without_treatments)
 
         if district_without_treatment in graph.districts():
-            parents = list(graph.topological_sort())
-            expression = Product.safe(p_parents(v, parents-(I.union(J))) for v in district_without_treatment)
+            parents = graph.topological_index().exclude(I.union(J))
+            expression = Product.safe(p_parents(v, parents) for v in district_without_treatment)
             ranges = district_without_treatment - outcomes
             return Sum.safe(
                 expression=expression,  
@@ -261,7 +261,7 @@ def line_6(identification: Identification) -> Expression:
     if district_without_treatments not in districts:
         raise ValueError("Line 6 precondition not met")
 
-    parents = list(graph.topological_sort())
+    parents = graph.topological_index()
     expression = Product.safe(p_parents(v, parents) for v in district_without_treatments)
     ranges = district_without_treatments - outcomes
     return Sum.safe(
@@ -307,7 +307,7 @@ def line_7(identification: Identification) -> Identification:
     # line 7
     for district in graph.districts():
         if district_without_treatments < district:
-            parents = list(graph.topological_sort())
+            parents = graph.topological_index()
             return Identification.from_parts(
                 outcomes=outcomes,
                 treatments=treatments.intersection(district),
@@ -318,7 +318,7 @@ def line_7(identification: Identification) -> Identification:
     raise ValueError("Could not identify suitable district")
 
 
-def p_parents(child: Variable, ordering: Sequence[Variable]) -> Probability:
+def p_parents(child: Variable, ordering: Sequence[Variable] | TopologicalIndex) -> Probability:
     """Get a probability expression based on a topological ordering.
 
     :param child: The child variable
@@ -326,4 +326,6 @@ def p_parents(child: Variable, ordering: Sequence[Variable]) -> Probability:
         child will be used as parents.
     :return: A probability expression
     """
+    if isinstance(ordering, TopologicalIndex):
+        return P(child | ordering.predecessors(child))
     return P(child | ordering[: ordering.index(child)])
@@ -0,0 +1,355 @@
+"""Structured instrumentation for the recursive identification and transport algorithms.
+
+The ID family of algorithms (:func:`y0.algorithm.identify.identify`,
+:func:`y0.algorithm.identify.idc`, :func:`y0.algorithm.identify.id_star`,
+:func:`y0.algorithm.identify.idc_star`, :func:`y0.algorithm.transport.trso`,
+and :func:`y0.algorithm.tian_id.identify_district_variables`) report which
+line of their pseudocode fired, the graphs they were called on, the subgraphs
+they built, and the expressions they produced to the active :class:`Instrumentation`.
+
+.. code-block:: python
+
+    from y0.algorithm.identify import identify_outcomes
+    from y0.algorithm.instrumentation import Instrumentation
+
+    with Instrumentation() as instrumentation:
+        identify_outcomes(graph, treatments=X, outcomes=Y)
+
+    report = instrumentation.report
+    print(report.get_line_df())
+
+Alternatively, a callback can be given that receives the :class:`InstrumentationReport`
+when the context manager exits, e.g., to export the report to a metrics service.
+
+The time recorded for a line is the time between when that line fires and when
+either the next line fires or the call returns, so it includes the time spent in
+recursive calls made by that line. When no instrumentation is active, the hooks
+only cost a context variable lookup.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import wraps
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+from ..complexity import complexity
+from ..dsl import Expression
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from typing_extensions import Self
+
+    from ..graph import NxMixedGraph
+
+__all__ = [
+    "CallRecord",
+    "Instrumentation",
+    "InstrumentationReport",
+    "LineStatistics",
+    "SubgraphRecord",
+    "instrumented",
+    "is_instrumented",
+    "mark_line",
+    "record_subgraph",
+]
+
+F = TypeVar("F", bound=Callable[..., Any])
+GraphGetter = Callable[[tuple[Any, ...], dict[str, Any]], "NxMixedGraph"]
+
+_CURRENT_INSTRUMENTATION: ContextVar[Instrumentation | None] = ContextVar(
+    "y0_instrumentation", default=None
+)
+
+
+@dataclass
+class LineStatistics:
+    """Statistics about one line of an algorithm."""
+
+    #: The number of times the line fired
+    count: int = 0
+    #: The cumulative number of seconds spent after the line fired,
+    #: including the recursive calls it made
+    time: float = 0.0
+
+
+@dataclass(frozen=True)
+class CallRecord:
+    """A record of a single call to an instrumented algorithm."""
+
+    #: The name of the algorithm, e.g., ``ID``
+    algorithm: str
+    #: The number of instrumented calls enclosing this one
+    depth: int
+    #: The number of nodes in the graph passed to the call
+    nodes: int
+    #: The number of directed edges in the graph passed to the call
+    directed_edges: int
+    #: The number of undirected edges in the graph passed to the call
+    undirected_edges: int
+    #: The number of seconds spent in the call, including recursive calls
+    time: float
+    #: The complexity of the returned expression, as calculated by
+    #: :func:`y0.complexity.complexity`, if an expression was returned
+    expression_size: float | None
+
+
+@dataclass(frozen=True)
+class SubgraphRecord:
+    """A record of a subgraph built inside an instrumented algorithm."""
+
+    #: The name of the algorithm that built the subgraph
+    algorithm: str
+    #: The line of the algorithm that was active when the subgraph was built
+    line: str | None
+    #: The number of nodes in the subgraph
+    nodes: int
+    #: The number of directed and undirected edges in the subgraph
+    edges: int
+
+
+@dataclass
+class InstrumentationReport:
+    """A report of the calls made to instrumented algorithms."""
+
+    #: Statistics for each line, keyed by the algorithm and line
+    lines: defaultdict[tuple[str, str], LineStatistics] = field(
+        default_factory=lambda: defaultdict(LineStatistics)
+    )
+    #: A record of each call, in the order they returned
+    calls: list[CallRecord] = field(default_factory=list)
+    #: A record of each subgraph construction, in the order they were made
+    subgraphs: list[SubgraphRecord] = field(default_factory=list)
+
+    @property
+    def max_depth(self) -> int:
+        """Get the deepest level of recursion reached."""
+        return max((call.depth for call in self.calls), default=0)
+
+    def count_calls(self) -> Counter[str]:
+        """Count the calls made to each algorithm."""
+        return Counter(call.algorithm for call in self.calls)
+
+    def get_line_df(self) -> pd.DataFrame:
+        """Get a dataframe with the count and cumulative time of each line, slowest first."""
+        import pandas as pd
+
+        rows = [
+            (algorithm, line, statistics.count, statistics.time)
+            for (algorithm, line), statistics in self.lines.items()
+        ]
+        return (
+            pd.DataFrame(rows, columns=["algorithm", "line", "count", "time"])
+            .sort_values("time", ascending=False)
+            .reset_index(drop=True)
+        )
+
+    def get_call_df(self) -> pd.DataFrame:
+        """Get a dataframe with one row for each call."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            [
+                (
+                    call.algorithm,
+                    call.depth,
+                    call.nodes,
+                    call.directed_edges,
+                    call.undirected_edges,
+                    call.time,
+                    call.expression_size,
+                )
+                for call in self.calls
+            ],
+            columns=[
+                "algorithm",
+                "depth",
+                "nodes",
+                "directed_edges",
+                "undirected_edges",
+                "time",
+                "expression_size",
+            ],
+        )
+
+
+@dataclass
+class _Frame:
+    algorithm: str
+    line: str | None = None
+    line_start: float = 0.0
+
+
+class Instrumentation:
+    """A context manager that collects an :class:`InstrumentationReport`.
+
+    An instrumentation should only be entered by one thread at a time. Since it is
+    stored in a :class:`contextvars.ContextVar`, separate instrumentations can be
+    used in separate threads or :mod:`asyncio` tasks.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[InstrumentationReport], None] | None = None,
+        *,
+        expression_sizes: bool = True,
+    ) -> None:
+        """Instantiate the instrumentation.
+
+        :param callback: A function that receives the report when the context manager exits
+        :param expression_sizes: Should the complexity of the expression returned by
+            each call be calculated? This takes time proportional to the size of the
+            expression, so it can be turned off when profiling very large queries.
+        """
+        self.callback = callback
+        self.expression_sizes = expression_sizes
+        self.report = InstrumentationReport()
+        self._frames: list[_Frame] = []
+        self._token: Token[Instrumentation | None] | None = None
+
+    def __enter__(self) -> Self:
+        if self._token is not None:
+            raise RuntimeError("an instrumentation can not be entered more than once at a time")
+        self.report = InstrumentationReport()
+        self._frames = []
+        self._token = _CURRENT_INSTRUMENTATION.set(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._token is not None:
+            _CURRENT_INSTRUMENTATION.reset(self._token)
+        self._token = None
+        if self.callback is not None:
+            self.callback(self.report)
+
+    def _push(self, algorithm: str) -> int:
+        self._frames.append(_Frame(algorithm))
+        return len(self._frames) - 1
+
+    def _pop(self) -> None:
+        frame = self._frames.pop()
+        self._close_line(frame, time.perf_counter())
+
+    def _close_line(self, frame: _Frame, now: float) -> None:
+        if frame.line is not None:
+            self.report.lines[frame.algorithm, frame.line].time += now - frame.line_start
+
+    def _mark_line(self, line: str) -> None:
+        if not self._frames:
+            return
+        frame = self._frames[-1]
+        now = time.perf_counter()
+        self._close_line(frame, now)
+        frame.line = line
+        frame.line_start = now
+        self.report.lines[frame.algorithm, line].count += 1
+
+    def _record_subgraph(self, graph: NxMixedGraph) -> None:
+        if not self._frames:
+            return
+        frame = self._frames[-1]
+        self.report.subgraphs.append(
+            SubgraphRecord(
+                algorithm=frame.algorithm,
+                line=frame.line,
+                nodes=graph.directed.number_of_nodes(),
+                edges=graph.directed.number_of_edges() + graph.undirected.number_of_edges(),
+            )
+        )
+
+
+def _get_first_argument_graph(args: tuple[Any, ...], kwargs: dict[str, Any]) -> NxMixedGraph:
+    if args:
+        return cast("NxMixedGraph", args[0])
+    return cast("NxMixedGraph", kwargs["graph"])
+
+
+def instrumented(algorithm: str, get_graph: GraphGetter | None = None) -> Callable[[F], F]:
+    """Build a decorator that reports each call of a recursive algorithm to the active instrumentation.
+
+    :param algorithm: The name of the algorithm, e.g., ``ID``
+    :param get_graph: A function that takes the positional and keyword arguments of a call and
+        returns the graph it operates on. By default, uses the first positional argument
+        or the ``graph`` keyword argument.
+    :returns: A decorator
+    """
+    if get_graph is None:
+        get_graph = _get_first_argument_graph
+
+    def _decorator(func: F) -> F:
+        @wraps(func)
+        def _wrapped(*args: Any, **kwargs: Any) -> Any:
+            instrumentation = _CURRENT_INSTRUMENTATION.get()
+            if instrumentation is None:
+                return func(*args, **kwargs)
+
+            graph = get_graph(args, kwargs)
+            depth = instrumentation._push(algorithm)
+            start = time.perf_counter()
+            try:
+                rv = func(*args, **kwargs)
+            finally:
+                instrumentation._pop()
+            elapsed = time.perf_counter() - start
+            expression_size = (
+                complexity(rv)
+                if instrumentation.expression_sizes and isinstance(rv, Expression)
+                else None
+            )
+            instrumentation.report.calls.append(
+                CallRecord(
+                    algorithm=algorithm,
+                    depth=depth,
+                    nodes=graph.directed.number_of_nodes(),
+                    directed_edges=graph.directed.number_of_edges(),
+                    undirected_edges=graph.undirected.number_of_edges(),
+                    time=elapsed,
+                    expression_size=expression_size,
+                )
+            )
+            return rv
+
+        return cast(F, _wrapped)
+
+    return _decorator
+
+
+def is_instrumented() -> bool:
+    """Check if an instrumentation is active in the current context.
+
+    This can be used to skip building subgraphs that are only needed for
+    :func:`record_subgraph`.
+    """
+    return _CURRENT_INSTRUMENTATION.get() is not None
+
+
+def mark_line(line: int | str) -> None:
+    """Report that a line of the innermost instrumented algorithm fired.
+
+    :param line: The line of the algorithm's pseudocode, e.g., ``4``
+    """
+    instrumentation = _CURRENT_INSTRUMENTATION.get()
+    if instrumentation is not None:
+        instrumentation._mark_line(str(line))
+
+
+def record_subgraph(graph: NxMixedGraph) -> NxMixedGraph:
+    """Report that the innermost instrumented algorithm built a subgraph.
+
+    :param graph: The subgraph that was built
+    :returns: The same graph, so this can wrap the expression that builds it
+    """
+    instrumentation = _CURRENT_INSTRUMENTATION.get()
+    if instrumentation is not None:
+        instrumentation._record_subgraph(graph)
+    return graph
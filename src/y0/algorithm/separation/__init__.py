@@ -1,25 +1,44 @@
 """Separation algorithms.
 
-=========================  ============================================================================================  ====================================================================
-Algorithm                  Description                                                                                   Implementation
-=========================  ============================================================================================  ====================================================================
-d-separation [pearl2009]_  Identifies nodes in an acyclic directed mixed graph as probabilistically independent          :func:`y0.algorithm.separation.are_d_separated`
-m-separation [drton2003]_  A generalization of d-separation in an acyclic directed mixed graph                           `Issue #204 <https://github.com/y0-causal-inference/y0/issues/204>`_
-σ-separation [forre2018]_  Identifies nodes in any directed mixed graph as probabilistically dependent (cycles allowed)  :func:`y0.algorithm.separation.are_sigma_separated`
-=========================  ============================================================================================  ====================================================================
+==============================  ============================================================================================  ====================================================================
+Algorithm                       Description                                                                                   Implementation
+==============================  ============================================================================================  ====================================================================
+d-separation [pearl2009]_       Identifies nodes in an acyclic directed mixed graph as probabilistically independent          :func:`y0.algorithm.separation.are_d_separated`
+m-separation [drton2003]_       A generalization of d-separation in an acyclic directed mixed graph                           :func:`y0.algorithm.separation.are_m_separated`
+Separators [vanderzander2019]_  Finds minimal and minimum sets of nodes that m-separate two sets of nodes in polynomial time  :func:`y0.algorithm.separation.find_minimal_separator`
+σ-separation [forre2018]_       Identifies nodes in any directed mixed graph as probabilistically dependent (cycles allowed)  :func:`y0.algorithm.separation.are_sigma_separated`
+==============================  ============================================================================================  ====================================================================
 
 .. [forre2018] `Constraint-based Causal Discovery for Non-Linear Structural Causal Models with Cycles and
       Latent Confounders <https://arxiv.org/abs/1807.03024>`_
 .. [drton2003] `Iterative Conditional Fitting for Gaussian Ancestral Graph Models
       <https://stat.uw.edu/sites/default/files/files/reports/2003/tr437.pdf>`_
+.. [vanderzander2019] `Separators and adjustment sets in causal graphs: Complete criteria
+      and an algorithmic framework <https://doi.org/10.1016/j.artint.2018.12.006>`_
 .. [pearl2009] `Causality: Models, Reasoning and Inference: Models, Reasoning and Inference
       <https://doi.org/10.1017/CBO9780511803161>`_
 """
 
-from .sigma_separation import are_sigma_separated
+from .m_separation import (
+    are_m_separated,
+    get_m_connected,
+    get_m_separated,
+    get_m_separation_matrix,
+)
+from .separators import find_minimal_separator, find_minimum_separator, minimal_separations
+from .sigma_separation import are_sigma_separated, get_sigma_connected, get_sigma_separated
 from ..conditional_independencies import are_d_separated
 
 __all__ = [
     "are_d_separated",
+    "are_m_separated",
     "are_sigma_separated",
+    "find_minimal_separator",
+    "find_minimum_separator",
+    "get_m_connected",
+    "get_m_separated",
+    "get_m_separation_matrix",
+    "get_sigma_connected",
+    "get_sigma_separated",
+    "minimal_separations",
 ]
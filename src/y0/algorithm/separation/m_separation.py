@@ -0,0 +1,250 @@
+"""Implementation of m-separation from [drton2003]_ by reachability.
+
+Rather than building the moralized ancestral graph like
+:func:`y0.algorithm.conditional_independencies.are_d_separated` used to, this searches
+the original graph for open paths in the style of the Bayes-ball algorithm from
+[shachter1998]_ (i.e., the *Reachable* algorithm of [koller2009]_, extended to
+bidirected edges). Each node is visited at most twice: once when arriving on an
+arrowhead and once when arriving on a tail, so each query takes $O(V+E)$ time and
+no intermediate graphs are constructed.
+
+Since mutilating a graph is common before checking separation (e.g., in the rules of
+the do-calculus), the in-edges and out-edges of some nodes can be ignored on the fly
+instead of copying the graph with :meth:`y0.graph.NxMixedGraph.remove_in_edges` and
+:meth:`y0.graph.NxMixedGraph.remove_out_edges`.
+
+.. [shachter1998] `Bayes-Ball: The Rational Pastime (for Determining Irrelevance and
+      Requisite Information in Belief Networks and Influence Diagrams)
+      <https://arxiv.org/abs/1301.7412>`_
+.. [koller2009] Koller, D. and Friedman, N. (2009). Probabilistic Graphical Models:
+      Principles and Techniques. MIT Press. Algorithm 3.1.
+"""
+
+from collections.abc import Collection, Iterable, Iterator
+
+import pandas as pd
+
+from y0.dsl import Variable
+from y0.graph import NxMixedGraph
+
+__all__ = [
+    "are_m_separated",
+    "get_m_connected",
+    "get_m_separated",
+    "get_m_separation_matrix",
+]
+
+#: Arriving at a node on an edge whose mark at that node is an arrowhead
+_HEAD = True
+#: Arriving at a node on an edge whose mark at that node is a tail
+_TAIL = False
+
+
+def are_m_separated(
+    graph: NxMixedGraph,
+    left: Variable | Iterable[Variable],
+    right: Variable | Iterable[Variable],
+    *,
+    conditions: Iterable[Variable] | None = None,
+    remove_in_edges: Collection[Variable] = frozenset(),
+    remove_out_edges: Collection[Variable] = frozenset(),
+) -> bool:
+    """Test if two sets of nodes are m-separated.
+
+    :param graph: An acyclic directed mixed graph
+    :param left: A node or nodes in the graph
+    :param right: A node or nodes in the graph
+    :param conditions: A collection of graph nodes
+    :param remove_in_edges: Nodes whose incoming directed edges and bidirected edges are
+        ignored, as in :meth:`y0.graph.NxMixedGraph.remove_in_edges`
+    :param remove_out_edges: Nodes whose outgoing directed edges are ignored, as in
+        :meth:`y0.graph.NxMixedGraph.remove_out_edges`
+    :returns: If every node in the left is m-separated from every node in the right. A node
+        is never separated from itself unless it's in the conditions, and nodes in the
+        conditions are separated from everything.
+    """
+    right = {right} if isinstance(right, Variable) else set(right)
+    return not any(
+        node in right
+        for node in _iter_m_connected(
+            graph,
+            {left} if isinstance(left, Variable) else left,
+            conditions=set() if conditions is None else set(conditions),
+            remove_in_edges=remove_in_edges,
+            remove_out_edges=remove_out_edges,
+        )
+    )
+
+
+def get_m_connected(
+    graph: NxMixedGraph,
+    sources: Variable | Iterable[Variable],
+    *,
+    conditions: Iterable[Variable] | None = None,
+    remove_in_edges: Collection[Variable] = frozenset(),
+    remove_out_edges: Collection[Variable] = frozenset(),
+) -> set[Variable]:
+    """Get the nodes that are m-connected to any of the sources.
+
+    :param graph: An acyclic directed mixed graph
+    :param sources: A node or nodes in the graph
+    :param conditions: A collection of graph nodes
+    :param remove_in_edges: Nodes whose incoming directed edges and bidirected edges are
+        ignored, as in :meth:`y0.graph.NxMixedGraph.remove_in_edges`
+    :param remove_out_edges: Nodes whose outgoing directed edges are ignored, as in
+        :meth:`y0.graph.NxMixedGraph.remove_out_edges`
+    :returns: The nodes that aren't in the conditions and that have an open path to one of
+        the sources, including the sources themselves if they aren't in the conditions
+    """
+    return set(
+        _iter_m_connected(
+            graph,
+            {sources} if isinstance(sources, Variable) else sources,
+            conditions=set() if conditions is None else set(conditions),
+            remove_in_edges=remove_in_edges,
+            remove_out_edges=remove_out_edges,
+        )
+    )
+
+
+def get_m_separated(
+    graph: NxMixedGraph,
+    sources: Variable | Iterable[Variable],
+    targets: Iterable[Variable],
+    *,
+    conditions: Iterable[Variable] | None = None,
+    remove_in_edges: Collection[Variable] = frozenset(),
+    remove_out_edges: Collection[Variable] = frozenset(),
+) -> set[Variable]:
+    """Get the targets that are m-separated from all of the sources.
+
+    The search stops as soon as all targets have been reached.
+
+    :param graph: An acyclic directed mixed graph
+    :param sources: A node or nodes in the graph
+    :param targets: The nodes to check
+    :param conditions: A collection of graph nodes
+    :param remove_in_edges: Nodes whose incoming directed edges and bidirected edges are
+        ignored, as in :meth:`y0.graph.NxMixedGraph.remove_in_edges`
+    :param remove_out_edges: Nodes whose outgoing directed edges are ignored, as in
+        :meth:`y0.graph.NxMixedGraph.remove_out_edges`
+    :returns: The targets that don't have an open path to any of the sources
+    """
+    rv = set(targets)
+    if not rv:
+        return rv
+    for node in _iter_m_connected(
+        graph,
+        {sources} if isinstance(sources, Variable) else sources,
+        conditions=set() if conditions is None else set(conditions),
+        remove_in_edges=remove_in_edges,
+        remove_out_edges=remove_out_edges,
+    ):
+        rv.discard(node)
+        if not rv:
+            break
+    return rv
+
+
+def get_m_separation_matrix(
+    graph: NxMixedGraph,
+    conditions: Iterable[Variable] | None = None,
+    *,
+    remove_in_edges: Collection[Variable] = frozenset(),
+    remove_out_edges: Collection[Variable] = frozenset(),
+) -> pd.DataFrame:
+    """Check m-separation between all pairs of nodes given the same conditions.
+
+    This takes one search per node, rather than one per pair of nodes.
+
+    :param graph: An acyclic directed mixed graph
+    :param conditions: A collection of graph nodes
+    :param remove_in_edges: Nodes whose incoming directed edges and bidirected edges are
+        ignored, as in :meth:`y0.graph.NxMixedGraph.remove_in_edges`
+    :param remove_out_edges: Nodes whose outgoing directed edges are ignored, as in
+        :meth:`y0.graph.NxMixedGraph.remove_out_edges`
+    :returns: A symmetric boolean dataframe whose index and columns are the sorted nodes of
+        the graph, where each cell says if the pair of nodes is m-separated. The rows and
+        columns for the conditions are all true.
+    """
+    conditions = set() if conditions is None else set(conditions)
+    nodes = sorted(graph.nodes())
+    rv = pd.DataFrame(True, index=nodes, columns=nodes)
+    for node in nodes:
+        connected = list(
+            _iter_m_connected(
+                graph,
+                [node],
+                conditions=conditions,
+                remove_in_edges=remove_in_edges,
+                remove_out_edges=remove_out_edges,
+            )
+        )
+        rv.loc[node, connected] = False
+    return rv
+
+
+def _iter_m_connected(  # noqa:C901
+    graph: NxMixedGraph,
+    sources: Iterable[Variable],
+    *,
+    conditions: Collection[Variable],
+    remove_in_edges: Collection[Variable],
+    remove_out_edges: Collection[Variable],
+) -> Iterator[Variable]:
+    """Yield each node that's m-connected to the sources once, in the order it's reached."""
+    directed = graph.directed
+    undirected = graph.undirected
+
+    # colliders are open if they're ancestors of the conditions (in the mutilated graph)
+    ancestors: set[Variable] = set()
+    stack = list(conditions)
+    while stack:
+        node = stack.pop()
+        if node in ancestors:
+            continue
+        ancestors.add(node)
+        if node not in remove_in_edges:
+            stack.extend(
+                parent for parent in directed.predecessors(node) if parent not in remove_out_edges
+            )
+
+    # leaving a source is like arriving on a tail, since it's never a collider
+    visited: set[tuple[Variable, bool]] = set()
+    reached: set[Variable] = set()
+    states = [(source, _TAIL) for source in sources if source not in conditions]
+    while states:
+        node, mark = states.pop()
+        if (node, mark) in visited:
+            continue
+        visited.add((node, mark))
+        if node in conditions:
+            # a conditioned node only lets paths through as a collider
+            if mark is _TAIL:
+                continue
+            leave_on_tail = False
+            leave_on_head = True
+        else:
+            if node not in reached:
+                reached.add(node)
+                yield node
+            leave_on_tail = True
+            leave_on_head = mark is _TAIL or node in ancestors
+
+        if leave_on_tail and node not in remove_out_edges:
+            states.extend(
+                (child, _HEAD)
+                for child in directed.successors(node)
+                if child not in remove_in_edges
+            )
+        if leave_on_head and node not in remove_in_edges:
+            states.extend(
+                (parent, _TAIL)
+                for parent in directed.predecessors(node)
+                if parent not in remove_out_edges
+            )
+            states.extend(
+                (neighbor, _HEAD)
+                for neighbor in undirected.neighbors(node)
+                if neighbor not in remove_in_edges
+            )
@@ -0,0 +1,247 @@
+"""Find minimal and minimum m-separators in polynomial time, following [vanderzander2019]_.
+
+Rather than enumerating candidate sets of conditions from smallest to largest like
+:func:`y0.algorithm.conditional_independencies.d_separations`, these work on the augmented
+graph of the ancestors of the nodes to separate, in which m-separation is the same as
+vertex separation. A minimal separator (one with no separating proper subset) is found with
+two reachability searches, and a minimum separator (one with the fewest nodes) is found
+with a minimum vertex cut.
+
+.. code-block:: python
+
+    from y0.algorithm.separation import find_minimal_separator, find_minimum_separator
+    from y0.dsl import X, Y, Z1, Z2, Z3
+    from y0.graph import NxMixedGraph
+
+    graph = NxMixedGraph.from_edges(
+        directed=[(Z1, X), (Z2, X), (Z1, Z3), (Z2, Z3), (Z3, Y)],
+    )
+    assert find_minimal_separator(graph, X, Y, include=[Z1, Z2]) == {Z1, Z2}
+    assert find_minimum_separator(graph, X, Y) == {Z3}
+"""
+
+from collections.abc import Collection, Iterable, Iterator
+from itertools import combinations
+
+import networkx as nx
+from tqdm.auto import tqdm
+
+from y0.dsl import Variable
+from y0.graph import NxMixedGraph
+from y0.struct import DSeparationJudgement
+
+__all__ = [
+    "find_minimal_separator",
+    "find_minimum_separator",
+    "minimal_separations",
+]
+
+
+def find_minimal_separator(
+    graph: NxMixedGraph,
+    left: Variable | Iterable[Variable],
+    right: Variable | Iterable[Variable],
+    *,
+    include: Iterable[Variable] | None = None,
+    restrict: Iterable[Variable] | None = None,
+) -> set[Variable] | None:
+    """Find a minimal set of nodes that m-separates two sets of nodes.
+
+    :param graph: An acyclic directed mixed graph
+    :param left: A node or nodes in the graph
+    :param right: A node or nodes in the graph
+    :param include: Nodes that must be in the separator
+    :param restrict: Nodes that the separator must be chosen from. If none are given, all
+        nodes other than the left and right nodes can be chosen.
+    :returns: A separator that contains the included nodes, such that no proper subset that
+        contains the included nodes is also a separator, or None if there isn't a separator.
+        This takes $O(V+E)$ time on the augmented graph.
+    :raises ValueError: if the included nodes aren't a subset of the restricted nodes
+    """
+    prepared = _prepare(graph, left, right, include=include, restrict=restrict)
+    if prepared is None:
+        return None
+    augmented, left, right, include, candidates = prepared
+    # keep the candidates next to the left side, then the ones of those next to the right
+    candidates = _get_reachable(augmented, left, candidates)
+    candidates = _get_reachable(augmented, right, candidates)
+    return candidates | include
+
+
+def find_minimum_separator(
+    graph: NxMixedGraph,
+    left: Variable | Iterable[Variable],
+    right: Variable | Iterable[Variable],
+    *,
+    include: Iterable[Variable] | None = None,
+    restrict: Iterable[Variable] | None = None,
+) -> set[Variable] | None:
+    """Find a set of nodes with the fewest elements that m-separates two sets of nodes.
+
+    :param graph: An acyclic directed mixed graph
+    :param left: A node or nodes in the graph
+    :param right: A node or nodes in the graph
+    :param include: Nodes that must be in the separator
+    :param restrict: Nodes that the separator must be chosen from. If none are given, all
+        nodes other than the left and right nodes can be chosen.
+    :returns: A separator that contains the included nodes, such that no separator that
+        contains the included nodes has fewer elements, or None if there isn't a separator.
+        This takes a minimum vertex cut in the augmented graph.
+    :raises ValueError: if the included nodes aren't a subset of the restricted nodes
+    """
+    prepared = _prepare(graph, left, right, include=include, restrict=restrict)
+    if prepared is None:
+        return None
+    augmented, left, right, include, candidates = prepared
+
+    # split each node into an in-node and an out-node, where only the arc between the two
+    # halves of a candidate can be cut. Arcs without a capacity can't be cut.
+    flow = nx.DiGraph()
+    for node in augmented:
+        if node in candidates:
+            flow.add_edge((node, False), (node, True), capacity=1)
+        else:
+            flow.add_edge((node, False), (node, True))
+    for u, v in augmented.edges():
+        flow.add_edge((u, True), (v, False))
+        flow.add_edge((v, True), (u, False))
+    source, sink = object(), object()
+    for node in left:
+        flow.add_edge(source, (node, False))
+    for node in right:
+        flow.add_edge((node, True), sink)
+
+    _, (reachable, _) = nx.minimum_cut(flow, source, sink)
+    return {
+        node for node in candidates if (node, False) in reachable and (node, True) not in reachable
+    } | include
+
+
+def minimal_separations(
+    graph: NxMixedGraph,
+    *,
+    minimum: bool = True,
+    max_conditions: int | None = None,
+    verbose: bool | None = False,
+) -> Iterator[DSeparationJudgement]:
+    """Generate a d-separation for each pair of nodes that has one, without enumerating conditions.
+
+    :param graph: An acyclic directed mixed graph
+    :param minimum: If true (default), finds each separator with :func:`find_minimum_separator`,
+        so the conditions are the fewest possible, like in
+        :func:`y0.algorithm.conditional_independencies.d_separations`. Otherwise, finds each
+        with the faster :func:`find_minimal_separator`, so no condition can be removed.
+    :param max_conditions: Longest set of conditions to investigate, like in
+        :func:`y0.algorithm.conditional_independencies.d_separations`
+    :param verbose: If true, prints extra output with tqdm
+    :yields: True d-separation judgements
+    """
+    find = find_minimum_separator if minimum else find_minimal_separator
+    vertices = list(graph.nodes())
+    for i, a in enumerate(
+        tqdm(vertices, disable=not verbose, desc="Checking d-separations", unit="node")
+    ):
+        adjacent = {
+            *graph.directed.predecessors(a),
+            *graph.directed.successors(a),
+            *graph.undirected.neighbors(a),
+        }
+        for b in vertices[i + 1 :]:
+            if b in adjacent:
+                continue  # adjacent nodes are never d-separated
+            conditions = find(graph, a, b)
+            if conditions is None:
+                continue
+            if max_conditions is not None and len(conditions) >= max_conditions:
+                continue
+            yield DSeparationJudgement.create(
+                left=a, right=b, conditions=conditions, separated=True
+            )
+
+
+def _prepare(
+    graph: NxMixedGraph,
+    left: Variable | Iterable[Variable],
+    right: Variable | Iterable[Variable],
+    *,
+    include: Iterable[Variable] | None,
+    restrict: Iterable[Variable] | None,
+) -> tuple[nx.Graph, set[Variable], set[Variable], set[Variable], set[Variable]] | None:
+    """Get the augmented graph and the candidates for a separator, if there's a separator.
+
+    Since a separator might as well include all the ancestors it's allowed to (restricting
+    to the ancestors of the left, right, and included nodes), the largest candidate separator
+    is checked first. The included nodes are removed from the augmented graph, since they
+    always block paths.
+    """
+    left = {left} if isinstance(left, Variable) else set(left)
+    right = {right} if isinstance(right, Variable) else set(right)
+    include = set() if include is None else set(include)
+    if restrict is not None:
+        restrict = set(restrict)
+        if not include <= restrict:
+            raise ValueError(f"included nodes aren't all restricted nodes: {include - restrict}")
+    if left & right or include & (left | right):
+        return None
+
+    ancestors = graph.ancestors_inclusive(left | right | include)
+    augmented = _get_augmented_graph(graph, ancestors)
+    augmented.remove_nodes_from(include)
+    candidates = ancestors - left - right - include
+    if restrict is not None:
+        candidates &= restrict
+    if _get_reachable(augmented, left, candidates | right) & right:
+        return None
+    return augmented, left, right, include, candidates
+
+
+def _get_augmented_graph(graph: NxMixedGraph, nodes: Collection[Variable]) -> nx.Graph:
+    """Get the augmented graph of the subgraph induced by the nodes.
+
+    Two nodes are adjacent in the augmented graph if they're connected by a path on which
+    every intermediate node is a collider, i.e., if they're in the union of a district and
+    its parents. This is the moral graph for directed acyclic graphs.
+    """
+    directed = graph.directed
+    undirected = graph.undirected
+    rv = nx.Graph()
+    rv.add_nodes_from(nodes)
+    visited: set[Variable] = set()
+    for node in nodes:
+        if node in visited:
+            continue
+        district = {node}
+        stack = [node]
+        while stack:
+            for neighbor in undirected.neighbors(stack.pop()):
+                if neighbor in nodes and neighbor not in district:
+                    district.add(neighbor)
+                    stack.append(neighbor)
+        visited.update(district)
+        family = district.union(
+            *(
+                (parent for parent in directed.predecessors(member) if parent in nodes)
+                for member in district
+            )
+        )
+        rv.add_edges_from(combinations(family, 2))
+    return rv
+
+
+def _get_reachable(
+    graph: nx.Graph, sources: Iterable[Variable], blockers: Collection[Variable]
+) -> set[Variable]:
+    """Get the blockers that can be reached from the sources without passing through a blocker."""
+    rv: set[Variable] = set()
+    visited = set(sources)
+    stack = list(visited)
+    while stack:
+        for neighbor in graph.neighbors(stack.pop()):
+            if neighbor in visited:
+                continue
+            visited.add(neighbor)
+            if neighbor in blockers:
+                rv.add(neighbor)
+            else:
+                stack.append(neighbor)
+    return rv
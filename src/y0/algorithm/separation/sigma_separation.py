@@ -1,6 +1,15 @@
-"""Implementation of sigma-separation from [forre2018]_."""
-
-from collections.abc import Iterable, Sequence
+"""Implementation of sigma-separation from [forre2018]_.
+
+Rather than enumerating the paths between two nodes and checking each one with
+:func:`is_z_sigma_open`, :func:`are_sigma_separated` searches for a σ-open walk in the style
+of :mod:`y0.algorithm.separation.m_separation`. Whether a walk is blocked at a node only
+depends on the edges it arrives and leaves on, so each state of the search is a node and
+whether the walk arrived at it on an arrowhead or a tail. A conditioned non-collider can't
+be left or arrived at on a tail from outside of its strongly connected component, which is
+checked on each step. Each node is visited at most twice, so each query takes $O(V+E)$ time.
+"""
+
+from collections.abc import Collection, Iterable, Iterator, Sequence
 from typing import cast
 
 import networkx as nx
@@ -11,18 +20,26 @@ from y0.graph import NxMixedGraph
 
 __all__ = [
     "are_sigma_separated",
+    "get_sigma_connected",
+    "get_sigma_separated",
     "is_z_sigma_open",
     "get_equivalence_classes",
 ]
 
+#: Arriving at a node on an edge whose mark at that node is an arrowhead
+_HEAD = True
+#: Arriving at a node on an edge whose mark at that node is a tail
+_TAIL = False
+
 
 def are_sigma_separated(
     graph: NxMixedGraph,
-    left: Variable,
-    right: Variable,
+    left: Variable | Iterable[Variable],
+    right: Variable | Iterable[Variable],
     *,
     conditions: Iterable[Variable] | None = None,
     cutoff: int | None = None,
+    sigma: dict[Variable, set[Variable]] | None = None,
 ) -> bool:
     """Test if two variables are sigma-separated.
 
@@ -38,25 +55,167 @@ def are_sigma_separated(
     opposite of σ-connected (logical not).
 
     :param graph: Graph to test
-    :param left: A node in the graph
-    :param right: A node in the graph
+    :param left: A node or nodes in the graph
+    :param right: A node or nodes in the graph
     :param conditions: A collection of graph nodes
-    :param cutoff: The maximum path length to check. By default, is unbounded.
+    :param cutoff: The maximum path length to check. If given, the simple paths up to this
+        length are enumerated and checked with :func:`is_z_sigma_open`, which takes
+        exponential time. By default, σ-open walks of any length are searched for in
+        linear time.
+    :param sigma: The equivalence classes, as calculated by :func:`get_equivalence_classes`.
+        If none are given, they're calculated.
     :return: If a and b are sigma-separated.
     """
+    if cutoff is not None:
+        return _are_sigma_separated_by_paths(
+            graph, left, right, conditions=conditions, cutoff=cutoff, sigma=sigma
+        )
+    right = {right} if isinstance(right, Variable) else set(right)
+    return not any(
+        node in right
+        for node in _iter_sigma_connected(
+            graph,
+            {left} if isinstance(left, Variable) else left,
+            conditions=set() if conditions is None else set(conditions),
+            sigma=get_equivalence_classes(graph) if sigma is None else sigma,
+        )
+    )
+
+
+def get_sigma_connected(
+    graph: NxMixedGraph,
+    sources: Variable | Iterable[Variable],
+    *,
+    conditions: Iterable[Variable] | None = None,
+    sigma: dict[Variable, set[Variable]] | None = None,
+) -> set[Variable]:
+    """Get the nodes that are σ-connected to any of the sources.
+
+    :param graph: A directed mixed graph, possibly with cycles
+    :param sources: A node or nodes in the graph
+    :param conditions: A collection of graph nodes
+    :param sigma: The equivalence classes, as calculated by :func:`get_equivalence_classes`.
+        If none are given, they're calculated.
+    :returns: The nodes that aren't in the conditions and that have a σ-open walk to one of
+        the sources, including the sources themselves if they aren't in the conditions
+    """
+    return set(
+        _iter_sigma_connected(
+            graph,
+            {sources} if isinstance(sources, Variable) else sources,
+            conditions=set() if conditions is None else set(conditions),
+            sigma=get_equivalence_classes(graph) if sigma is None else sigma,
+        )
+    )
+
+
+def get_sigma_separated(
+    graph: NxMixedGraph,
+    sources: Variable | Iterable[Variable],
+    targets: Iterable[Variable],
+    *,
+    conditions: Iterable[Variable] | None = None,
+    sigma: dict[Variable, set[Variable]] | None = None,
+) -> set[Variable]:
+    """Get the targets that are σ-separated from all of the sources.
+
+    The search stops as soon as all targets have been reached.
+
+    :param graph: A directed mixed graph, possibly with cycles
+    :param sources: A node or nodes in the graph
+    :param targets: The nodes to check
+    :param conditions: A collection of graph nodes
+    :param sigma: The equivalence classes, as calculated by :func:`get_equivalence_classes`.
+        If none are given, they're calculated.
+    :returns: The targets that don't have a σ-open walk to any of the sources
+    """
+    rv = set(targets)
+    if not rv:
+        return rv
+    for node in _iter_sigma_connected(
+        graph,
+        {sources} if isinstance(sources, Variable) else sources,
+        conditions=set() if conditions is None else set(conditions),
+        sigma=get_equivalence_classes(graph) if sigma is None else sigma,
+    ):
+        rv.discard(node)
+        if not rv:
+            break
+    return rv
+
+
+def _iter_sigma_connected(
+    graph: NxMixedGraph,
+    sources: Iterable[Variable],
+    *,
+    conditions: Collection[Variable],
+    sigma: dict[Variable, set[Variable]],
+) -> Iterator[Variable]:
+    """Yield each node that's σ-connected to the sources once, in the order it's reached."""
+    directed = graph.directed
+    undirected = graph.undirected
+
+    # leaving a source is like arriving on a tail, since it's never a collider
+    visited: set[tuple[Variable, bool]] = set()
+    reached: set[Variable] = set()
+    states = [(source, _TAIL) for source in sources if source not in conditions]
+    while states:
+        node, mark = states.pop()
+        if (node, mark) in visited:
+            continue
+        visited.add((node, mark))
+        if node in conditions:
+            # a conditioned node is open as a collider, and as a non-collider as long as
+            # the walk doesn't leave it on a tail to outside its strongly connected component
+            children: Iterable[Variable] = (
+                child for child in directed.successors(node) if child in sigma[node]
+            )
+            leave_on_head = True
+        else:
+            if node not in reached:
+                reached.add(node)
+                yield node
+            children = directed.successors(node)
+            leave_on_head = mark is _TAIL
+
+        states.extend((child, _HEAD) for child in children)
+        if leave_on_head:
+            states.extend(
+                (parent, _TAIL)
+                for parent in directed.predecessors(node)
+                # arriving on a tail is the same as leaving on one
+                if parent not in conditions or node in sigma[parent]
+            )
+            states.extend((neighbor, _HEAD) for neighbor in undirected.neighbors(node))
+
+
+def _are_sigma_separated_by_paths(
+    graph: NxMixedGraph,
+    left: Variable | Iterable[Variable],
+    right: Variable | Iterable[Variable],
+    *,
+    conditions: Iterable[Variable] | None,
+    cutoff: int | None,
+    sigma: dict[Variable, set[Variable]] | None,
+) -> bool:
     if conditions is None:
         conditions = set()
     else:
         conditions = set(conditions)
+    if sigma is None:
+        sigma = get_equivalence_classes(graph)
 
-    sigma = get_equivalence_classes(graph)
+    disoriented = graph.disorient()
     return not any(
         is_z_sigma_open(graph, path, conditions=conditions, sigma=sigma)
         # Technically, this algorithm should generate all paths, which could include
         # repeat visits to nodes and edges, but this is computationally intractable,
         # so the is_z_sigma_open() subroutine contains a novel path augmentation
         # algorithm. This might not be officially complete.
-        for path in nx.all_simple_paths(graph.disorient(), left, right, cutoff=cutoff)
+        for source in ({left} if isinstance(left, Variable) else left)
+        for path in nx.all_simple_paths(
+            disoriented, source, {right} if isinstance(right, Variable) else right, cutoff=cutoff
+        )
     )
 
 
@@ -112,7 +271,12 @@ def _triple_has_correct_form(
     # this is a better solution than generating infinite paths, but might still be mathematically
     # incomplete. In this setup, 𝑣3→𝑣4↔𝑣6 becomes 𝑣3→𝑣4→𝑣5←𝑣4↔𝑣6 to get some sweet backtrack paths
     # through the middle node to a neighbor and then back before going to the right node.
-    neighbors = {n for n in graph.disorient().neighbors(middle) if n != middle}
+    neighbors = {
+        *graph.directed.predecessors(middle),
+        *graph.directed.successors(middle),
+        *graph.undirected.neighbors(middle),
+    }
+    neighbors.discard(middle)
     for neighbor in neighbors:
         if (
             _triple_helper(graph, left, middle, neighbor, conditions, sigma)
@@ -268,6 +432,7 @@ def get_equivalence_classes(graph: NxMixedGraph) -> dict[Variable, set[Variable]
        ignores the bi- and undirected edges of the σ-CG.
     """
     return {
-        node: graph.ancestors_inclusive(node).intersection(graph.descendants_inclusive(node))
-        for node in graph.nodes()
+        node: set(component)
+        for component in nx.strongly_connected_components(graph.directed)
+        for node in component
     }
@@ -6,8 +6,11 @@
 """
 
 import logging
-from collections.abc import Collection
+from collections.abc import Callable, Collection
+from functools import lru_cache
 
+from y0.algorithm.budget import check_budget
+from y0.algorithm.instrumentation import instrumented, mark_line, record_subgraph
 from y0.dsl import (
     Distribution,
     Expression,
@@ -20,9 +23,10 @@ from y0.dsl import (
     Sum,
     Variable,
 )
-from y0.graph import NxMixedGraph
+from y0.graph import NxMixedGraph, TopologicalIndex, _ensure_set
 
 __all__ = [
+    "tian_pearl_identify",
     "identify_district_variables",
     "compute_c_factor_conditioning_on_topological_predecessors",
     "compute_q_value_of_variables_with_low_topological_ordering_indices",
@@ -34,6 +38,79 @@ __all__ = [
 logger = logging.getLogger(__name__)
 
 
+def tian_pearl_identify(
+    *,
+    graph: NxMixedGraph,
+    treatments: Variable | Collection[Variable],
+    outcomes: Variable | Collection[Variable],
+) -> Expression | None:
+    r"""Identify the effect of the treatments on the outcomes with Tian and Pearl's algorithm from [tian03a]_.
+
+    This is the whole-query driver built on :func:`identify_district_variables`, following
+    Section 5 of [tian03a]_:
+
+    1. Let $D$ be the ancestors of $Y$ in $G_{V \backslash X}$, and let $D_1, \ldots, D_k$
+       be the districts of $G_D$.
+    2. Each $D_i$ is contained in a district $S_j$ of $G$, whose C-factor $Q[S_j]$ is
+       identifiable from $P(v)$ by Lemma 1.
+    3. Compute each $Q[D_i]$ from $Q[S_j]$ with :func:`identify_district_variables`.
+       If any fails, the query is not identifiable.
+    4. Return $P_x(y) = \sum_{D \backslash Y} \prod_i Q[D_i]$.
+
+    The C-factors of the districts of $G$ are computed once and shared between the calls
+    for each $D_i$, and the C-factors computed inside :func:`identify_district_variables`
+    are memoized.
+
+    :param graph: An acyclic directed mixed graph
+    :param treatments: The node or nodes that are treated
+    :param outcomes: The node or nodes that are outcomes
+    :returns: An expression for $P_x(y)$ if the query is identifiable, otherwise None.
+    """
+    treatments = _ensure_set(treatments)
+    outcomes = _ensure_set(outcomes)
+    topo = list(graph.topological_sort())
+    index = TopologicalIndex(topo)
+
+    ancestors = graph.remove_nodes_from(treatments).ancestors_inclusive(outcomes)
+    ancestors_subgraph = record_subgraph(graph.subgraph(ancestors))
+    graph_probability = P(topo)
+
+    node_to_district = {node: district for district in graph.districts() for node in district}
+    district_probabilities: dict[frozenset[Variable], Expression] = {}
+    probabilities = []
+    for ancestral_district in sorted(ancestors_subgraph.districts(), key=_topological_key(index)):
+        district = node_to_district[next(iter(ancestral_district))]
+        district_probability = district_probabilities.get(district)
+        if district_probability is None:
+            district_probability = district_probabilities[district] = compute_c_factor(
+                district=index.restrict(district).ordering,
+                subgraph_variables=index.positions,
+                subgraph_probability=graph_probability,
+                graph_topo=topo,
+            )
+        probability = identify_district_variables(
+            input_variables=frozenset(ancestral_district),
+            input_district=district,
+            district_probability=district_probability,
+            graph=graph,
+            topo=topo,
+        )
+        if probability is None:
+            return None
+        probabilities.append(probability)
+
+    ranges = [v for v in topo if v in ancestors and v not in outcomes]
+    return Sum.safe(Product.safe(probabilities), ranges)
+
+
+def _topological_key(index: TopologicalIndex) -> Callable[[frozenset[Variable]], int]:
+    def _key(district: frozenset[Variable]) -> int:
+        return min(index.positions[node] for node in district)
+
+    return _key
+
+
+@instrumented("Tian ID")
 def identify_district_variables(  # noqa:C901
     *,
     input_variables: frozenset[Variable],
@@ -67,6 +144,7 @@ def identify_district_variables(  # noqa:C901
         If we get to the end of the conditional, which still needs an "else"
 
     """
+    check_budget(district_probability)
     if not input_variables.intersection(input_district) == input_variables:
         # if not all(v in input_district for v in input_variables):
         raise KeyError(
@@ -77,7 +155,7 @@ def identify_district_variables(  # noqa:C901
             "In identify_district_variables: at least one input district variable is not in the "
             "topologically sorted variable list."
         )
-    district_subgraph = graph.subgraph(vertices=input_district)  # $G_{T}$
+    district_subgraph = record_subgraph(graph.subgraph(vertices=input_district))  # $G_{T}$
     if len(district_subgraph.districts()) > 1:
         raise TypeError(
             "In identify_district_variables: the subgraph of the input graph G comprised of the"
@@ -92,6 +170,7 @@ def identify_district_variables(  # noqa:C901
         )
 
     # A = Ancestors of C in $G_{T}$
+    mark_line(1)
     ancestral_set = frozenset(district_subgraph.ancestors_inclusive(input_variables))
 
     # Next, Tikka has an additional line intersecting the ancestral set with the set T in case any C was not in T,
@@ -99,6 +178,7 @@ def identify_district_variables(  # noqa:C901
 
     ordered_ancestral_set = [a for a in topo if a in ancestral_set]
     if ancestral_set == input_variables:
+        mark_line(2)
         logger.debug("In identify_district_variables: A = C. Applying Lemma 3.")
         logger.debug("   Subgraph_probability = " + district_probability.to_latex())
         rv = compute_ancestral_set_q_value(
@@ -109,12 +189,14 @@ def identify_district_variables(  # noqa:C901
         )
         logger.debug("   Returning Q value: " + rv.to_latex())
     elif ancestral_set == input_district:
+        mark_line(3)
         logger.debug("In identify_district_variables: A = T. Returning None (i.e., FAIL).")
         logger.debug("   A = " + str(input_district))
         logger.debug("   T = " + str(ancestral_set))
         rv = None
     elif input_variables.issubset(ancestral_set) and ancestral_set.issubset(input_district):
-        ancestral_set_subgraph = graph.subgraph(vertices=ordered_ancestral_set)
+        mark_line(4)
+        ancestral_set_subgraph = record_subgraph(graph.subgraph(vertices=ordered_ancestral_set))
         ancestral_set_subgraph_districts = list(ancestral_set_subgraph.districts())
         targeted_ancestral_set_subgraph_district = ancestral_set_subgraph_districts[
             [
@@ -230,7 +312,8 @@ def compute_c_factor_conditioning_on_topological_predecessors(
     :returns: An expression for Q[district].
     """
     # (Topological sort is O(V+E): https://stackoverflow.com/questions/31010922/)
-    variables = set(topo)
+    index = TopologicalIndex(topo)
+    variables = index.positions
     logger.debug(
         "In _compute_c_factor_conditioning_on_topological_predecessors: topo = " + str(topo)
     )
@@ -256,7 +339,7 @@ def compute_c_factor_conditioning_on_topological_predecessors(
         # (but not Lemma 4), we have to make sure we're also conditioning on those variables.
         graph_probability_parents = set(graph_probability.parents)
         for variable in district:
-            preceding_variables = topo[: topo.index(variable)]
+            preceding_variables = index.predecessors(variable)
             conditioned_variables = graph_probability_parents.union(preceding_variables)  # V^(i-1)
             pp = PopulationProbability(
                 population=graph_probability.population,
@@ -280,7 +363,7 @@ def compute_c_factor_conditioning_on_topological_predecessors(
         # (but not Lemma 4), we have to make sure we're also conditioning on those variables.
         graph_probability_parents = set(graph_probability.parents)
         for variable in district:
-            preceding_variables = topo[: topo.index(variable)]
+            preceding_variables = index.predecessors(variable)
             conditioned_variables = graph_probability_parents.union(preceding_variables)  # V^(i-1)
             probability = P(variable | conditioned_variables)  # v_i
             probabilities.append(probability)
@@ -381,23 +464,25 @@ def compute_c_factor_marginalizing_over_topological_successors(
     :param topo: a topological ordering of the vertices in the subgraph $G_{H}$ in question.
     :returns: An expression for Q[district].
     """
+    positions = TopologicalIndex(topo).positions
+    q_values: dict[int, Expression] = {}
 
-    def _get_expression_from_index(index: int) -> Expression:  # Compute $Q[H^{i}]$ given i
-        current_index_expr = compute_q_value_of_variables_with_low_topological_ordering_indices(
-            vertex=topo[index], graph_probability=graph_probability, topo=topo
-        )
+    def _get_q_value(index: int) -> Expression:  # Compute $Q[H^{i}]$ given i
+        rv = q_values.get(index)
+        if rv is None:
+            rv = q_values[index] = Sum.safe(graph_probability, topo[index + 1 :])
+        return rv
+
+    def _get_expression_from_index(index: int) -> Expression:
+        current_index_expr = _get_q_value(index)
         if index == 0:
             return current_index_expr
-        previous_index_expr = compute_q_value_of_variables_with_low_topological_ordering_indices(
-            vertex=topo[index - 1], graph_probability=graph_probability, topo=topo
-        )
-        rv = Fraction(current_index_expr, previous_index_expr)
-        return rv
+        return Fraction(current_index_expr, _get_q_value(index - 1))
 
     expressions = []
-    for _, vertex in enumerate(district):
+    for vertex in district:
         logger.debug("In Lemma 4(ii): vertex = " + str(vertex))
-        index = topo.index(vertex)
+        index = positions[vertex]
         expression = _get_expression_from_index(index)
         expressions.append(expression)
         logger.debug("\nIndex = %d, Q[H^(i)] = %s", index, expression)
@@ -430,6 +515,23 @@ def compute_c_factor(
     :raises TypeError: In _compute_c_factor: expected the subgraph_probability parameter to be a simple probability.
     :returns: An expression for Q[district].
     """
+    # C-factors are computed for the same district and Q value many times during the recursion
+    # of identify_district_variables and in counterfactual transportability, so they're memoized
+    args = tuple(district), frozenset(subgraph_variables), subgraph_probability, tuple(graph_topo)
+    try:
+        hash(subgraph_probability)
+    except TypeError:  # some expressions, like One, aren't hashable
+        return _compute_c_factor.__wrapped__(*args)
+    return _compute_c_factor(*args)
+
+
+@lru_cache(maxsize=1024)
+def _compute_c_factor(
+    district: tuple[Variable, ...],
+    subgraph_variables: frozenset[Variable],
+    subgraph_probability: Expression,
+    graph_topo: tuple[Variable, ...],
+) -> Expression:
     # The graph_topo is the ordering of vertices in G, but the lemmas use the topological sorting in a subgraph H of G.
     # We take in the topological ordering of G to make testing easier, as there could be multiple ways to
     # sort the vertices in H topologically. It is also faster as topological sort is O(V+E) and getting
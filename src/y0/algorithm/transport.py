@@ -1,12 +1,16 @@
 """Implement of surrogate outcomes and transportability from https://arxiv.org/abs/1806.07172."""
 
+from __future__ import annotations
+
 import logging
-from collections.abc import Collection, Iterable
-from copy import deepcopy
+from collections.abc import Callable, Collection, Iterable, MutableMapping
 from dataclasses import dataclass
-from typing import cast
+from typing import Any, cast
 
-from y0.algorithm.conditional_independencies import are_d_separated
+from y0.algorithm.budget import check_budget
+from y0.algorithm.conditional_independencies import DSeparationBackend, are_d_separated
+from y0.algorithm.instrumentation import instrumented, mark_line, record_subgraph
+from y0.algorithm.separation.m_separation import are_m_separated
 from y0.dsl import (
     TARGET_DOMAIN,
     CounterfactualVariable,
@@ -31,6 +35,8 @@ __all__ = [
     "identify_target_outcomes",
     "trso",
     "TransportQuery",
+    "TRSOKey",
+    "TRSOMemo",
 ]
 
 logger = logging.getLogger(__name__)
@@ -170,6 +176,82 @@ class TRSOQuery:
     graphs: dict[Population, NxMixedGraph]
     surrogate_interventions: dict[Population, set[Variable]]
 
+    def copy(self) -> TRSOQuery:
+        """Copy the query.
+
+        The graphs and expression aren't copied since the algorithm replaces them
+        rather than modifying them in place, which is much cheaper than a deep copy.
+        """
+        return TRSOQuery(
+            target_interventions=set(self.target_interventions),
+            target_outcomes=set(self.target_outcomes),
+            expression=self.expression,
+            active_interventions=set(self.active_interventions),
+            domain=self.domain,
+            domains=set(self.domains),
+            graphs=dict(self.graphs),
+            surrogate_interventions={
+                domain: set(interventions)
+                for domain, interventions in self.surrogate_interventions.items()
+            },
+        )
+
+    def get_key(
+        self, fingerprint: Callable[[NxMixedGraph], str] = NxMixedGraph.fingerprint
+    ) -> TRSOKey:
+        """Get a key for memoizing the result of TRSO on this query.
+
+        :param fingerprint: A function that gets the fingerprint of a graph. TRSO passes
+            one that remembers the fingerprint of each graph, since most subqueries share
+            the graphs of the query they came from.
+        :returns: A key for the query
+        """
+        return (
+            self.domain,
+            frozenset((domain, fingerprint(graph)) for domain, graph in self.graphs.items()),
+            frozenset(self.target_interventions),
+            frozenset(self.target_outcomes),
+            frozenset(self.active_interventions),
+            self.expression,
+            frozenset(
+                (domain, frozenset(interventions))
+                for domain, interventions in self.surrogate_interventions.items()
+            ),
+        )
+
+
+#: A key for TRSO subqueries, made from the domain, the fingerprints of the graphs in
+#: each domain, the target interventions, target outcomes, active interventions,
+#: expression, and surrogate interventions
+TRSOKey = tuple[
+    Population,
+    frozenset[tuple[Population, str]],
+    frozenset[Variable],
+    frozenset[Variable],
+    frozenset[Variable],
+    Expression,
+    frozenset[tuple[Population, frozenset[Variable]]],
+]
+#: A memo of the results of TRSO subqueries, where None means the subquery failed
+TRSOMemo = MutableMapping[TRSOKey, Expression | None]
+
+
+class _FingerprintCache:
+    """Remember the fingerprints of the graphs seen during one call to :func:`trso`.
+
+    Graphs are keyed by identity, since the algorithm replaces graphs rather than
+    modifying them in place. The graphs are kept so their identities aren't reused.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[int, tuple[NxMixedGraph, str]] = {}
+
+    def __call__(self, graph: NxMixedGraph) -> str:
+        entry = self._data.get(id(graph))
+        if entry is None:
+            entry = self._data[id(graph)] = graph, graph.fingerprint()
+        return entry[1]
+
 
 def surrogate_to_transport(
     *,
@@ -241,12 +323,12 @@ def trso_line2(
     :returns: A TRSO query with modified attributes.
     :raises TypeError: if the new query's expression is not a population probability
     """
-    new_query = deepcopy(query)
+    new_query = query.copy()
     new_query.target_interventions.intersection_update(outcomes_ancestors)
 
     for domain, graph in query.graphs.items():
         outcome_ancestors_domain = graph.ancestors_inclusive(query.target_outcomes)
-        new_query.graphs[domain] = graph.subgraph(outcome_ancestors_domain)
+        new_query.graphs[domain] = record_subgraph(graph.subgraph(outcome_ancestors_domain))
 
     new_query.expression = Sum.safe(
         query.expression,
@@ -277,7 +359,7 @@ def trso_line3(query: TRSOQuery, additional_interventions: set[Variable]) -> TRS
     :param additional_interventions: interventions to be added to target_interventions
     :returns: A TRSO query with modified attributes.
     """
-    new_query = deepcopy(query)
+    new_query = query.copy()
     new_query.target_interventions.update(additional_interventions)
     return new_query
 
@@ -295,7 +377,7 @@ def trso_line4(
     graph = query.graphs[query.domain]
     rv = {}
     for component in components:
-        new_query = deepcopy(query)
+        new_query = query.copy()
         new_query.target_outcomes = set(component)
         new_query.target_interventions = get_regular_nodes(graph) - component
         rv[component] = new_query
@@ -337,10 +419,12 @@ def _line_6_helper(query: TRSOQuery, domain: Population, graph: NxMixedGraph) ->
     ):
         return None
 
-    new_query = deepcopy(query)
+    new_query = query.copy()
     new_query.target_interventions = query.target_interventions - surrogate_interventions
     new_query.domain = domain
-    new_query.graphs[new_query.domain] = graph.remove_nodes_from(surrogate_intersect_target)
+    new_query.graphs[new_query.domain] = record_subgraph(
+        graph.remove_nodes_from(surrogate_intersect_target)
+    )
     new_query.active_interventions = surrogate_intersect_target
     return new_query
 
@@ -390,16 +474,31 @@ def activate_domain_and_interventions(
 
 
 def all_transports_d_separated(
-    graph: NxMixedGraph, target_interventions: set[Variable], target_outcomes: set[Variable]
+    graph: NxMixedGraph,
+    target_interventions: set[Variable],
+    target_outcomes: set[Variable],
+    *,
+    backend: DSeparationBackend = "bayes_ball",
 ) -> bool:
     """Check if all target_interventions are d-separated from target_outcomes.
 
     :param graph: The graph with transport nodes in this domain.
     :param target_interventions: Set of target interventions
     :param target_outcomes: Set of target interventions
+    :param backend: How to check d-separation. With ``"bayes_ball"``, the in-edges of the
+        interventions are skipped while searching and all pairs are checked in one search,
+        instead of copying the graph and checking each pair.
     :returns: True if all interventions are d-separated from all outcomes, False otherwise.
     """
     transportability_nodes = get_transport_nodes(graph)
+    if backend == "bayes_ball":
+        return are_m_separated(
+            graph,
+            transportability_nodes,
+            target_outcomes,
+            conditions=target_interventions,
+            remove_in_edges=target_interventions,
+        )
     graph_without_interventions = graph.remove_in_edges(target_interventions)
     return all(
         are_d_separated(
@@ -407,6 +506,7 @@ def all_transports_d_separated(
             transportability_node,
             outcome,
             conditions=target_interventions,
+            backend=backend,
         )
         for transportability_node in transportability_nodes
         if transportability_node in graph_without_interventions
@@ -432,14 +532,13 @@ def trso_line9(query: TRSOQuery, district: set[Variable]) -> Expression:
         #  that triggers this line, then it can be safely removed
         raise RuntimeError
 
-    ordering = list(query.graphs[query.domain].topological_sort())
+    ordering = query.graphs[query.domain].topological_index()
     ordering_set = set(ordering)
     my_product: Expression = One()
     for node in district:
-        i = ordering.index(node)
-        pre, post = ordering[:i], ordering[: i + 1]
-        pre_set = ordering_set - set(post)
-        post_set = ordering_set - set(pre)
+        pre = ordering.predecessors(node)
+        post_set = ordering_set.difference(pre)
+        pre_set = post_set - {node}
         numerator = Sum.safe(query.expression, pre_set)
         denominator = Sum.safe(query.expression, post_set)
         my_product *= numerator / denominator
@@ -464,29 +563,78 @@ def trso_line10(
     :param new_surrogate_interventions: Dict mapping domains to interventions performed in that domain.
     :returns: A modified TRSOQuery
     """
-    ordering = list(query.graphs[query.domain].topological_sort())
+    ordering = query.graphs[query.domain].topological_index()
     expressions = []
-    for node in district:
-        i = ordering.index(node)
-        pre_node = set(ordering[:i])
+    # building the product in topological order, with the predecessors in topological order,
+    # keeps it (and hence the memo key of the subquery) stable without canonicalizing it
+    for node in ordering.restrict(district).ordering:
+        pre_node = ordering.predecessors(node)
         # note tikka splits this into two expressions that when taken together equal pre_node
         distribution = Distribution.safe(node | pre_node)
         expressions.append(
             PopulationProbability(population=query.domain, distribution=distribution)
         )
 
-    new_query = deepcopy(query)
+    new_query = query.copy()
     new_query.target_interventions = query.target_interventions.intersection(district)
-    new_query.expression = canonicalize(Product.safe(expressions))
-    new_query.graphs[query.domain] = query.graphs[query.domain].subgraph(district)
+    new_query.expression = Product.safe(expressions)
+    new_query.graphs[query.domain] = record_subgraph(query.graphs[query.domain].subgraph(district))
     new_query.surrogate_interventions = new_surrogate_interventions
     return new_query
 
 
-def trso(query: TRSOQuery) -> Expression | None:  # noqa:C901
+def _get_trso_graph(args: tuple[Any, ...], kwargs: dict[str, Any]) -> NxMixedGraph:
+    query: TRSOQuery = args[0] if args else kwargs["query"]
+    return query.graphs[query.domain]
+
+
+def trso(
+    query: TRSOQuery,
+    *,
+    canonical: bool = True,
+    memo: TRSOMemo | None = None,
+) -> Expression | None:
     """Run the TRSO algorithm to evaluate a transport problem.
 
     :param query: A TRSO query, which contains 8 instance variables needed for TRSO
+    :param canonical: Should the result be canonicalized? The recursive calls build
+        expressions without canonicalizing them, so this is done only once on the
+        final expression. Set to false if the caller canonicalizes the result itself,
+        e.g., with its own variable ordering.
+    :param memo: A memo of the results for subqueries. By default, a new memo is
+        shared between the recursive calls made on this query. Pass the same dictionary
+        (or another mutable mapping) to several calls to share the results between
+        queries on the same domains. The memo isn't locked, so don't share it between
+        threads.
+    :returns: An Expression evaluating the given query, or None
+    """
+    if memo is None:
+        memo = {}
+    rv = _memoized_trso(query, memo=memo, fingerprint=_FingerprintCache())
+    if canonical:
+        return _c14n_safe(rv)
+    return rv
+
+
+def _memoized_trso(
+    query: TRSOQuery, *, memo: TRSOMemo, fingerprint: Callable[[NxMixedGraph], str]
+) -> Expression | None:
+    key = query.get_key(fingerprint)
+    if key in memo:
+        return memo[key]
+    rv = memo[key] = _trso(query, memo=memo, fingerprint=fingerprint)
+    return rv
+
+
+@instrumented("TRSO", _get_trso_graph)
+def _trso(  # noqa:C901
+    query: TRSOQuery, *, memo: TRSOMemo, fingerprint: Callable[[NxMixedGraph], str]
+) -> Expression | None:
+    """Run the TRSO algorithm without canonicalizing the results of each line.
+
+    :param query: A TRSO query, which contains 8 instance variables needed for TRSO
+    :param memo: A memo of the results for subqueries
+    :param fingerprint: A function that gets the fingerprint of a graph
     :returns: An Expression evaluating the given query, or None
     :raises RuntimeError: when an impossible condition is met
     """
@@ -512,62 +660,64 @@ def trso(query: TRSOQuery) -> Expression | None:  # noqa:C901
         query.graphs[query.domain].nodes(),
         query.surrogate_interventions,
     )
+    check_budget(query.expression)
 
     graph = query.graphs[query.domain]
     # line 1
     if not query.target_interventions:
+        mark_line(1)
         logger.debug("Calling trso algorithm line 1")
-        return canonicalize(trso_line1(query.target_outcomes, query.expression, graph))
+        return trso_line1(query.target_outcomes, query.expression, graph)
 
     # line 2
     outcome_ancestors = graph.ancestors_inclusive(query.target_outcomes)
     if get_regular_nodes(graph) - outcome_ancestors:
+        mark_line(2)
         new_query = trso_line2(query, outcome_ancestors)
         logger.debug("Calling trso algorithm line 2")
-        return _c14n_safe(trso(new_query))
+        return _memoized_trso(new_query, memo=memo, fingerprint=fingerprint)
 
     # line 3
     additional_interventions = graph.get_no_effect_on_outcomes(
         query.target_interventions, query.target_outcomes
     )
     if additional_interventions:
+        mark_line(3)
         new_query = trso_line3(query, additional_interventions)
         logger.debug("Calling trso algorithm line 3")
-        return _c14n_safe(trso(new_query))
+        return _memoized_trso(new_query, memo=memo, fingerprint=fingerprint)
 
     # line 4
-    districts_without_interventions: set[frozenset[Variable]] = graph.remove_nodes_from(
-        query.target_interventions
+    districts_without_interventions: set[frozenset[Variable]] = record_subgraph(
+        graph.remove_nodes_from(query.target_interventions)
     ).districts()
     if len(districts_without_interventions) > 1:
+        mark_line(4)
         subqueries = trso_line4(
             query,
             districts_without_interventions,
         )
-        terms = []
         logger.debug("Calling trso algorithm line 4 with %d subqueries", len(subqueries))
+        terms = []
         for i, subquery in enumerate(subqueries.values()):
             logger.debug("Calling subquery %d of trso algorithm line 4", i + 1)
-            term = trso(subquery)
+            term = _memoized_trso(subquery, memo=memo, fingerprint=fingerprint)
             if term is None:
                 return None
             terms.append(term)
 
-        product = Product.safe(terms)
-        summand = canonicalize(product)  # fix sort order inside product
-        return canonicalize(
-            Sum.safe(
-                summand,
-                get_regular_nodes(graph) - query.target_interventions.union(query.target_outcomes),
-            )
+        return Sum.safe(
+            Product.safe(terms),
+            get_regular_nodes(graph) - query.target_interventions.union(query.target_outcomes),
         )
 
     # line 6
     if not query.active_interventions and query.surrogate_interventions:
+        mark_line(6)
         expressions: dict[Population, Expression] = {}
         for domain, subquery in trso_line6(query).items():
             logger.debug("Calling trso algorithm line 6 for domain %s", domain)
-            expression = trso(subquery)
+            expression = _memoized_trso(subquery, memo=memo, fingerprint=fingerprint)
             if expression is None:
                 continue
             expression = activate_domain_and_interventions(
@@ -579,19 +729,20 @@ def trso(query: TRSOQuery) -> Expression | None:  # noqa:C901
                 )
                 expressions[domain] = expression
         if len(expressions) == 1:
-            return canonicalize(next(iter(expressions.values())))
+            return next(iter(expressions.values()))
         elif len(expressions) > 1:
             # TODO need full integration test to trso() function that covers this branch
             #  or change to ``raise RuntimeError`` if it's not possible to reach in practice
             logger.warning("more than one expression were non-none")
             # What if more than 1 expression doesn't fail?
             # Is it non-deterministic or can we prove it will be length 1?
-            return canonicalize(next(iter(expressions.values())))
+            return next(iter(expressions.values()))
         else:
             # if there are no expressions, then we move on to line 8
             pass
 
     # line8 checks that len(districts)) != 1
+    mark_line(8)
     districts = graph.districts()
     # line 11 states return fail if len(districts)==1
     # keep explict tests for 0 and 1 to ensure adequate testing
@@ -616,9 +767,11 @@ def trso(query: TRSOQuery) -> Expression | None:  # noqa:C901
     # so we can safely pop the only element
     district_without_interventions = districts_without_interventions.pop()
     if district_without_interventions in districts:
-        return canonicalize(trso_line9(query, set(district_without_interventions)))
+        mark_line(9)
+        return trso_line9(query, set(district_without_interventions))
 
     # line10
+    mark_line(10)
     logger.debug("Calling trso algorithm line 10")
     target_districts = [
         district for district in districts if district_without_interventions.issubset(district)
@@ -642,7 +795,7 @@ def trso(query: TRSOQuery) -> Expression | None:  # noqa:C901
         set(target_district),
         new_surrogate_interventions,
     )
-    return _c14n_safe(trso(new_query))
+    return _memoized_trso(new_query, memo=memo, fingerprint=fingerprint)
 
 
 def _pillow_has_transport(graph: NxMixedGraph, district: Collection[Variable]) -> bool:
@@ -672,6 +825,8 @@ def identify_target_outcomes(
     target_interventions: set[Variable],
     surrogate_outcomes: dict[Population, set[Variable]],
     surrogate_interventions: dict[Population, set[Variable]],
+    canonical: bool = True,
+    memo: TRSOMemo | None = None,
 ) -> Expression | None:
     r"""Get the estimand for the target outcome givne the surrogate outcomes.
 
@@ -682,6 +837,8 @@ def identify_target_outcomes(
     :param graph: The graph of the target domain.
     :param surrogate_outcomes: A dictionary of outcomes in other populations
     :param surrogate_interventions: A dictionary of interventions in other populations
+    :param canonical: Should the estimand be canonicalized? See :func:`trso`.
+    :param memo: A memo of the results for subqueries. See :func:`trso`.
     :returns: An Expression evaluating the given query, or None
     :raises ValueError: If the target outcomes and target interventions intersect
 
@@ -746,4 +903,4 @@ def identify_target_outcomes(
         graphs=transport_query.graphs,
         surrogate_interventions=transport_query.surrogate_interventions,
     )
-    return trso(trso_query)
+    return trso(trso_query, canonical=canonical, memo=memo)
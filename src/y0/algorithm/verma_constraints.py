@@ -0,0 +1,308 @@
+r"""Find Verma constraints without R, following [tian2002]_.
+
+This is a pure-Python alternative to :func:`y0.causaleffect.r_get_verma_constraints`, which
+wraps ``verma.constraints`` from the R package ``causaleffect``. For each node $V_i$ in a
+topological order, the C-factor of its district $S$ in $G[V_1, \ldots, V_i]$ is computed
+with Lemma 1 of [tian03a]_. Then, smaller C-factors containing $V_i$ are found from $Q[S]$
+by repeatedly marginalizing a node with no children in the current set (Lemma 3 of
+[tian03a]_) and, if the remaining set falls apart, by keeping the district of $V_i$ (Lemma 4
+of [tian03a]_). Whenever an expression for $Q[C]$ found this way mentions variables outside
+of $C$ and its parents, it can't depend on them, which is a Verma constraint.
+
+.. code-block:: python
+
+    from y0.algorithm.verma_constraints import get_verma_constraints
+    from y0.dsl import Q, Sum, V1, V2, V3, V4
+    from y0.examples import verma_1
+
+    (constraint,) = get_verma_constraints(verma_1)
+    assert constraint.lhs_cfactor == Sum[V2](Q[V2, V4](V1, V2, V3, V4))
+    assert constraint.rhs_cfactor == Q[V4](V3, V4)
+    assert constraint.variables == (V1,)
+
+.. [tian2002] Tian, J. and Pearl, J. (2002). `On the Testable Implications of Causal Models
+      with Hidden Variables <https://arxiv.org/abs/1301.0608>`_. UAI 2002.
+"""
+
+from collections.abc import Callable, Collection, Iterator
+from functools import cache
+
+import networkx as nx
+
+from y0.algorithm.tian_id import (
+    compute_ancestral_set_q_value,
+    compute_c_factor_conditioning_on_topological_predecessors,
+    compute_c_factor_marginalizing_over_topological_successors,
+)
+from y0.dsl import Expression, Fraction, P, Product, QFactor, Sum, Variable
+from y0.graph import DEFULT_PREFIX, NxMixedGraph
+from y0.struct import VermaConstraint
+from y0.util.caching import LRUCache
+
+__all__ = [
+    "clear_verma_constraints_cache",
+    "get_verma_constraints",
+]
+
+#: The maximum number of graphs whose constraints are kept by :func:`get_verma_constraints`
+VERMA_CONSTRAINTS_CACHE_SIZE = 128
+
+_VermaConstraintsKey = tuple[str, tuple[tuple[Variable, Variable], ...]]
+_VERMA_CONSTRAINTS_CACHE: LRUCache[_VermaConstraintsKey, tuple[VermaConstraint, ...]] = LRUCache(
+    VERMA_CONSTRAINTS_CACHE_SIZE
+)
+
+
+def get_verma_constraints(graph: NxMixedGraph) -> list[VermaConstraint]:
+    """Get the Verma constraints on the graph.
+
+    :param graph: An acyclic directed mixed graph
+    :returns: A list of Verma constraints. In each, the left hand side C-factor is an
+        expression over a previously found C-factor that equals the right hand side C-factor,
+        and the left hand side expression is the same in terms of the observational
+        distribution. The variables are the ones that the left hand side mentions but
+        doesn't depend on, in topological order. The right hand side expression is written
+        with a latent variable for each bidirected edge, numbered from one in the order of
+        the edges like ``causaleffect`` does.
+
+    Constraints are cached based on the graph's fingerprint and the order of its bidirected
+    edges. The cache can be emptied with :func:`clear_verma_constraints_cache`.
+    """
+    key: _VermaConstraintsKey = graph.fingerprint(), tuple(graph.undirected.edges())
+    rv = _VERMA_CONSTRAINTS_CACHE.get_or_compute(key, lambda: tuple(_iter_verma_constraints(graph)))
+    return list(rv)
+
+
+def clear_verma_constraints_cache() -> None:
+    """Clear the cache of Verma constraints."""
+    _VERMA_CONSTRAINTS_CACHE.clear()
+
+
+def _iter_verma_constraints(graph: NxMixedGraph) -> Iterator[VermaConstraint]:
+    topo = graph.topological_sort()
+    latents: dict[Variable, list[Variable]] = {node: [] for node in topo}
+    for i, (u, v) in enumerate(graph.undirected.edges(), start=1):
+        latent = Variable(f"{DEFULT_PREFIX}{i}")
+        latents[u].append(latent)
+        latents[v].append(latent)
+
+    @cache
+    def get_latent_expression(nodes: frozenset[Variable]) -> Expression:
+        return _get_latent_expression(graph, latents, nodes)
+
+    for i, vertex in enumerate(topo):
+        predecessors = topo[: i + 1]
+        district = nx.node_connected_component(graph.undirected.subgraph(predecessors), vertex)
+        expression = compute_c_factor_conditioning_on_topological_predecessors(
+            district=[v for v in predecessors if v in district],
+            graph_probability=P(predecessors),
+            topo=predecessors,
+        )
+        yield from _iter_district_constraints(
+            graph,
+            get_latent_expression,
+            vertex=vertex,
+            district=frozenset(district),
+            expression=expression,
+            topo=topo,
+            visited=set(),
+        )
+
+
+def _iter_district_constraints(
+    graph: NxMixedGraph,
+    get_latent_expression: Callable[[frozenset[Variable]], Expression],
+    *,
+    vertex: Variable,
+    district: frozenset[Variable],
+    expression: Expression,
+    topo: list[Variable],
+    visited: set[frozenset[Variable]],
+) -> Iterator[VermaConstraint]:
+    """Yield the constraints from C-factors containing the vertex found from the district's.
+
+    :param graph: An acyclic directed mixed graph
+    :param get_latent_expression: A function for the C-factor of a set of nodes in terms
+        of the latent variables on their bidirected edges
+    :param vertex: The last node of the district in topological order
+    :param district: A set of nodes that's connected by bidirected edges
+    :param expression: An expression for the district's C-factor in terms of the
+        observational distribution
+    :param topo: A topological order of the graph's nodes
+    :param visited: The districts whose C-factors have already been searched from
+    :yields: Verma constraints
+    """
+    if district in visited:
+        return
+    visited.add(district)
+    cfactor = _get_q_factor(graph, district)
+    for sink in _iter_sinks(graph, [v for v in topo if v in district]):
+        if sink == vertex:
+            continue
+        # removing a node without children in the district leaves an ancestral set (Lemma 3)
+        ancestral_set = district - {sink}
+        ancestral_cfactor = _merge_sums(
+            compute_ancestral_set_q_value(
+                ancestral_set=ancestral_set,
+                subgraph_variables=district,
+                subgraph_probability=cfactor,
+                graph_topo=topo,
+            )
+        )
+        ancestral_expression = _merge_sums(Sum.safe(expression, [sink]))
+        constraint = _get_constraint(
+            graph,
+            get_latent_expression,
+            ancestral_cfactor,
+            ancestral_expression,
+            ancestral_set,
+            topo,
+        )
+        if constraint is not None:
+            yield constraint
+
+        subdistrict = frozenset(
+            nx.node_connected_component(graph.undirected.subgraph(ancestral_set), vertex)
+        )
+        if subdistrict == ancestral_set:
+            yield from _iter_district_constraints(
+                graph,
+                get_latent_expression,
+                vertex=vertex,
+                district=subdistrict,
+                expression=ancestral_expression,
+                topo=topo,
+                visited=visited,
+            )
+            continue
+
+        # the ancestral set isn't connected, so get the vertex's district with Lemma 4
+        ancestral_topo = [v for v in topo if v in ancestral_set]
+        subdistrict_cfactor = _merge_sums(
+            compute_c_factor_marginalizing_over_topological_successors(
+                district=[v for v in ancestral_topo if v in subdistrict],
+                graph_probability=_get_q_factor(graph, ancestral_set),
+                topo=ancestral_topo,
+            )
+        )
+        subdistrict_expression = _merge_sums(
+            compute_c_factor_marginalizing_over_topological_successors(
+                district=[v for v in ancestral_topo if v in subdistrict],
+                graph_probability=ancestral_expression,
+                topo=ancestral_topo,
+            )
+        )
+        constraint = _get_constraint(
+            graph,
+            get_latent_expression,
+            subdistrict_cfactor,
+            subdistrict_expression,
+            subdistrict,
+            topo,
+        )
+        if constraint is not None:
+            yield constraint
+        yield from _iter_district_constraints(
+            graph,
+            get_latent_expression,
+            vertex=vertex,
+            district=subdistrict,
+            expression=subdistrict_expression,
+            topo=topo,
+            visited=visited,
+        )
+
+
+def _get_constraint(
+    graph: NxMixedGraph,
+    get_latent_expression: Callable[[frozenset[Variable]], Expression],
+    lhs_cfactor: Expression,
+    lhs_expr: Expression,
+    nodes: frozenset[Variable],
+    topo: list[Variable],
+) -> VermaConstraint | None:
+    """Get a constraint if the expression for the nodes' C-factor mentions other variables."""
+    rhs_cfactor = _get_q_factor(graph, nodes)
+    variables = _get_free_variables(lhs_cfactor) - rhs_cfactor.domain
+    if not variables:
+        return None
+    return VermaConstraint(
+        lhs_cfactor=lhs_cfactor,
+        lhs_expr=lhs_expr,
+        rhs_cfactor=rhs_cfactor,
+        rhs_expr=get_latent_expression(nodes),
+        variables=tuple(v for v in topo if v in variables),
+    )
+
+
+def _get_q_factor(graph: NxMixedGraph, nodes: Collection[Variable]) -> QFactor:
+    """Get the C-factor of the nodes as a function of the nodes and their parents."""
+    parents = {parent for node in nodes for parent in graph.directed.predecessors(node)}
+    return QFactor(domain=frozenset(parents.union(nodes)), codomain=frozenset(nodes))
+
+
+def _get_latent_expression(
+    graph: NxMixedGraph, latents: dict[Variable, list[Variable]], nodes: Collection[Variable]
+) -> Expression:
+    """Get the C-factor of the nodes in terms of the latent variables on their bidirected edges."""
+    node_latents: set[Variable] = set()
+    parents: set[Variable] = set()
+    probabilities: list[Expression] = []
+    for node in nodes:
+        node_parents = {*graph.directed.predecessors(node), *latents[node]}
+        node_latents.update(latents[node])
+        parents.update(graph.directed.predecessors(node))
+        probabilities.append(P(node | node_parents) if node_parents else P(node))
+    parents.difference_update(nodes)
+    probabilities.extend(P(variable) for variable in parents | node_latents)
+    return Sum.safe(Product.safe(probabilities), sorted(node_latents) + sorted(parents))
+
+
+def _iter_sinks(graph: NxMixedGraph, nodes: list[Variable]) -> Iterator[Variable]:
+    """Iterate over the nodes that don't have children in the subgraph induced by the nodes."""
+    members = set(nodes)
+    for node in nodes:
+        if not any(child in members for child in graph.directed.successors(node)):
+            yield node
+
+
+def _merge_sums(expression: Expression) -> Expression:
+    """Merge sums of sums from marginalizing one variable at a time.
+
+    Only the products and fractions around the sums are searched, since the expressions
+    inside the sums were already merged when they were made.
+    """
+    if isinstance(expression, Sum):
+        if isinstance(expression.expression, Sum):
+            return Sum(
+                expression=expression.expression.expression,
+                ranges=expression.expression.ranges | expression.ranges,
+            )
+        return expression
+    if isinstance(expression, Product):
+        expressions = [_merge_sums(subexpression) for subexpression in expression.expressions]
+        if all(a is b for a, b in zip(expressions, expression.expressions, strict=True)):
+            return expression
+        return Product.safe(expressions)
+    if isinstance(expression, Fraction):
+        numerator = _merge_sums(expression.numerator)
+        denominator = _merge_sums(expression.denominator)
+        if numerator is expression.numerator and denominator is expression.denominator:
+            return expression
+        return Fraction(numerator, denominator)
+    return expression
+
+
+def _get_free_variables(expression: Expression) -> set[Variable]:
+    """Get the variables that an expression is a function of."""
+    if isinstance(expression, Sum):
+        return _get_free_variables(expression.expression) - expression.ranges
+    if isinstance(expression, Product):
+        return set().union(*map(_get_free_variables, expression.expressions))
+    if isinstance(expression, Fraction):
+        return _get_free_variables(expression.numerator) | _get_free_variables(
+            expression.denominator
+        )
+    if isinstance(expression, QFactor):
+        return set(expression.domain)
+    return expression.get_variables()
@@ -16,7 +16,10 @@ logger = logging.getLogger(__name__)
 
 @uses_r
 def r_get_verma_constraints(graph: NxMixedGraph | CausalEffectGraph) -> Sequence[VermaConstraint]:
-    """Calculate the verma constraints on the graph using ``causaleffect``."""
+    """Calculate the verma constraints on the graph using ``causaleffect``.
+
+    .. seealso:: :func:`y0.algorithm.verma_constraints.get_verma_constraints`, which doesn't need R
+    """
     if isinstance(graph, NxMixedGraph):
         graph = graph.to_causaleffect()
     verma_constraints = robjects.r["verma.constraints"]
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+import hashlib
 import itertools as itt
 import json
 import warnings
-from collections.abc import Collection, Iterable, Mapping, Sequence
+from collections.abc import Collection, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass, field
 from itertools import chain, combinations
 from typing import (
@@ -37,6 +38,7 @@ if TYPE_CHECKING:
 
 __all__ = [
     "NxMixedGraph",
+    "TopologicalIndex",
     "CausalEffectGraph",
     "DEFULT_PREFIX",
     "DEFAULT_TAG",
@@ -105,6 +107,18 @@ class NxMixedGraph:
             undirected=self.undirected.copy(),
         )
 
+    def fingerprint(self) -> str:
+        """Get a hash of the nodes and edges that doesn't depend on the order they were added.
+
+        :returns: A SHA-256 hex digest. Two graphs that are equal have the same fingerprint, so
+            it can be used as part of a key when caching the results of algorithms on graphs.
+        """
+        nodes = sorted(node.to_y0() for node in self.nodes())
+        directed = sorted([u.to_y0(), v.to_y0()] for u, v in self.directed.edges())
+        undirected = sorted(sorted([u.to_y0(), v.to_y0()]) for u, v in self.undirected.edges())
+        payload = json.dumps([nodes, directed, undirected], separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
     def is_counterfactual(self) -> bool:
         """Check if this is a counterfactual graph."""
         return any(isinstance(n, CounterfactualVariable) for n in self.nodes())
@@ -488,7 +502,7 @@ class NxMixedGraph:
             elif edge["type"] == "bidirected":
                 rv.add_undirected_edge(u, v)
             else:
-                raise ValueError(f'unhandled edge type: {edge["type"]}')
+                raise ValueError(f"unhandled edge type: {edge['type']}")
         return rv
 
     def subgraph(self, vertices: Variable | Iterable[Variable]) -> NxMixedGraph:
@@ -583,6 +597,10 @@ class NxMixedGraph:
         """Get a topological sort from the directed component of the mixed graph."""
         return list(nx.topological_sort(self.directed))
 
+    def topological_index(self) -> TopologicalIndex:
+        """Get an index over a topological sort of the directed component of the mixed graph."""
+        return TopologicalIndex(nx.topological_sort(self.directed))
+
     def get_c_components(self) -> list[frozenset[Variable]]:
         """Get the co-components (i.e., districts) in the undirected portion of the graph."""
         warnings.warn("use NxMixedGraph.districts()", DeprecationWarning, stacklevel=2)
@@ -683,6 +701,84 @@ class NxMixedGraph:
         return pre
 
 
+class TopologicalIndex:
+    """An index over a topological ordering of variables.
+
+    Maps each variable to its position in the ordering so that finding where a variable
+    is, and hence the variables that precede it, doesn't require a linear scan of the
+    ordering, like when building the conditional factors of a district in lines 6 and 7 of
+    the ID algorithm.
+
+    .. code-block:: python
+
+        from y0.dsl import Variable
+        from y0.graph import NxMixedGraph
+
+        graph = NxMixedGraph.from_str_edges(directed=[("X", "Y"), ("Y", "Z")])
+        index = graph.topological_index()
+        index.predecessors(Variable("Z"))  # (X, Y)
+    """
+
+    def __init__(self, ordering: Iterable[Variable]) -> None:
+        """Instantiate the index.
+
+        :param ordering: A topologically ordered iterable of variables
+        """
+        self.ordering: tuple[Variable, ...] = tuple(ordering)
+        self.positions: dict[Variable, int] = {
+            node: position for position, node in enumerate(self.ordering)
+        }
+
+    def __len__(self) -> int:
+        """Count the variables in the ordering."""
+        return len(self.ordering)
+
+    def __iter__(self) -> Iterator[Variable]:
+        """Iterate over the variables in topological order."""
+        return iter(self.ordering)
+
+    def __contains__(self, item: Variable) -> bool:
+        """Check if the given variable is in the ordering."""
+        return item in self.positions
+
+    def __repr__(self) -> str:
+        return f"TopologicalIndex({list(self.ordering)!r})"
+
+    def index(self, node: Variable) -> int:
+        """Get the position of the variable in the ordering.
+
+        :param node: A variable in the ordering
+        :returns: The position of the variable
+        :raises KeyError: If the variable is not in the ordering
+        """
+        return self.positions[node]
+
+    def predecessors(self, node: Variable) -> tuple[Variable, ...]:
+        """Get the variables that come before the given variable in the ordering.
+
+        :param node: A variable in the ordering
+        :returns: A tuple of the variables preceding the given variable, in topological order
+        :raises KeyError: If the variable is not in the ordering
+        """
+        return self.ordering[: self.positions[node]]
+
+    def restrict(self, nodes: Collection[Variable]) -> TopologicalIndex:
+        """Get an index over the sub-ordering of the given variables.
+
+        :param nodes: A collection of variables
+        :returns: An index over the variables in this ordering that are also in the collection
+        """
+        return TopologicalIndex(node for node in self.ordering if node in nodes)
+
+    def exclude(self, nodes: Collection[Variable]) -> TopologicalIndex:
+        """Get an index over the sub-ordering that leaves out the given variables.
+
+        :param nodes: A collection of variables
+        :returns: An index over the variables in this ordering that are not in the collection
+        """
+        return TopologicalIndex(node for node in self.ordering if node not in nodes)
+
+
 class _LatexStr(str):
     def _repr_latex_(self) -> str:
         return self
@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import Any, Literal, NamedTuple, cast
 
+import numpy as np
 import pandas as pd
 
 from .dsl import Expression, Variable
@@ -14,10 +15,17 @@ from .dsl import Expression, Variable
 __all__ = [
     "VermaConstraint",
     "DSeparationJudgement",
+    "SetDSeparationJudgement",
+    "DSeparationTable",
 ]
 
 DEFAULT_SIGNIFICANCE = 0.01
 
+#: The most variables on each side of a :class:`SetDSeparationJudgement` whose joint values
+#: are coded as a single variable for discrete tests. The number of joint values grows
+#: exponentially with the number of variables, so larger sides are tested pairwise.
+MAX_DISCRETE_SET_SIZE = 2
+
 
 class VermaConstraint(NamedTuple):
     """Represent a Verma constraint."""
@@ -59,7 +67,10 @@ CITest = Literal[
     "modified_log_likelihood",
     "power_divergence",
     "neyman",
+    "partial_cancor",
 ]
+#: Conditional independence tests for continuous data. The others are for discrete data.
+CONTINUOUS_CI_TESTS: set[CITest] = {"pearson", "partial_cancor"}
 DEFAULT_CONTINUOUS_CI_TEST: CITest = "pearson"
 DEFAULT_DISCRETE_CI_TEST: CITest = "cressie_read"
 
@@ -84,9 +95,65 @@ def get_conditional_independence_tests() -> dict[CITest, CITestFunc]:
         "modified_log_likelihood": CITests.modified_log_likelihood,
         "power_divergence": CITests.power_divergence,
         "neyman": CITests.neyman,
+        "partial_cancor": partial_canonical_correlation,
     }
 
 
+def partial_canonical_correlation(
+    X: str | Sequence[str],  # noqa:N803
+    Y: str | Sequence[str],  # noqa:N803
+    Z: Iterable[str],  # noqa:N803
+    data: pd.DataFrame,
+    boolean: bool = True,
+    **kwargs: Any,
+) -> bool | tuple[float, float, int]:
+    r"""Test if two sets of continuous variables are independent given a third with partial canonical correlation.
+
+    Both sets are regressed linearly on the conditions, then the canonical correlations
+    $\rho_1, \ldots, \rho_{\min(p, q)}$ between their residuals are tested with Bartlett's
+    approximation, i.e., $-(n - 1 - r - (p + q + 1) / 2) \sum_i \log(1 - \rho_i^2)$ has a
+    $\chi^2$ distribution with $pq$ degrees of freedom, where $p$, $q$, and $r$ are the number of
+    variables in each set and the conditions and $n$ is the number of rows. With one variable on
+    each side, this tests the partial correlation, like :func:`pgmpy.estimators.CITests.pearsonr`.
+
+    :param X: A column or columns of the data
+    :param Y: A column or columns of the data
+    :param Z: Columns of the data to condition on
+    :param data: A dataframe
+    :param boolean: If true, returns if the null hypothesis of independence is accepted
+    :param kwargs: If ``boolean`` is true, ``significance_level`` is required
+    :returns: If ``boolean=False``, a three-tuple of the statistic, p-value, and degrees
+        of freedom. Otherwise, a boolean that's true if the p-value is at least the
+        significance level.
+    """
+    from scipy import stats
+
+    left = [X] if isinstance(X, str) else list(X)
+    right = [Y] if isinstance(Y, str) else list(Y)
+    conditions = list(Z)
+    n = len(data)
+    covariates = np.column_stack([np.ones(n), data[conditions].to_numpy(dtype=float)])
+
+    def _get_orthonormal_residuals(columns: list[str]) -> np.ndarray:
+        values = data[columns].to_numpy(dtype=float)
+        coefficients, *_ = np.linalg.lstsq(covariates, values, rcond=None)
+        q, _ = np.linalg.qr(values - covariates @ coefficients)
+        return q
+
+    correlations = np.linalg.svd(
+        _get_orthonormal_residuals(left).T @ _get_orthonormal_residuals(right), compute_uv=False
+    )
+    # rounding can push a perfect correlation just above one
+    correlations = np.minimum(correlations, 1 - np.finfo(float).eps)
+    scale = n - 1 - len(conditions) - (len(left) + len(right) + 1) / 2
+    statistic = float(-scale * np.log1p(-(correlations**2)).sum())
+    dof = len(left) * len(right)
+    p_value = float(stats.chi2.sf(statistic, dof))
+    if boolean:
+        return p_value >= kwargs["significance_level"]
+    return statistic, p_value, dof
+
+
 class CITestTuple(NamedTuple):
     """A tuple containing the results from a PGMPy conditional independency test.
 
@@ -126,10 +193,11 @@ class DSeparationJudgement:
         separated: bool = True,
     ) -> DSeparationJudgement:
         """Create a d-separation judgement in canonical form."""
-        left, right = sorted([left, right], key=str)
+        if _sort_key(right) < _sort_key(left):
+            left, right = right, left
         if conditions is None:
             conditions = ()
-        conditions = tuple(sorted(set(conditions), key=str))
+        conditions = tuple(sorted(set(conditions), key=_sort_key))
         return cls(separated, left, right, conditions)
 
     def __bool__(self) -> bool:
@@ -194,9 +262,8 @@ class DSeparationJudgement:
             df[[self.left.name, self.right.name, *(c.name for c in self.conditions)]],
             skip=_method_checked,
         )
-        tests: dict[CITest, CITestFunc] = get_conditional_independence_tests()
-        func: CITestFunc = tests[method]
-        result = func(
+        return _run_ci_test(
+            method,
             X=self.left.name,
             Y=self.right.name,
             Z={condition.name for condition in self.conditions},
@@ -204,18 +271,396 @@ class DSeparationJudgement:
             boolean=boolean,
             significance_level=significance_level,
         )
-        if boolean:
-            return cast(bool, result)
-        # Person's correlation returns a pair with the first element being the Person's correlation
-        # and the second being the p-value. The other methods return a triple with the first element
-        # being the Chi^2 statistic, the second being the p-value, and the third being the degrees of
-        # freedom.
-        if method == "pearson":
-            statistic, p_value = result
-            dof = None
+
+
+@dataclass(frozen=True)
+class SetDSeparationJudgement:
+    """Record if two sets of nodes are d-separated given the conditions.
+
+    Two sets of nodes are d-separated if every pair of nodes from them is, so this implies a
+    :class:`DSeparationJudgement` for each pair, but can be tested against data with a single
+    multivariate conditional independence test instead of one test per pair.
+    """
+
+    separated: bool
+    left: tuple[Variable, ...]
+    right: tuple[Variable, ...]
+    conditions: tuple[Variable, ...]
+
+    @classmethod
+    def create(
+        cls,
+        left: Variable | Iterable[Variable],
+        right: Variable | Iterable[Variable],
+        conditions: Iterable[Variable] | None = None,
+        *,
+        separated: bool = True,
+    ) -> SetDSeparationJudgement:
+        """Create a d-separation judgement in canonical form.
+
+        :param left: A node or nodes
+        :param right: A node or nodes
+        :param conditions: Nodes to condition on
+        :param separated: If the nodes are d-separated
+        :returns: A judgement whose sides and conditions are sorted in the same way as in
+            :meth:`DSeparationJudgement.create`, and whose left side comes first
+        :raises ValueError: if either side is empty
+        """
+        left = _sort_variables({left} if isinstance(left, Variable) else left)
+        right = _sort_variables({right} if isinstance(right, Variable) else right)
+        if not left or not right:
+            raise ValueError("both sides of a d-separation judgement need a node")
+        if [_sort_key(node) for node in right] < [_sort_key(node) for node in left]:
+            left, right = right, left
+        return cls(separated, left, right, _sort_variables(conditions or ()))
+
+    @classmethod
+    def from_judgement(cls, judgement: DSeparationJudgement) -> SetDSeparationJudgement:
+        """Create a judgement about the sets of the left and right nodes of a pairwise one."""
+        return cls.create(
+            judgement.left, judgement.right, judgement.conditions, separated=judgement.separated
+        )
+
+    def __bool__(self) -> bool:
+        return self.separated
+
+    def to_judgements(self) -> list[DSeparationJudgement]:
+        """Get the pairwise judgements implied by this one.
+
+        :returns: A judgement in canonical form for each pair of a left node and a right node.
+            If the sets aren't separated, then at least one of the pairs isn't either, so
+            this only makes sense for separated judgements.
+        """
+        return [
+            DSeparationJudgement.create(a, b, self.conditions, separated=self.separated)
+            for a in self.left
+            for b in self.right
+        ]
+
+    def test(
+        self,
+        df: pd.DataFrame,
+        *,
+        boolean: bool = False,
+        method: CITest | None = None,
+        significance_level: float | None = None,
+        _method_checked: bool = False,
+    ) -> bool | CITestTuple:
+        """Test for conditional independence of the two sets, given some data.
+
+        Pearson's partial correlation test only works on one variable from each side, so
+        when either side has more than one, partial canonical correlation with
+        :func:`partial_canonical_correlation` is used instead, which is the same for one
+        variable on each side. The discrete tests are run on the joint values of each side
+        if neither has more than :data:`MAX_DISCRETE_SET_SIZE` variables. Otherwise, each
+        pair of a left and right variable is tested, and the smallest p-value is Bonferroni
+        corrected for the number of pairs.
+
+        :param df: A dataframe.
+        :param boolean: Should results be returned as a pre-cutoff boolean?
+        :param method: Conditional independence test to use. If none, defaults to
+            :data:`DEFAULT_CONTINUOUS_CI_TEST` for continuous data or
+            :data:`DEFAULT_DISCRETE_CI_TEST` for discrete data.
+        :param significance_level: If none, defaults to 0.01. Only applied if ``boolean=True``.
+        :returns: Tests the null hypothesis that the left nodes are independent of the right
+            nodes given the conditions, like :meth:`DSeparationJudgement.test`
+        :raises ValueError: if any parts of the judgement aren't in the dataframe's
+            columns, or if the sides and conditions overlap
+        """
+        names = [node.name for node in (*self.left, *self.right, *self.conditions)]
+        missing = [name for name in names if name not in df.columns]
+        if missing:
+            raise ValueError(f"variables {missing} not in columns {list(df.columns)}")
+        if len(set(names)) < len(names):
+            raise ValueError(f"sides and conditions overlap: {self}")
+        if significance_level is None:
+            significance_level = DEFAULT_SIGNIFICANCE
+
+        method = _ensure_method(method, df[names], skip=_method_checked)
+        left = [node.name for node in self.left]
+        right = [node.name for node in self.right]
+        conditions = [node.name for node in self.conditions]
+        if len(left) == 1 and len(right) == 1:
+            return _run_ci_test(
+                method,
+                X=left[0],
+                Y=right[0],
+                Z=set(conditions),
+                data=df,
+                boolean=boolean,
+                significance_level=significance_level,
+            )
+        if method in CONTINUOUS_CI_TESTS:
+            return _run_ci_test(
+                "partial_cancor",
+                X=left,
+                Y=right,
+                Z=conditions,
+                data=df,
+                boolean=boolean,
+                significance_level=significance_level,
+            )
+
+        if max(len(left), len(right)) > MAX_DISCRETE_SET_SIZE:
+            results = [
+                cast(
+                    CITestTuple,
+                    _run_ci_test(
+                        method,
+                        X=a,
+                        Y=b,
+                        Z=set(conditions),
+                        data=df,
+                        boolean=False,
+                        significance_level=significance_level,
+                    ),
+                )
+                for a in left
+                for b in right
+            ]
+            result = min(results, key=lambda result: result.p_value)
+            p_value = min(1.0, result.p_value * len(results))
+            if boolean:
+                return p_value >= significance_level
+            return result._replace(p_value=p_value)
+
+        # code the joint values of each side as a single discrete variable
+        data = df[conditions].copy()
+        x, y = ",".join(left), ",".join(right)
+        data[x] = df.groupby(left, sort=False).ngroup() if len(left) > 1 else df[left[0]]
+        data[y] = df.groupby(right, sort=False).ngroup() if len(right) > 1 else df[right[0]]
+        return _run_ci_test(
+            method,
+            X=x,
+            Y=y,
+            Z=set(conditions),
+            data=data,
+            boolean=boolean,
+            significance_level=significance_level,
+        )
+
+
+def _run_ci_test(
+    method: CITest,
+    *,
+    X: Any,  # noqa:N803
+    Y: Any,  # noqa:N803
+    Z: Iterable[str],  # noqa:N803
+    data: pd.DataFrame,
+    boolean: bool,
+    significance_level: float,
+) -> bool | CITestTuple:
+    tests: dict[CITest, CITestFunc] = get_conditional_independence_tests()
+    func: CITestFunc = tests[method]
+    result = func(
+        X=X,
+        Y=Y,
+        Z=Z,
+        data=data,
+        boolean=boolean,
+        significance_level=significance_level,
+    )
+    if boolean:
+        return bool(result)
+    # Person's correlation returns a pair with the first element being the Person's correlation
+    # and the second being the p-value. The other methods return a triple with the first element
+    # being the Chi^2 (or other) statistic, the second being the p-value, and the third being the
+    # degrees of freedom.
+    if method == "pearson":
+        statistic, p_value = result
+        dof = None
+    else:
+        statistic, p_value, dof = result
+    return CITestTuple(statistic=statistic, p_value=p_value, dof=dof)
+
+
+@lru_cache(maxsize=65536)
+def _sort_key(variable: Variable) -> str:
+    """Get the key for sorting variables in judgements, which is slow to calculate."""
+    return str(variable)
+
+
+def _sort_variables(variables: Iterable[Variable]) -> tuple[Variable, ...]:
+    return tuple(sorted(set(variables), key=_sort_key))
+
+
+@dataclass
+class DSeparationTable:
+    """A table of d-separation judgements, stored by column.
+
+    Each node is coded by its position in :attr:`nodes`, which are sorted in the same way as
+    :meth:`DSeparationJudgement.create` sorts them, so the left node of each judgement comes
+    before the right node. The conditions are stored as a boolean matrix with a row for each
+    judgement and a column for each node, so minimizing and ranking many judgements can be
+    done with :mod:`numpy` instead of sorting and grouping Python objects.
+
+    .. code-block:: python
+
+        from y0.algorithm.conditional_independencies import d_separations
+        from y0.examples import frontdoor_backdoor
+        from y0.struct import DSeparationTable
+
+        table = DSeparationTable.from_judgements(d_separations(frontdoor_backdoor, return_all=True))
+        judgements = table.minimal(order=frontdoor_backdoor.topological_sort()).to_judgements()
+    """
+
+    #: The nodes, in the order they're sorted in judgements
+    nodes: tuple[Variable, ...]
+    #: The position of the left node of each judgement
+    left: np.ndarray
+    #: The position of the right node of each judgement
+    right: np.ndarray
+    #: A boolean matrix in which each row has the conditions of a judgement
+    conditions: np.ndarray
+    #: If each judgement is separated
+    separated: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.left)
+
+    @classmethod
+    def from_judgements(
+        cls,
+        judgements: Iterable[DSeparationJudgement],
+        *,
+        nodes: Iterable[Variable] | None = None,
+    ) -> DSeparationTable:
+        """Create a table from judgements.
+
+        :param judgements: Judgements, which don't need to be in canonical form
+        :param nodes: All nodes that appear in the judgements, e.g., the nodes of the graph
+            that they come from. If none are given, they're collected from the judgements.
+        :returns: A table with a row for each judgement, in the same order
+        """
+        judgements = list(judgements)
+        if nodes is None:
+            nodes = {
+                node
+                for judgement in judgements
+                for node in (judgement.left, judgement.right, *judgement.conditions)
+            }
+        nodes = tuple(sorted(set(nodes), key=_sort_key))
+        index = {node: i for i, node in enumerate(nodes)}
+        a = np.fromiter((index[j.left] for j in judgements), dtype=np.intp, count=len(judgements))
+        b = np.fromiter((index[j.right] for j in judgements), dtype=np.intp, count=len(judgements))
+        conditions = np.zeros((len(judgements), len(nodes)), dtype=bool)
+        rows = [i for i, judgement in enumerate(judgements) for _ in judgement.conditions]
+        columns = [index[c] for judgement in judgements for c in judgement.conditions]
+        conditions[rows, columns] = True
+        return cls(
+            nodes=nodes,
+            left=np.minimum(a, b),
+            right=np.maximum(a, b),
+            conditions=conditions,
+            separated=np.fromiter(
+                (bool(j.separated) for j in judgements), dtype=bool, count=len(judgements)
+            ),
+        )
+
+    def to_judgements(self) -> list[DSeparationJudgement]:
+        """Get the judgements in the table.
+
+        :returns: A judgement in canonical form for each row, in the same order
+        """
+        rows, columns = np.nonzero(self.conditions)
+        splits = np.searchsorted(rows, np.arange(1, len(self)))
+        return [
+            DSeparationJudgement(
+                bool(separated),
+                self.nodes[left],
+                self.nodes[right],
+                tuple(self.nodes[column] for column in row_columns),
+            )
+            for separated, left, right, row_columns in zip(
+                self.separated.tolist(),
+                self.left.tolist(),
+                self.right.tolist(),
+                np.split(columns, splits) if len(self) else [],
+                strict=True,
+            )
+        ]
+
+    def to_df(self, sep: str | None = None) -> pd.DataFrame:
+        """Get a dataframe with a row for each judgement.
+
+        :param sep: The separator for the names of the conditions. Defaults to ``|``,
+            like in :func:`y0.algorithm.falsification.get_falsifications`.
+        :returns: A dataframe with columns for the names of the left node, right node, and
+            conditions of each judgement, and if it's separated
+        """
+        if sep is None:
+            sep = "|"
+        names = np.array([node.name for node in self.nodes], dtype=object)
+        return pd.DataFrame(
+            {
+                "left": names[self.left],
+                "right": names[self.right],
+                "given": [sep.join(names[row]) for row in self.conditions],
+                "separated": self.separated,
+            }
+        )
+
+    def rank(self, order: Sequence[Variable] | None = None) -> np.ndarray:
+        """Rank the judgements by their conditions, from most to least preferred.
+
+        :param order: An order for the nodes, like a topological sort. If given, judgements
+            with fewer conditions are preferred, then ones whose conditions come earlier in
+            the order, like in :func:`y0.algorithm.conditional_independencies.get_topological_policy`.
+            Otherwise, judgements with fewer conditions are preferred, then ones whose
+            conditions' names come earlier lexicographically, like the default policy of
+            :func:`y0.algorithm.conditional_independencies.minimal`.
+        :returns: The rank of each judgement, where judgements whose conditions are
+            preferred equally get the same rank
+        """
+        sizes = self.conditions.sum(axis=1)
+        if order is not None:
+            positions = {node: i for i, node in enumerate(order)}
+            weights = np.array([positions[node] for node in self.nodes], dtype=np.intp)
+            ties = self.conditions @ weights
+        elif not len(self) or not self.nodes:
+            ties = np.zeros(len(self), dtype=np.intp)
         else:
-            statistic, p_value, dof = result
-        return CITestTuple(statistic=statistic, p_value=p_value, dof=dof)
+            # only build the names of each distinct set of conditions once
+            packed = np.packbits(self.conditions, axis=1)
+            codes = packed.view(np.dtype((np.void, packed.shape[1]))).reshape(-1)
+            _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            names = [
+                ",".join(self.nodes[column].name for column in np.flatnonzero(row))
+                for row in self.conditions[first]
+            ]
+            ties = np.unique(names, return_inverse=True)[1].reshape(-1)[inverse.reshape(-1)]
+        indices = np.lexsort((ties, sizes))
+        changed = np.ones(len(self), dtype=np.intp)
+        changed[1:] = (sizes[indices[1:]] != sizes[indices[:-1]]) | (
+            ties[indices[1:]] != ties[indices[:-1]]
+        )
+        rv = np.empty(len(self), dtype=np.intp)
+        rv[indices] = np.cumsum(changed) - 1
+        return rv
+
+    def minimal(self, order: Sequence[Variable] | None = None) -> DSeparationTable:
+        """Keep the most preferred judgement for each left/right pair.
+
+        :param order: An order for the nodes. See :meth:`rank`.
+        :returns: A table with one judgement for each left/right pair, in the same order as
+            in this table. If several judgements for a pair are preferred equally, the first
+            one is kept, like in :func:`y0.algorithm.conditional_independencies.minimal`.
+        """
+        pairs = self.left * len(self.nodes) + self.right
+        # the sort is stable, so the first of equally preferred judgements comes first
+        indices = np.lexsort((self.rank(order), pairs))
+        first = np.ones(len(indices), dtype=bool)
+        first[1:] = pairs[indices[1:]] != pairs[indices[:-1]]
+        return self[np.sort(indices[first])]
+
+    def __getitem__(self, indices: np.ndarray) -> DSeparationTable:
+        return DSeparationTable(
+            nodes=self.nodes,
+            left=self.left[indices],
+            right=self.right[indices],
+            conditions=self.conditions[indices],
+            separated=self.separated[indices],
+        )
 
 
 def _ensure_method(method: CITest | None, df: pd.DataFrame, skip: bool = False) -> CITest:
@@ -232,11 +677,11 @@ def _ensure_method(method: CITest | None, df: pd.DataFrame, skip: bool = False)
             return DEFAULT_DISCRETE_CI_TEST
         else:
             return DEFAULT_CONTINUOUS_CI_TEST
-    elif binary and method == "pearson":
+    elif binary and method in CONTINUOUS_CI_TESTS:
         raise ValueError(
             f"using continuous data test ({method}) on binary data: {_summarize_df(df)}"
         )
-    elif not binary and method != "pearson":
+    elif not binary and method not in CONTINUOUS_CI_TESTS:
         raise ValueError(f"using binary data test ({method}) on continuous data")
     return method
 
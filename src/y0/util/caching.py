@@ -0,0 +1,80 @@
+"""Utilities for caching."""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+__all__ = [
+    "LRUCache",
+]
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """A thread-safe cache that keeps the most recently used values.
+
+    This is used for caching results that are expensive to compute from a graph, keyed by
+    the graph's :meth:`y0.graph.NxMixedGraph.fingerprint` and the rest of the query, like in
+    :func:`y0.algorithm.identify.cg.make_parallel_worlds_graph`.
+    """
+
+    def __init__(self, maxsize: int | None) -> None:
+        """Instantiate the cache.
+
+        :param maxsize: The maximum number of values to keep. If none, there's no limit.
+        """
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_compute(self, key: K, func: Callable[[], V]) -> V:
+        """Get a value from the cache, or compute and store it.
+
+        :param key: The key of the value
+        :param func: A function that computes the value. It's called without holding the
+            lock, so the same value might be computed more than once by different threads.
+        :returns: The cached or computed value
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        rv = func()
+        self.set(key, rv)
+        return rv
+
+    def get(self, key: K) -> V | None:
+        """Get a value from the cache.
+
+        :param key: The key of the value
+        :returns: The value, or none if it isn't in the cache
+        """
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        """Store a value, then evict the least recently used values if there are too many.
+
+        :param key: The key of the value
+        :param value: The value
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all values from the cache."""
+        with self._lock:
+            self._data.clear()
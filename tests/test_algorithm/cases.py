@@ -2,13 +2,24 @@
 
 import unittest
 from collections import Counter
-from collections.abc import Collection
+from collections.abc import Collection, Iterable
+
+import networkx as nx
 
 from y0.dsl import Expression, Variable, get_outcomes_and_treatments
+from y0.examples import Example, examples
 from y0.graph import NxMixedGraph
 from y0.mutate import canonicalize
 
-__all__ = ["GraphTestCase"]
+__all__ = ["GraphTestCase", "iter_small_examples"]
+
+
+def iter_small_examples(max_nodes: int = 9) -> Iterable[Example]:
+    """Iterate over the acyclic examples that are small enough to search exhaustively."""
+    for example in examples:
+        graph = example.graph
+        if nx.is_directed_acyclic_graph(graph.directed) and len(graph.nodes()) <= max_nodes:
+            yield example
 
 
 class GraphTestCase(unittest.TestCase):
@@ -0,0 +1,147 @@
+"""Tests for the asyncio identification service."""
+
+import asyncio
+import itertools as itt
+import threading
+import time
+import unittest
+
+from y0.algorithm.aio import IdentificationService, aidentify_outcomes, get_default_service
+from y0.algorithm.budget import BudgetExceededError, check_budget
+from y0.algorithm.identify import id_star, identify_outcomes
+from y0.dsl import Variable, X, Y
+from y0.examples import figure_9a, napkin
+from y0.graph import NxMixedGraph
+
+
+def _spin(started: threading.Event, stopped: threading.Event) -> None:
+    """Loop until the budget stops the computation."""
+    started.set()
+    try:
+        while True:
+            check_budget()
+            time.sleep(0.001)
+    finally:
+        stopped.set()
+
+
+def _chain(length: int) -> NxMixedGraph:
+    """Get a graph with a directed path of the given length between X and Y."""
+    nodes = [X, *(Variable(f"M{i}") for i in range(length - 1)), Y]
+    return NxMixedGraph.from_edges(directed=list(itt.pairwise(nodes)))
+
+
+class TestIdentificationService(unittest.IsolatedAsyncioTestCase):
+    """Test the asyncio identification service."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case with a fresh service."""
+        self.service = IdentificationService(max_concurrency=2)
+
+    async def asyncTearDown(self) -> None:
+        """Shut down the service."""
+        self.service.shutdown()
+
+    async def test_identify_outcomes(self):
+        """Test that results match the synchronous algorithms and are cached."""
+        expected = identify_outcomes(napkin, treatments=X, outcomes=Y)
+        self.assertEqual(expected, await self.service.identify_outcomes(napkin, X, Y))
+        self.assertEqual(1, self.service.statistics.misses)
+        self.assertEqual(expected, await self.service.identify_outcomes(napkin.copy(), {X}, {Y}))
+        self.assertEqual(1, self.service.statistics.hits)
+        self.assertEqual(1, self.service.statistics.size)
+
+        event = {Y @ ~X: ~Y}
+        self.assertEqual(
+            id_star(figure_9a.graph, event), await self.service.id_star(figure_9a.graph, event)
+        )
+
+        self.service.clear_cache()
+        self.assertEqual(0, self.service.statistics.size)
+
+    async def test_coalesce(self):
+        """Test that identical queries in flight share one computation."""
+        results = await asyncio.gather(
+            *(self.service.identify_outcomes(napkin, X, Y) for _ in range(3))
+        )
+        self.assertEqual(1, len(set(results)))
+        self.assertEqual(1, self.service.statistics.misses)
+        self.assertEqual(2, self.service.statistics.coalesced)
+
+    async def test_cancel(self):
+        """Test that cancelling the only caller stops the computation."""
+        started, stopped = threading.Event(), threading.Event()
+        task = asyncio.ensure_future(self.service._submit(("spin",), _spin, started, stopped))
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(await asyncio.to_thread(stopped.wait, 5))
+        self.assertEqual(1, self.service.statistics.cancelled)
+        self.assertFalse(self.service._in_flight)
+
+    async def test_timeout(self):
+        """Test that computations are stopped after the timeout."""
+        service = IdentificationService(timeout=0.01)
+        try:
+            with self.assertRaises(BudgetExceededError):
+                await service._submit(("spin",), _spin, threading.Event(), threading.Event())
+            self.assertEqual(0, service.statistics.size)
+        finally:
+            service.shutdown()
+
+    async def test_max_concurrency(self):
+        """Test that the number of simultaneous computations is limited."""
+        service = IdentificationService(max_concurrency=1)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def _work(i: int) -> int:
+            with lock:
+                running.append(i)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(i)
+            return i
+
+        try:
+            results = await asyncio.gather(
+                *(service._submit(("work", i), _work, i) for i in range(4))
+            )
+        finally:
+            service.shutdown()
+        self.assertEqual([0, 1, 2, 3], results)
+        self.assertEqual(1, max(peak))
+
+
+class TestDefaultService(unittest.TestCase):
+    """Test the default services used by the module-level functions."""
+
+    def test_event_loops(self):
+        """Test that the default service can be used from one event loop after another."""
+
+        async def _identify(lengths: range) -> list:
+            service = get_default_service()
+            results = await asyncio.gather(
+                *(aidentify_outcomes(_chain(length), X, Y) for length in lengths)
+            )
+            self.assertIs(service, get_default_service())
+            self.assertEqual(len(lengths), service.statistics.misses)
+            return results
+
+        default = IdentificationService()
+        default.shutdown()
+        max_concurrency = default.max_concurrency
+        for start in [1, 1 + 2 * max_concurrency]:
+            lengths = range(start, start + 2 * max_concurrency)
+            with self.subTest(start=start):
+                results = asyncio.run(_identify(lengths))
+                self.assertEqual(
+                    [identify_outcomes(_chain(length), X, Y) for length in lengths], results
+                )
+
+        with self.assertRaises(RuntimeError):
+            get_default_service()
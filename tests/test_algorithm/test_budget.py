@@ -0,0 +1,72 @@
+"""Tests for cooperative budgets."""
+
+import unittest
+
+from y0.algorithm.budget import (
+    Budget,
+    BudgetExceededError,
+    check_budget,
+    get_current_budget,
+)
+from y0.algorithm.identify import id_star, identify_outcomes
+from y0.algorithm.transport import identify_target_outcomes
+from y0.dsl import X1, X2, Y1, Y2, Pi1, Pi2, X, Y
+from y0.examples import figure_9a, napkin, tikka_trso_figure_8_graph
+
+
+class TestBudget(unittest.TestCase):
+    """Test budgets for recursive algorithms."""
+
+    def test_invalid(self):
+        """Test that non-positive limits are rejected."""
+        for kwargs in [{"timeout": 0}, {"max_recursions": -1}, {"max_expression_size": 0.0}]:
+            with self.subTest(kwargs=kwargs), self.assertRaises(ValueError):
+                Budget(**kwargs)
+
+    def test_unlimited(self):
+        """Test that an unlimited budget does not change the result and records statistics."""
+        expected = identify_outcomes(napkin, treatments=X, outcomes=Y)
+        self.assertIsNone(get_current_budget())
+        with Budget() as budget:
+            self.assertIs(budget, get_current_budget())
+            actual = identify_outcomes(napkin, treatments=X, outcomes=Y)
+        self.assertIsNone(get_current_budget())
+        self.assertEqual(expected, actual)
+        self.assertLess(0, budget.statistics.recursions)
+
+    def test_max_recursions(self):
+        """Test exceeding the maximum number of recursions."""
+        with self.assertRaises(BudgetExceededError) as context, Budget(max_recursions=1):
+            identify_outcomes(napkin, treatments=X, outcomes=Y)
+        self.assertEqual(2, context.exception.statistics.recursions)
+        self.assertIsNone(get_current_budget())
+
+    def test_timeout(self):
+        """Test exceeding the timeout."""
+        with self.assertRaises(BudgetExceededError) as context, Budget(timeout=1e-9):
+            id_star(figure_9a.graph, {Y @ ~X: ~Y})
+        self.assertIn("timeout", context.exception.reason)
+
+    def test_max_expression_size(self):
+        """Test exceeding the maximum expression size."""
+        with self.assertRaises(BudgetExceededError) as context, Budget(max_expression_size=1):
+            identify_target_outcomes(
+                graph=tikka_trso_figure_8_graph,
+                target_outcomes={Y1, Y2},
+                target_interventions={X1, X2},
+                surrogate_outcomes={Pi1: {Y1}, Pi2: {Y2}},
+                surrogate_interventions={Pi1: {X1}, Pi2: {X2}},
+            )
+        self.assertLess(1, context.exception.statistics.largest_expression)
+
+    def test_nested(self):
+        """Test that enclosing budgets are also checked."""
+        with Budget(max_recursions=2) as outer:
+            with Budget(max_recursions=100) as inner:
+                check_budget()
+                self.assertIs(inner, get_current_budget())
+            self.assertIs(outer, get_current_budget())
+            with self.assertRaises(BudgetExceededError), Budget():
+                check_budget()
+                check_budget()
+        self.assertEqual(3, outer.recursions)
@@ -0,0 +1,159 @@
+"""Tests for the persistent estimand cache."""
+
+import json
+import tempfile
+import unittest
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from y0.algorithm.cache import EstimandCache
+from y0.algorithm.counterfactual_transport import CFTDomain, unconditional_cft
+from y0.algorithm.identify import id_star, identify_outcomes
+from y0.algorithm.transport import transport_variable
+from y0.dsl import PP, One, P, Pi1, Q, Sum, Variable, X, Y, Z, Zero
+from y0.examples import figure_9a, napkin
+from y0.graph import NxMixedGraph
+
+Therapy = Variable("T")
+Distance = Variable("D")
+CD4 = Variable("C")
+AIDS = Variable("A")
+
+
+class TestEstimandCache(unittest.TestCase):
+    """Test the persistent estimand cache."""
+
+    def setUp(self) -> None:
+        """Set up the test case with a temporary database."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name).joinpath("estimands.sqlite")
+        self.cache = EstimandCache(self.path)
+
+    def tearDown(self) -> None:
+        """Close the database."""
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_identify_outcomes(self):
+        """Test caching the ID algorithm, including across instances."""
+        expected = identify_outcomes(napkin, treatments=X, outcomes=Y)
+        self.assertEqual(expected, self.cache.identify_outcomes(napkin, X, Y))
+        self.assertEqual((0, 1), (self.cache.hits, self.cache.misses))
+        self.assertEqual(expected, self.cache.identify_outcomes(napkin.copy(), {X}, {Y}))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        self.assertEqual(1, len(self.cache))
+
+        with EstimandCache(self.path) as other:
+            self.assertEqual(expected, other.identify_outcomes(napkin, X, Y))
+            self.assertEqual(1, other.hits)
+
+    def test_id_star(self):
+        """Test caching the ID* algorithm."""
+        event = {Y @ ~X: ~Y}
+        expected = id_star(figure_9a.graph, event)
+        for _ in range(2):
+            self.assertEqual(expected, self.cache.id_star(figure_9a.graph, event))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_unconditional_cft(self):
+        """Test caching unconditional counterfactual transport."""
+        nigeria_graph = NxMixedGraph.from_edges(
+            directed=[
+                (Distance, Therapy),
+                (Distance, AIDS),
+                (Therapy, AIDS),
+                (Therapy, CD4),
+                (CD4, AIDS),
+            ],
+            undirected=[(Distance, Therapy), (CD4, AIDS)],
+        )
+        ghana_graph = NxMixedGraph.from_edges(
+            directed=[
+                (Therapy, AIDS),
+                (Therapy, CD4),
+                (CD4, AIDS),
+                (Distance, AIDS),
+                (transport_variable(Distance), Distance),
+            ],
+            undirected=[(CD4, AIDS)],
+        )
+        domains = [
+            CFTDomain(population=Variable("Ghana"), graph=ghana_graph, policy_variables={Therapy}),
+        ]
+        kwargs = {
+            "event": [-AIDS @ -Therapy, +Therapy],
+            "target_domain_graph": nigeria_graph,
+            "domains": domains,
+        }
+        expected = unconditional_cft(**kwargs)
+        self.assertEqual(expected, self.cache.unconditional_cft(**kwargs))
+        self.assertEqual(expected, self.cache.unconditional_cft(**kwargs))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_eviction(self):
+        """Test evicting the least recently used and expired results."""
+        self.cache.max_entries = 2
+        for i, outcome in enumerate([Y, Variable("R"), Variable("W")]):
+            self.cache.set(str(i), "identify_outcomes", outcome)
+        self.assertEqual(2, len(self.cache))
+        self.assertFalse(self.cache.get("0")[0])
+        self.assertEqual((True, Variable("W")), self.cache.get("2"))
+
+        self.cache.max_age = 60
+        self.cache._connect().execute("UPDATE estimands SET created = 0 WHERE key = '1'")
+        self.assertFalse(self.cache.get("1")[0])
+        self.assertEqual(1, self.cache.evict())
+        self.assertEqual(1, len(self.cache))
+
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+
+    def test_batched_eviction(self):
+        """Test that rows are only counted once a batch of results has been stored."""
+        self.cache.max_entries = 100
+        statements: list[str] = []
+        self.cache._connect().set_trace_callback(statements.append)
+        for i in range(150):
+            self.cache.set(str(i), "identify_outcomes", Y)
+            self.assertGreaterEqual(100, len(self.cache))
+        counts = sum(statement.startswith("SELECT COUNT(*)") for statement in statements)
+        # one for each check of the size above, one when first storing a result, and one
+        # for each of the batches of 11 results stored after evicting down to 90 results
+        self.assertEqual(150 + 1 + 5, counts)
+        self.assertTrue(self.cache.get("149")[0])
+        self.assertFalse(self.cache.get("0")[0])
+
+    def test_threads(self):
+        """Test that the cache can be used from several threads at once."""
+        expected = identify_outcomes(napkin, treatments=X, outcomes=Y)
+        with ThreadPoolExecutor(4) as executor:
+            results = list(
+                executor.map(lambda _: self.cache.identify_outcomes(napkin, X, Y), range(8))
+            )
+        self.assertEqual([expected] * 8, results)
+        self.assertEqual(1, len(self.cache))
+
+    def test_format(self):
+        """Test that results are stored as JSON and only decoded into known types."""
+        values = [
+            None,
+            Sum[Z](P(Y | X, Z) * P(Z)) / P(X),
+            Q[Y, Z](X, Y, Z) * P(X),
+            One(),
+            Zero(),
+            PP[Pi1](Y @ -X | ~Z),
+            {Y @ ~X: ~Y},
+        ]
+        for i, value in enumerate(values):
+            with self.subTest(value=value):
+                self.cache.set(str(i), "id_star", value)
+                self.assertEqual((True, value), self.cache.get(str(i)))
+
+        with self.assertRaises(TypeError):
+            self.cache.set("nope", "id_star", object())
+
+        blob = zlib.compress(json.dumps({"@": "system", "command": "echo"}).encode("utf-8"))
+        self.cache._connect().execute("UPDATE estimands SET value = ? WHERE key = '0'", (blob,))
+        with self.assertRaises(KeyError):
+            self.cache.get("0")
@@ -6,6 +6,10 @@ from tests.test_algorithm import cases
 from y0.algorithm.identify.cg import (
     World,
     _get_directed_edges,
+    _get_pw_signature,
+    _merge_pw_in_place,
+    _SignatureIndex,
+    clear_parallel_worlds_cache,
     extract_interventions,
     has_same_confounders,
     has_same_function,
@@ -35,6 +39,7 @@ from y0.examples import (
     figure_11a,
     figure_11b,
     figure_11c,
+    napkin,
 )
 from y0.graph import NxMixedGraph
 
@@ -75,6 +80,39 @@ class TestCounterfactualGraph(cases.GraphTestCase):
         self.assertTrue(Y @ (-z, -x) in expected2.nodes())
         self.assertTrue(Y @ (-x, -z) in expected2.nodes())
 
+    def test_make_parallel_worlds_stitched(self):
+        """Test that the single-pass parallel worlds graph has the same edges as the stitch functions."""
+        for graph, worlds in [
+            (figure_9a.graph, {World([-x]), World([-d])}),
+            (figure_9a.graph, {World([-x]), World([-d]), World([-x, -z])}),
+            (napkin, {World([+x])}),
+        ]:
+            with self.subTest(graph=graph, worlds=worlds):
+                undirected = (
+                    set(graph.undirected.edges())
+                    | stitch_counterfactual_and_neighbors(graph, worlds)
+                    | stitch_factual_and_dopplegangers(graph, worlds)
+                    | stitch_factual_and_doppleganger_neighbors(graph, worlds)
+                    | stitch_counterfactual_and_dopplegangers(graph, worlds)
+                    | stitch_counterfactual_and_doppleganger_neighbors(graph, worlds)
+                )
+                expected = NxMixedGraph.from_edges(
+                    nodes=[*graph.nodes(), *(node @ world for world in worlds for node in graph)],
+                    directed=[*graph.directed.edges(), *_get_directed_edges(graph, worlds)],
+                    undirected=undirected,
+                )
+                self.assert_graph_equal(expected, make_parallel_worlds_graph(graph, worlds))
+
+    def test_make_parallel_worlds_cache(self):
+        """Test that cached parallel worlds graphs can't be modified through the return value."""
+        clear_parallel_worlds_cache()
+        worlds = {World([-x]), World([-d])}
+        first = make_parallel_worlds_graph(figure_9a.graph, worlds)
+        first.add_directed_edge(D, Y)
+        second = make_parallel_worlds_graph(figure_9a.graph.copy(), {(-d,), (-x,)})
+        self.assertNotEqual(first, second)
+        self.assert_graph_equal(figure_9b.graph, second)
+
     def test_has_same_function(self):
         """Test that two variables have the same value."""
         self.assertTrue(has_same_function(D @ X, D))
@@ -638,6 +676,26 @@ class TestCounterfactualGraph(cases.GraphTestCase):
             )
         )
 
+    def test_pw_signature(self):
+        """Test that equivalent nodes have the same signature and that the index finds them."""
+        graph = figure_9b.graph
+        self.assertEqual(_get_pw_signature(graph, D), _get_pw_signature(graph, D @ -X))
+        self.assertNotEqual(_get_pw_signature(graph, D), _get_pw_signature(graph, D @ -D))
+        self.assertNotEqual(_get_pw_signature(graph, D), _get_pw_signature(graph, Y))
+
+        index = _SignatureIndex(graph, [D, D @ -X, D @ -D, D @ -Y])
+        self.assertEqual({D, D @ -X}, index.candidates(D))
+        self.assertEqual({D @ -D}, index.candidates(D @ -D))
+        self.assertEqual(set(), index.candidates(D @ -Y))
+
+        merged = graph.copy()
+        preferred, eliminated = _merge_pw_in_place(merged, D, D @ -X)
+        index = _SignatureIndex(graph.copy(), [D, D @ -X])
+        index.graph = merged
+        index.merge(preferred, eliminated)
+        self.assertEqual({D}, index.candidates(D))
+        self.assertEqual(set(), index.candidates(D @ -X))
+
     def test_merge_pw(self):
         """Test the parallel worlds graph after merging two nodes is correct (Lemma 25)."""
         cf_graph_1, preferred, eliminated = merge_pw(figure_9b.graph, D, D @ -X)
@@ -653,6 +711,16 @@ class TestCounterfactualGraph(cases.GraphTestCase):
         self.assert_graph_equal(figure_11c.graph, cf_graph_7)
         self.assertNotIn(D @ -d, merge_pw(figure_11a.graph, Z, Z @ -d)[0].nodes())
 
+    def test_merge_pw_copies(self):
+        """Test that merging nodes doesn't modify the input graph."""
+        graph = figure_9b.graph.copy()
+        merged, preferred, eliminated = merge_pw(graph, D @ -X, D)
+        self.assertEqual((D, D @ -X), (preferred, eliminated))
+        self.assertNotIn(D @ -X, merged)
+        self.assert_graph_equal(figure_9b.graph, graph)
+        # merging a node that has already been eliminated does nothing
+        self.assert_graph_equal(merged, merge_pw(merged, D, D @ -X)[0])
+
     def test_merge_pw_both_counterfactual(self):
         """Test that we sort the order of the nodes if both are counterfactual."""
         cf_graph_1, _, _ = merge_pw(figure_9b.graph, W @ -d, W @ -x)
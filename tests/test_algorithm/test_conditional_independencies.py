@@ -1,16 +1,34 @@
 """Test getting conditional independencies (and related)."""
 
+import itertools as itt
+import pickle
+import sqlite3
+import tempfile
 import typing
 import unittest
 from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
 
+import numpy as np
+import pandas as pd
 from pgmpy.estimators import CITests
 
+from tests.test_algorithm.cases import iter_small_examples
+from y0.algorithm.cache import DSeparationCache
 from y0.algorithm.conditional_independencies import (
+    DSeparationBackend,
     are_d_separated,
+    d_separations,
     get_conditional_independencies,
+    get_set_conditional_independencies,
+    get_topological_policy,
+    minimal,
+    minimal_sets,
 )
-from y0.dsl import AA, B, C, D, E, F, G, Variable, X, Y
+from y0.algorithm.separation.m_separation import are_m_separated
+from y0.dsl import AA, B, C, D, E, F, G, Variable, W, X, Y, Z
 from y0.examples import (
     Example,
     d_separation_example,
@@ -19,7 +37,13 @@ from y0.examples import (
     frontdoor_example,
 )
 from y0.graph import NxMixedGraph, iter_moral_links
-from y0.struct import CITestTuple, DSeparationJudgement
+from y0.struct import (
+    CITestTuple,
+    DSeparationJudgement,
+    DSeparationTable,
+    SetDSeparationJudgement,
+    partial_canonical_correlation,
+)
 
 
 class TestDSeparation(unittest.TestCase):
@@ -37,6 +61,14 @@ class TestDSeparation(unittest.TestCase):
         self.assertFalse(are_d_separated(graph, D, E, conditions=[AA, B]))
         self.assertFalse(are_d_separated(graph, G, G, conditions=[C]))
 
+    def test_bidirected_collider(self):
+        """Test a collider joined by a bidirected edge, which moralization used to miss."""
+        graph = NxMixedGraph.from_edges(directed=[(AA, B)], undirected=[(B, C)])
+        for backend in typing.get_args(DSeparationBackend):
+            with self.subTest(backend=backend):
+                self.assertTrue(are_d_separated(graph, AA, C, backend=backend))
+                self.assertFalse(are_d_separated(graph, AA, C, conditions=[B], backend=backend))
+
     def test_examples(self):
         """Check that example conditional independencies are d-separations and conditions (if present) are required.
 
@@ -226,6 +258,186 @@ class TestGetConditionalIndependencies(unittest.TestCase):
                 self.maxDiff = None
                 self.assert_example_has_judgements(example)
 
+    def test_parallel(self):
+        """Test searching for d-separations in a process pool and with the moral backend."""
+        graph = frontdoor_backdoor_example.graph
+        expected = list(d_separations(graph, return_all=True))
+        self.assertEqual(expected, list(d_separations(graph, return_all=True, backend="moral")))
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for backend in typing.get_args(DSeparationBackend):
+                with self.subTest(backend=backend):
+                    self.assertEqual(
+                        expected,
+                        list(
+                            d_separations(
+                                graph, return_all=True, backend=backend, executor=executor
+                            )
+                        ),
+                    )
+        with self.assertRaises(ValueError):
+            list(d_separations(graph, backend="nope"))  # type:ignore
+
+        # these queries have the same ancestors, so they share a moral graph
+        moral_cache: dict = {}
+        self.assertTrue(
+            are_d_separated(graph, W, Z, conditions=[X], backend="moral", moral_cache=moral_cache)
+        )
+        self.assertFalse(
+            are_d_separated(graph, W, X, conditions=[Z], backend="moral", moral_cache=moral_cache)
+        )
+        self.assertEqual(1, len(moral_cache))
+
+    def test_cache(self):
+        """Test caching judgements in memory and in a database."""
+        graph = frontdoor_backdoor_example.graph
+        expected = list(d_separations(graph, return_all=True))
+        cache = DSeparationCache()
+        self.assertEqual(expected, list(d_separations(graph, return_all=True, cache=cache)))
+        self.assertEqual(0, cache.hits)
+        misses = cache.misses
+        self.assertEqual(misses, len(cache))
+        self.assertEqual(expected, list(d_separations(graph, return_all=True, cache=cache)))
+        self.assertEqual((misses, misses), (cache.hits, cache.misses))
+
+        # the order of the pair and the conditions doesn't matter, and equal graphs share
+        judgement = are_d_separated(graph.copy(), Z, W, conditions=[X], cache=cache)
+        self.assertEqual(are_d_separated(graph, W, Z, conditions=[X]), judgement)
+        self.assertEqual(misses + 1, cache.hits)
+
+        # a precomputed fingerprint can be passed for many queries on the same graph
+        fingerprint = graph.fingerprint()
+        with mock.patch.object(NxMixedGraph, "fingerprint") as mock_fingerprint:
+            self.assertEqual(
+                judgement,
+                are_d_separated(graph, Z, W, conditions=[X], cache=cache, fingerprint=fingerprint),
+            )
+            self.assertEqual(
+                expected,
+                list(d_separations(graph, return_all=True, cache=cache, fingerprint=fingerprint)),
+            )
+        mock_fingerprint.assert_not_called()
+        self.assertEqual(2 * misses + 2, cache.hits)
+
+        # the cache can be shared between threads
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    lambda _: list(d_separations(graph, return_all=True, cache=cache)), range(8)
+                )
+            )
+        self.assertTrue(all(expected == result for result in results))
+
+        cache.clear()
+        self.assertEqual((0, 0, 0), (cache.hits, cache.misses, len(cache)))
+
+        # the least recently used judgements are evicted
+        small = DSeparationCache(maxsize=2)
+        for a, b in [(W, X), (W, Y), (W, Z)]:
+            are_d_separated(graph, a, b, cache=small)
+        self.assertEqual(2, len(small))
+        are_d_separated(graph, W, X, cache=small)
+        self.assertEqual(0, small.hits)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory).joinpath("judgements.sqlite")
+            with DSeparationCache(maxsize=1, path=path) as persistent:
+                self.assertEqual(
+                    expected, list(d_separations(graph, return_all=True, cache=persistent))
+                )
+                self.assertEqual(0, persistent.hits)
+            with DSeparationCache(path=path) as persistent:
+                self.assertEqual(
+                    expected, list(d_separations(graph, return_all=True, cache=persistent))
+                )
+                self.assertEqual((misses, 0), (persistent.hits, persistent.misses))
+
+                # copies sent to other processes share the database but not the memory
+                copy = pickle.loads(pickle.dumps(persistent))  # noqa:S301
+                self.assertEqual((path, 0), (copy.path, len(copy)))
+                with ProcessPoolExecutor(max_workers=2) as executor:
+                    self.assertEqual(
+                        expected,
+                        list(
+                            d_separations(
+                                graph, return_all=True, executor=executor, cache=persistent
+                            )
+                        ),
+                    )
+                copy.close()
+
+            # the least recently used judgements are evicted from the database
+            path = Path(directory).joinpath("small.sqlite")
+            with DSeparationCache(path=path, max_entries=3) as persistent:
+                self.assertEqual(
+                    expected, list(d_separations(graph, return_all=True, cache=persistent))
+                )
+                self.assertEqual(0, persistent.evict())
+            with sqlite3.connect(path) as connection:
+                (count,) = connection.execute("SELECT COUNT(*) FROM judgements").fetchone()
+            connection.close()
+            self.assertEqual(3, count)
+
+    def test_table(self):
+        """Test storing judgements in a table and minimizing them."""
+        for example in iter_small_examples(7):
+            graph = example.graph
+            with self.subTest(name=example.name):
+                judgements = list(d_separations(graph, return_all=True))
+                table = DSeparationTable.from_judgements(judgements)
+                self.assertEqual(len(judgements), len(table))
+                self.assertEqual(judgements, table.to_judgements())
+                self.assertEqual(
+                    minimal(judgements, policy=get_topological_policy(graph)),
+                    set(table.minimal(order=graph.topological_sort()).to_judgements()),
+                )
+                self.assertEqual(minimal(judgements), set(table.minimal().to_judgements()))
+
+        # judgements that aren't in canonical form are put in it
+        table = DSeparationTable.from_judgements(
+            [DSeparationJudgement(False, Y, X, (Z, W)), DSeparationJudgement(True, X, Y, ())]
+        )
+        self.assertEqual(
+            [DSeparationJudgement.create(X, Y, [W, Z], separated=False)],
+            table[table.rank() == 1].to_judgements(),
+        )
+        self.assertEqual(
+            [("X", "Y", "W|Z", False), ("X", "Y", "", True)],
+            list(table.to_df().itertuples(index=False, name=None)),
+        )
+        empty = DSeparationTable.from_judgements([])
+        self.assertEqual([], empty.minimal().to_judgements())
+
+    def test_local_markov(self):
+        """Test getting conditional independencies from the local Markov property."""
+        for example in iter_small_examples():
+            graph = example.graph
+            with self.subTest(name=example.name):
+                judgements = get_conditional_independencies(graph, strategy="local_markov")
+                self.assert_valid_judgements(graph, judgements)
+                observed_pairs = {(judgement.left, judgement.right) for judgement in judgements}
+                expected_pairs = {
+                    (judgement.left, judgement.right)
+                    for judgement in get_conditional_independencies(graph)
+                }
+                self.assertEqual(expected_pairs, observed_pairs)
+
+        # A and C are only d-separated in the ancestors of the pair, not given B
+        graph = NxMixedGraph.from_edges(undirected=[(AA, B), (B, C)])
+        self.assertEqual(
+            {DSeparationJudgement.create(AA, C)},
+            get_conditional_independencies(graph, strategy="local_markov"),
+        )
+
+        # a chain is too long to search exhaustively
+        nodes = [Variable(f"V{i}") for i in range(40)]
+        graph = NxMixedGraph.from_edges(nodes=nodes, directed=list(itt.pairwise(nodes)))
+        judgements = get_conditional_independencies(graph, strategy="local_markov")
+        self.assertEqual(40 * 39 // 2 - 39, len(judgements))
+        self.assertIn(DSeparationJudgement.create(nodes[0], nodes[39], [nodes[38]]), judgements)
+
+        with self.assertRaises(ValueError):
+            get_conditional_independencies(graph, strategy="nope")  # type:ignore
+
     def test_ci_test_continuous(self):
         """Test conditional independency test on continuous data."""
         data = frontdoor_example.generate_data(500)  # continuous
@@ -246,6 +458,124 @@ class TestGetConditionalIndependencies(unittest.TestCase):
         with self.assertRaises(ValueError):
             judgement.test(data, method="chi-square", boolean=True)
 
+    def test_set_judgement(self):
+        """Test the canonical form of judgements between sets of variables."""
+        judgement = SetDSeparationJudgement.create([Z, Y], [X], [W])
+        self.assertEqual((X,), judgement.left)
+        self.assertEqual((Y, Z), judgement.right)
+        self.assertEqual((W,), judgement.conditions)
+        self.assertTrue(judgement)
+        self.assertEqual(judgement, SetDSeparationJudgement.create([X], [Y, Z, Y], [W]))
+        self.assertEqual(
+            [
+                DSeparationJudgement.create(X, Y, [W]),
+                DSeparationJudgement.create(X, Z, [W]),
+            ],
+            judgement.to_judgements(),
+        )
+        self.assertEqual(
+            SetDSeparationJudgement.create([X], [Y], [Z], separated=False),
+            SetDSeparationJudgement.from_judgement(
+                are_d_separated(frontdoor_example.graph, X, Y, conditions=[Z])
+            ),
+        )
+        with self.assertRaises(ValueError):
+            SetDSeparationJudgement.create([], [X])
+
+    def test_set_ci_test(self):
+        """Test conditional independence tests between sets of variables."""
+        rng = np.random.default_rng(0)
+        z = rng.normal(size=1_000)
+        data = pd.DataFrame(
+            {
+                "X": z + rng.normal(size=1_000),
+                "Y": rng.normal(size=1_000),
+                "Z": z,
+                "W": z + rng.normal(size=1_000),
+            }
+        )
+        _, p_value, dof = partial_canonical_correlation(
+            ["X", "Y"], ["W"], ["Z"], data, boolean=False
+        )
+        self.assertGreater(p_value, 0.01)
+        self.assertEqual(2, dof)
+        self.assertFalse(
+            partial_canonical_correlation(["X", "Y"], ["W"], [], data, significance_level=0.05)
+        )
+
+        independent = SetDSeparationJudgement.create([X, Y], [W], [Z])
+        self.assertTrue(independent.test(data, method="pearson", boolean=True))
+        result = independent.test(data, method="pearson", boolean=False)
+        self.assertIsInstance(result, CITestTuple)
+        self.assertEqual(2, result.dof)
+        self.assertFalse(
+            SetDSeparationJudgement.create([X, Y], [W]).test(data, method="pearson", boolean=True)
+        )
+        with self.assertRaises(ValueError):
+            SetDSeparationJudgement.create([X, Y], [W], [Y]).test(data, method="pearson")
+
+        discrete = frontdoor_backdoor_example.generate_data(500)
+        judgement = SetDSeparationJudgement.create([X], [Y, Z])
+        for method in ["chi-square", "g_sq"]:
+            with self.subTest(method=method):
+                self.assertIsInstance(judgement.test(discrete, method=method, boolean=True), bool)
+                result = judgement.test(discrete, method=method, boolean=False)
+                self.assertIsInstance(result, CITestTuple)
+
+        # sides with too many variables are tested pairwise, correcting the smallest p-value
+        judgement = SetDSeparationJudgement.create([X], [Y, Z, W])
+        for method in ["chi-square", "g_sq"]:
+            with self.subTest(method=method):
+                result = judgement.test(discrete, method=method, boolean=False)
+                p_values = [
+                    pairwise.test(discrete, method=method, boolean=False).p_value
+                    for pairwise in judgement.to_judgements()
+                ]
+                self.assertEqual(min(1.0, 3 * min(p_values)), result.p_value)
+                self.assertEqual(
+                    result.p_value >= 0.05,
+                    judgement.test(discrete, method=method, boolean=True, significance_level=0.05),
+                )
+
+    def test_minimal_sets(self):
+        """Test merging d-separations into d-separations between sets of variables."""
+        for example in iter_small_examples():
+            graph = example.graph
+            judgements = get_conditional_independencies(graph)
+            pairs = {frozenset((j.left, j.right, *j.conditions)) for j in judgements}
+            for merged in [get_set_conditional_independencies(graph), minimal_sets(judgements)]:
+                with self.subTest(name=example.name):
+                    self.assertLessEqual(len(merged), len(judgements))
+                    covered = set()
+                    for judgement in merged:
+                        self.assertTrue(
+                            are_m_separated(
+                                graph,
+                                set(judgement.left),
+                                set(judgement.right),
+                                conditions=judgement.conditions,
+                            )
+                        )
+                        covered.update(
+                            frozenset((j.left, j.right, *j.conditions))
+                            for j in judgement.to_judgements()
+                        )
+                    self.assertLessEqual(pairs, covered)
+
+        judgements = [
+            DSeparationJudgement.create(X, Y),
+            DSeparationJudgement.create(X, Z),
+            DSeparationJudgement.create(Y, Z, separated=False),
+            DSeparationJudgement.create(W, Z, [X]),
+        ]
+        self.assertEqual(
+            {
+                SetDSeparationJudgement.create([X], [Y, Z]),
+                SetDSeparationJudgement.create([W], [Z], [X]),
+            },
+            minimal_sets(judgements),
+        )
+
     def test_ci_test_discrete(self):
         """Test conditional independency test on discrete data."""
         data = frontdoor_backdoor_example.generate_data(500)  # discrete
@@ -27,6 +27,8 @@ from y0.algorithm.counterfactual_transport.ancestor_utils import (
     get_base_variables,
 )
 from y0.algorithm.counterfactual_transport.api import (
+    CFTDomain,
+    PreparedCFTDomains,
     _any_inconsistent_intervention_values,
     _any_variable_values_inconsistent_with_interventions,
     _any_variables_with_inconsistent_values,
@@ -57,6 +59,7 @@ from y0.algorithm.counterfactual_transport.api import (
     transport_conditional_counterfactual_query,
     transport_district_intervening_on_parents,
     transport_unconditional_counterfactual_query,
+    unconditional_cft,
 )
 from y0.algorithm.transport import transport_variable
 from y0.dsl import (
@@ -2810,6 +2813,123 @@ class TestTransportUnconditionalCounterfactualQuery(cases.GraphTestCase):
         self.assertIsNone(query_result)
 
 
+class TestPreparedCFTDomains(cases.GraphTestCase):
+    """Test answering many counterfactual transportability queries against the same domains."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the class."""
+        cls.domain_graphs = [
+            (
+                figure_2_graph_domain_1_with_interventions,
+                figure_2_graph_domain_1_with_interventions_topo,
+            ),
+            (
+                figure_2_graph_domain_2,
+                figure_2_graph_domain_2_topo,
+            ),
+        ]
+        cls.domain_data = [({X}, PP[Pi1](W, X, Y, Z)), (set(), PP[Pi2](W, X, Y, Z))]
+
+    def test_unconditional(self):
+        """Test that prepared domains give the same results as Algorithm 2 of [correa22a]_."""
+        prepared = PreparedCFTDomains(
+            target_domain_graph=figure_2a_graph,
+            domain_graphs=self.domain_graphs,
+            domain_data=self.domain_data,
+        )
+        for event in [
+            [(Y @ -X, -Y), (X, -X)],
+            [(Y @ -X, -Y), (W @ +X, -W), (X, -X)],
+            [(Y @ -X, None), (X, -X)],
+            [(Y @ -X, -Y), (X, None)],
+            [(W @ -X, -W)],
+        ]:
+            with self.subTest(event=event):
+                self.assertEqual(
+                    transport_unconditional_counterfactual_query(
+                        event=event,
+                        target_domain_graph=figure_2a_graph,
+                        domain_graphs=self.domain_graphs,
+                        domain_data=self.domain_data,
+                    ),
+                    prepared.transport_unconditional_counterfactual_query(event),
+                )
+        self.assertTrue(prepared._districts)
+        district = next(iter(prepared._districts))
+        self.assertIs(prepared._districts[district], prepared.transport_district(district))
+
+    def test_conditional(self):
+        """Test that prepared domains give the same results as Algorithm 3 of [correa22a]_."""
+        domain_graphs = [
+            (
+                figure_1_graph_no_transportability_nodes,
+                figure_1_graph_no_transportability_nodes_topo,
+            ),
+            (
+                figure_1_graph_domain_1_with_interventions,
+                figure_1_graph_domain_1_with_interventions_topo,
+            ),
+        ]
+        domain_data = [(set(), PP[TARGET_DOMAIN](X, Y, Z)), ({X}, PP[Pi1](X, Y, Z))]
+        prepared = PreparedCFTDomains(
+            target_domain_graph=figure_1_graph_no_transportability_nodes,
+            domain_graphs=domain_graphs,
+            domain_data=domain_data,
+        )
+        for outcomes, conditions in [
+            ([(Y @ -X, -Y)], [(Z @ -X, -Z), (X, +X)]),
+            ([(Y @ -X, -Y)], [(X, +X)]),
+            ([(Y @ +X, +Y)], [(Z @ +X, -Z)]),
+        ]:
+            with self.subTest(outcomes=outcomes, conditions=conditions):
+                self.assertEqual(
+                    transport_conditional_counterfactual_query(
+                        outcomes=outcomes,
+                        conditions=conditions,
+                        target_domain_graph=figure_1_graph_no_transportability_nodes,
+                        domain_graphs=domain_graphs,
+                        domain_data=domain_data,
+                    ),
+                    prepared.transport_conditional_counterfactual_query(outcomes, conditions),
+                )
+
+    def test_from_cft_domains(self):
+        """Test preparing a list of :class:`CFTDomain` objects."""
+        domains = [
+            CFTDomain(graph=graph, population=population, policy_variables=policy_variables)
+            for (graph, _), (policy_variables, population) in zip(
+                self.domain_graphs, self.domain_data, strict=True
+            )
+        ]
+        prepared = PreparedCFTDomains.from_cft_domains(
+            target_domain_graph=figure_2a_graph, domains=domains
+        )
+        event = [Y @ -X, -X]
+        self.assertEqual(
+            unconditional_cft(event=event, target_domain_graph=figure_2a_graph, domains=domains),
+            prepared.unconditional_cft(event),
+        )
+
+    def test_validation(self):
+        """Test that the domains are checked on construction and each event is checked on use."""
+        with self.assertRaises(ValueError):
+            PreparedCFTDomains(
+                target_domain_graph=figure_2a_graph,
+                domain_graphs=self.domain_graphs,
+                domain_data=self.domain_data[:1],
+            )
+        prepared = PreparedCFTDomains(
+            target_domain_graph=figure_2a_graph,
+            domain_graphs=self.domain_graphs,
+            domain_data=self.domain_data,
+        )
+        with self.assertRaises(ValueError):
+            prepared.transport_unconditional_counterfactual_query([])
+        with self.assertRaises(ValueError):
+            prepared.transport_conditional_counterfactual_query([(Y @ -X, -Y)], [])
+
+
 class TestGetConditionedVariablesInAncestralSet(cases.GraphTestCase):
     r"""Identify conditioned variables that are ancestors of an input variable ($\mathbf{X_{\ast}}(W_{\mathbf{\ast}})$).
 
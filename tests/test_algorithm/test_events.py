@@ -0,0 +1,65 @@
+"""Tests for the compact representation of counterfactual events."""
+
+import unittest
+
+from y0.algorithm.events import encode_base, encode_term, normalize_event
+from y0.dsl import X, Y, Z
+
+
+class TestEvents(unittest.TestCase):
+    """Test normalizing counterfactual events."""
+
+    def test_encode(self):
+        """Test encoding variables and terms as bits."""
+        codes: dict = {}
+        self.assertEqual(1, encode_base(X, codes))
+        self.assertEqual(encode_base(X, codes), encode_base(X @ -Y, codes))
+        self.assertEqual(encode_base(X, codes), encode_base(-X, codes))
+        self.assertEqual(2, encode_base(Y, codes))
+        self.assertEqual({"X": 1, "Y": 2}, codes)
+
+        term = encode_term(Y @ (-X, ~Y), -Y, codes)
+        self.assertEqual(encode_base(Y, codes), term.base)
+        self.assertEqual(encode_base(X, codes) | encode_base(Y, codes), term.interventions)
+        self.assertEqual(encode_base(Y, codes), term.starred)
+        self.assertTrue(term.is_reflexive)
+        self.assertTrue(term.violates_effectiveness)
+        self.assertFalse(term.is_tautology)
+
+        term = encode_term(Y @ -X, None, codes)
+        self.assertFalse(term.is_reflexive)
+        self.assertFalse(term.violates_effectiveness)
+        self.assertTrue(encode_term(Y, -Y, codes).is_reflexive)
+        self.assertTrue(encode_term(Y @ -Y, -Y, codes).is_tautology)
+        # codes are only assigned to the bases seen in the same event
+        self.assertEqual({"X": 1, "Y": 2}, codes)
+        self.assertEqual(1, encode_term(Z, None, {}).base)
+
+    def test_normalize(self):
+        """Test normalizing an event from ID*."""
+        normalized = normalize_event({Y @ -X: -Y, X @ -X: -X, Z: +Z})
+        self.assertFalse(normalized.violates_effectiveness)
+        self.assertEqual({Y @ -X: -Y, Z: +Z}, normalized.reduced)
+        self.assertEqual({-X}, normalized.interventions)
+        self.assertEqual({-X, -Y, +Z}, normalized.evidence)
+        self.assertTrue(normalize_event({Y @ -X: -Y, X @ +X: -X}).violates_effectiveness)
+
+    def test_normalize_missing_values(self):
+        """Test normalizing an event from counterfactual transportability, where values can be missing."""
+        normalized = normalize_event(
+            [(Y @ -X, -Y), (Y @ -X, None), (X @ -X, -X), (Z, None), (Y @ -X, -Y)]
+        )
+        self.assertEqual(((X @ -X, -X), (Z, None)), normalized.reflexive)
+        self.assertEqual(((Y @ -X, -Y), (Y @ -X, None), (Y @ -X, -Y)), normalized.nonreflexive)
+        self.assertEqual({X @ -X: {-X}, Z: {None}}, normalized.reflexive_values)
+        self.assertEqual({Y @ -X: {-Y}}, normalized.nonreflexive_values)
+
+    def test_normalize_immutable(self):
+        """Test that cached normalized events can't be modified by their callers."""
+        normalized = normalize_event({Y @ -X: -Y, Z: +Z})
+        with self.assertRaises(TypeError):
+            normalized.reduced[Z] = -Z  # type:ignore[index]
+        with self.assertRaises(TypeError):
+            normalized.reflexive_values[Z] = frozenset()  # type:ignore[index]
+        self.assertIsInstance(normalized.reflexive_values[Z], frozenset)
+        self.assertIs(normalized, normalize_event({Y @ -X: -Y, Z: +Z}))
@@ -9,7 +9,7 @@ import pandas as pd
 from y0.algorithm.conditional_independencies import get_conditional_independencies
 from y0.algorithm.falsification import get_falsifications, get_graph_falsifications
 from y0.examples import asia_example, frontdoor_example
-from y0.struct import get_conditional_independence_tests
+from y0.struct import CONTINUOUS_CI_TESTS, get_conditional_independence_tests
 
 
 class TestFalsification(unittest.TestCase):
@@ -18,7 +18,7 @@ class TestFalsification(unittest.TestCase):
     def test_discrete_graph_falsifications(self):
         """Test the asia graph against data generated from it."""
         for method in [None, *get_conditional_independence_tests()]:
-            if method == "pearson":
+            if method in CONTINUOUS_CI_TESTS:
                 continue
             with self.subTest(method=method), warnings.catch_warnings():
                 warnings.simplefilter(action="ignore", category=FutureWarning)
@@ -65,3 +65,15 @@ class TestFalsification(unittest.TestCase):
         issues = get_falsifications(implications, asia_example.data)
         self.assertEqual(0, len(issues.failures))
         self.assertEqual(len(issues.evidence), len(implications))
+
+    def test_set_falsifications(self):
+        """Test the asia graph against data generated from it with judgements between sets."""
+        implications = get_conditional_independencies(asia_example.graph)
+        issues = get_graph_falsifications(asia_example.graph, asia_example.data, sets=True)
+        self.assertEqual(0, len(issues.failures))
+        self.assertGreater(len(issues.evidence), 0)
+        self.assertLess(len(issues.evidence), len(implications))
+        self.assertTrue(issues.evidence["left"].str.contains(",", regex=False).any())
+
+        data = frontdoor_example.generate_data(1_000)
+        get_graph_falsifications(frontdoor_example.graph, df=data, method="pearson", sets=True)
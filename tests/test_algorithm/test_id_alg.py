@@ -3,7 +3,10 @@
 import itertools as itt
 import unittest
 
+import networkx as nx
+
 import y0.examples
+from y0.algorithm.conditional_independencies import are_d_separated
 from y0.algorithm.identify import (
     Identification,
     Query,
@@ -12,6 +15,7 @@ from y0.algorithm.identify import (
     identify,
     identify_outcomes,
 )
+from y0.algorithm.identify.id_c import rule_2_of_do_calculus_applies
 from y0.algorithm.identify.id_std import (
     line_1,
     line_2,
@@ -22,6 +26,8 @@ from y0.algorithm.identify.id_std import (
     line_7,
 )
 from y0.dsl import (
+    U1,
+    U2,
     W1,
     W2,
     Y1,
@@ -32,6 +38,7 @@ from y0.dsl import (
     Probability,
     Product,
     Sum,
+    W,
     X,
     Y,
     Z,
@@ -93,6 +100,47 @@ class TestIdentify(unittest.TestCase):
             estimand,
         )
 
+    def test_idc_rule_2(self):
+        """Test the single-pass rule 2 check against pairwise d-separation on the mutilated graph."""
+        for example in [figure_6a, y0.examples.napkin_example, y0.examples.figure_9a]:
+            graph = example.graph
+            for outcome, treatment, *conditions in itt.permutations(graph.nodes(), 4):
+                identification = Identification.from_parts(
+                    outcomes={outcome},
+                    treatments={treatment},
+                    conditions=set(conditions),
+                    graph=graph,
+                )
+                for condition in conditions:
+                    mutilated = graph.remove_in_edges({treatment}).remove_out_edges(condition)
+                    if any(node not in mutilated for node in graph.nodes()):
+                        continue  # remove_in_edges() drops isolated nodes
+                    expected = are_d_separated(
+                        mutilated,
+                        outcome,
+                        condition,
+                        conditions={treatment, *conditions} - {condition},
+                    ).separated
+                    with self.subTest(outcome=outcome, treatment=treatment, condition=condition):
+                        self.assertEqual(
+                            expected, rule_2_of_do_calculus_applies(identification, condition)
+                        )
+
+    def test_idc_rule_2_bidirected_collider(self):
+        """Test that rule 2 doesn't apply when conditioning opens a path of bidirected colliders."""
+        graph = NxMixedGraph.from_edges(directed=[(X, W)], undirected=[(Z, W), (W, Y)])
+        # the same graph with the bidirected edges replaced by latent common causes
+        latent_graph = nx.DiGraph([(X, W), (U1, Z), (U1, W), (U2, W), (U2, Y)])
+        for conditions, expected in [({Z}, True), ({Z, W}, False)]:
+            identification = Identification.from_parts(
+                outcomes={Y}, treatments={X}, conditions=conditions, graph=graph
+            )
+            with self.subTest(conditions=conditions):
+                self.assertEqual(
+                    expected, nx.is_d_separator(latent_graph, {Y}, {Z}, {X, *conditions} - {Z})
+                )
+                self.assertEqual(expected, rule_2_of_do_calculus_applies(identification, Z))
+
     def test_line_1(self):
         r"""Test that line 1 of ID algorithm works correctly.
 
@@ -1,5 +1,7 @@
 """Tests for the ID* algorithm."""
 
+from unittest import mock
+
 from tests.test_algorithm import cases
 from y0.algorithm.identify._extras import (
     get_district_interventions,
@@ -463,6 +465,30 @@ class TestIDStar(cases.GraphTestCase):
         with self.assertRaises(ConflictUnidentifiable):
             id_star(input_graph_line8, {Y @ -x: -y, Y @ +x: +y})
 
+    def test_id_star_memo(self):
+        """Test that subproblems of the ID* algorithm are shared through the memo."""
+        query = {Y @ -x: -y, X: +x, Z @ -d: -z, D: -d}
+        memo: dict = {}
+        expected = id_star(figure_9a.graph, query, memo=memo)
+        self.assert_expr_equal(expected, id_star(figure_9a.graph, query))
+        # the query itself and one subproblem for each district are memoized
+        self.assertLess(1, len(memo))
+        self.assertIn((figure_9a.graph.fingerprint(), frozenset(query.items())), memo)
+
+        # the graph's fingerprint is computed once and shared between the recursive calls
+        with mock.patch.object(
+            NxMixedGraph, "fingerprint", autospec=True, side_effect=NxMixedGraph.fingerprint
+        ) as fingerprint:
+            id_star(figure_9a.graph, query)
+        self.assertEqual(1, fingerprint.call_count)
+
+        # the memo is used across calls, so poisoned district subproblems are returned
+        poisoned = {key: One() for key in memo if key[1] != frozenset(query.items())}
+        self.assert_expr_equal(
+            Sum[W](One()),
+            id_star(figure_9a.graph.copy(), {D: -d, Z @ -d: -z, X: +x, Y @ -x: -y}, memo=poisoned),
+        )
+
     def test_idc_star(self):
         """Test that the IDC* algorithm returns the correct estimand."""
         input_graph_line_1 = NxMixedGraph.from_edges(directed=[(D, Z), (Z, Y)])
@@ -0,0 +1,102 @@
+"""Tests for instrumentation of the recursive algorithms."""
+
+import unittest
+
+from y0.algorithm.identify import id_star, idc, idc_star, identify_outcomes
+from y0.algorithm.identify.utils import Identification
+from y0.algorithm.instrumentation import (
+    Instrumentation,
+    InstrumentationReport,
+    is_instrumented,
+    mark_line,
+    record_subgraph,
+)
+from y0.algorithm.transport import identify_target_outcomes
+from y0.dsl import X1, X2, Y1, Y2, P, Pi1, Pi2, X, Y, Z
+from y0.examples import figure_9a, napkin, tikka_figure_2, tikka_trso_figure_8_graph
+from y0.graph import NxMixedGraph
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test instrumentation of the recursive algorithms."""
+
+    def test_inactive(self):
+        """Test that the hooks are no-ops outside of an instrumentation."""
+        graph = NxMixedGraph.from_edges(directed=[(X, Y)])
+        mark_line(1)
+        self.assertIs(graph, record_subgraph(graph))
+        self.assertFalse(is_instrumented())
+        with Instrumentation():
+            self.assertTrue(is_instrumented())
+        self.assertFalse(is_instrumented())
+
+    def test_identify(self):
+        """Test instrumenting the ID algorithm."""
+        reports: list[InstrumentationReport] = []
+        with Instrumentation(reports.append) as instrumentation:
+            expected = identify_outcomes(napkin, treatments=X, outcomes=Y)
+        self.assertEqual(expected, identify_outcomes(napkin, treatments=X, outcomes=Y))
+        self.assertEqual([instrumentation.report], reports)
+        report = instrumentation.report
+
+        self.assertEqual({"ID"}, set(report.count_calls()))
+        # the outermost call returns last
+        outermost = report.calls[-1]
+        self.assertEqual(0, outermost.depth)
+        self.assertEqual(napkin.directed.number_of_nodes(), outermost.nodes)
+        self.assertEqual(napkin.undirected.number_of_edges(), outermost.undirected_edges)
+        self.assertIsNotNone(outermost.expression_size)
+        self.assertEqual(len(report.calls) - 1, report.max_depth)
+        self.assertEqual(len(report.calls), sum(s.count for s in report.lines.values()))
+        self.assertIn(("ID", "2"), report.lines)
+        self.assertTrue(report.subgraphs)
+
+        line_df = report.get_line_df()
+        self.assertEqual(["algorithm", "line", "count", "time"], list(line_df.columns))
+        self.assertEqual(len(report.calls), len(report.get_call_df().index))
+
+    def test_idc(self):
+        """Test that nested algorithms are reported separately."""
+        graph = NxMixedGraph.from_edges(directed=[(Z, X), (X, Y), (Z, Y)])
+        identification = Identification.from_expression(graph=graph, query=P(Y @ X | Z @ X))
+        with Instrumentation() as instrumentation:
+            idc(identification)
+        counts = instrumentation.report.count_calls()
+        self.assertLessEqual(1, counts["IDC"])
+        self.assertLessEqual(1, counts["ID"])
+
+    def test_id_star(self):
+        """Test instrumenting the ID* algorithm."""
+        with Instrumentation(expression_sizes=False) as instrumentation:
+            id_star(figure_9a.graph, {Y @ ~X: ~Y})
+        report = instrumentation.report
+        self.assertEqual({"ID*"}, set(report.count_calls()))
+        self.assertTrue(all(call.expression_size is None for call in report.calls))
+        self.assertIn(("ID*", "4"), report.lines)
+
+    def test_idc_star(self):
+        """Test that IDC* reports the mutilated graphs it checks rule 2 of do-calculus on."""
+        with Instrumentation() as instrumentation:
+            idc_star(tikka_figure_2.graph, {Y @ -X: -Y}, {Z @ -X: -Z, X: +X})
+        report = instrumentation.report
+        self.assertEqual({"ID*", "IDC*"}, set(report.count_calls()))
+        cf_graph, mutilated_graph, *_ = (
+            record for record in report.subgraphs if record.algorithm == "IDC*"
+        )
+        self.assertEqual(cf_graph.nodes, mutilated_graph.nodes)
+        self.assertLess(mutilated_graph.edges, cf_graph.edges)
+
+    def test_trso(self):
+        """Test instrumenting the TRSO algorithm."""
+        with Instrumentation() as instrumentation:
+            identify_target_outcomes(
+                graph=tikka_trso_figure_8_graph,
+                target_outcomes={Y1, Y2},
+                target_interventions={X1, X2},
+                surrogate_outcomes={Pi1: {Y1}, Pi2: {Y2}},
+                surrogate_interventions={Pi1: {X1}, Pi2: {X2}},
+            )
+        report = instrumentation.report
+        self.assertEqual({"TRSO"}, set(report.count_calls()))
+        self.assertIn(("TRSO", "4"), report.lines)
+        self.assertTrue(all(record.algorithm == "TRSO" for record in report.subgraphs))
@@ -0,0 +1,129 @@
+"""Test m-separation by reachability."""
+
+import itertools as itt
+import unittest
+
+from y0.algorithm.conditional_independencies import are_d_separated
+from y0.algorithm.separation.m_separation import (
+    are_m_separated,
+    get_m_connected,
+    get_m_separated,
+    get_m_separation_matrix,
+)
+from y0.dsl import U1, U2, V1, V2, V3, V4, V5, V6
+from y0.examples import examples, napkin
+from y0.graph import NxMixedGraph
+from y0.util.combinatorics import powerset
+
+#: An ADMG where V1 and V4 are connected given V2 and V3 only through a path
+#: of colliders over bidirected edges
+graph = NxMixedGraph.from_edges(
+    directed=[(V1, V2), (V3, V4), (V5, V6)],
+    undirected=[(V2, V3), (V4, V6)],
+)
+#: The same graph with the bidirected edges replaced by latent common causes
+latent_graph = NxMixedGraph.from_edges(
+    directed=[(V1, V2), (V3, V4), (V5, V6), (U1, V2), (U1, V3), (U2, V4), (U2, V6)],
+)
+
+
+class TestMSeparation(unittest.TestCase):
+    """Test m-separation by reachability."""
+
+    def test_collider_path(self):
+        """Test paths of colliders through bidirected edges."""
+        self.assertTrue(are_m_separated(graph, V1, V4))
+        self.assertFalse(are_m_separated(graph, V1, V4, conditions=[V2]))
+        self.assertTrue(are_m_separated(graph, V1, V4, conditions=[V2, V3]))
+        self.assertFalse(are_m_separated(graph, V1, V6, conditions=[V2, V4]))
+        self.assertTrue(are_m_separated(graph, V1, V6, conditions=[V2]))
+        self.assertTrue(are_m_separated(graph, V5, V3, conditions=[V6]))
+        self.assertFalse(are_m_separated(graph, V5, V3, conditions=[V6, V4]))
+        self.assertFalse(are_m_separated(graph, V5, {V1, V3}, conditions=[V6, V4]))
+        self.assertTrue(are_m_separated(graph, {V5, V6}, V1))
+        self.assertEqual({V1, V3, V4}, get_m_connected(graph, V1, conditions=[V2]))
+        self.assertEqual(set(), get_m_connected(graph, V1, conditions=[V1]))
+
+    def test_latent_projection(self):
+        """Test that m-separation agrees with d-separation with explicit latent variables."""
+        nodes = set(graph.nodes())
+        for left, right in itt.combinations(sorted(nodes), 2):
+            for conditions in powerset(nodes - {left, right}):
+                with self.subTest(left=left, right=right, conditions=conditions):
+                    expected = are_d_separated(
+                        latent_graph, left, right, conditions=conditions
+                    ).separated
+                    self.assertEqual(
+                        expected, are_m_separated(graph, left, right, conditions=conditions)
+                    )
+                    self.assertEqual(
+                        expected,
+                        are_d_separated(
+                            graph, left, right, conditions=conditions, backend="moral"
+                        ).separated,
+                    )
+
+    def test_backends(self):
+        """Test that both backends of :func:`are_d_separated` agree on the example graphs."""
+        for example in examples:
+            nodes = set(example.graph.nodes())
+            if len(nodes) > 7:
+                continue
+            for left, right in itt.combinations(sorted(nodes), 2):
+                for conditions in powerset(nodes - {left, right}, stop=2):
+                    with self.subTest(
+                        name=example.name, left=left, right=right, conditions=conditions
+                    ):
+                        self.assertEqual(
+                            are_d_separated(
+                                example.graph, left, right, conditions=conditions, backend="moral"
+                            ),
+                            are_d_separated(example.graph, left, right, conditions=conditions),
+                        )
+        with self.assertRaises(ValueError):
+            are_d_separated(graph, V1, V2, backend="nope")  # type:ignore
+
+    def test_mutilation(self):
+        """Test that ignoring edges gives the same results as removing them."""
+        nodes = set(napkin.nodes())
+        for removed_in, removed_out in itt.product(powerset(nodes, stop=1), repeat=2):
+            mutilated = napkin.remove_in_edges(removed_in).remove_out_edges(removed_out)
+            if any(node not in mutilated for node in nodes):
+                continue  # remove_in_edges() drops isolated nodes
+            for left, right in itt.combinations(sorted(nodes), 2):
+                for conditions in powerset(nodes - {left, right}, stop=2):
+                    with self.subTest(
+                        removed_in=removed_in, removed_out=removed_out, conditions=conditions
+                    ):
+                        self.assertEqual(
+                            are_d_separated(
+                                mutilated, left, right, conditions=conditions
+                            ).separated,
+                            are_m_separated(
+                                napkin,
+                                left,
+                                right,
+                                conditions=conditions,
+                                remove_in_edges=removed_in,
+                                remove_out_edges=removed_out,
+                            ),
+                        )
+
+    def test_batch(self):
+        """Test checking many pairs given the same conditions in one search."""
+        nodes = set(napkin.nodes())
+        for conditions in powerset(nodes, stop=3):
+            with self.subTest(conditions=conditions):
+                matrix = get_m_separation_matrix(napkin, conditions)
+                self.assertEqual(sorted(nodes), list(matrix.index))
+                self.assertEqual(sorted(nodes), list(matrix.columns))
+                for left, right in itt.product(nodes, repeat=2):
+                    self.assertEqual(
+                        are_m_separated(napkin, left, right, conditions=conditions),
+                        matrix.loc[left, right],
+                    )
+                for source in nodes:
+                    self.assertEqual(
+                        {node for node in nodes if matrix.loc[source, node]},
+                        get_m_separated(napkin, source, nodes, conditions=conditions),
+                    )
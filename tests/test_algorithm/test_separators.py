@@ -0,0 +1,121 @@
+"""Test finding minimal and minimum m-separators."""
+
+import itertools as itt
+import unittest
+
+from tests.test_algorithm.cases import iter_small_examples
+from y0.algorithm.conditional_independencies import get_conditional_independencies
+from y0.algorithm.separation.m_separation import are_m_separated
+from y0.algorithm.separation.separators import (
+    find_minimal_separator,
+    find_minimum_separator,
+    minimal_separations,
+)
+from y0.dsl import V1, V2, V3, V4, V5, V6, Z1, Z2, Z3, X, Y
+from y0.examples import napkin
+from y0.graph import NxMixedGraph
+from y0.util.combinatorics import powerset
+
+#: A DAG where {Z3} is the minimum separator of X and Y, but {Z1, Z2} is also minimal
+diamond = NxMixedGraph.from_edges(
+    directed=[(Z1, X), (Z2, X), (Z1, Z3), (Z2, Z3), (Z3, Y)],
+)
+#: An ADMG where V1 and V4 can only be separated by blocking the path of colliders
+#: through the bidirected edges at V2 or V3
+collider_graph = NxMixedGraph.from_edges(
+    directed=[(V1, V2), (V3, V4), (V5, V6), (V2, V5)],
+    undirected=[(V2, V3), (V4, V6)],
+)
+
+
+class TestSeparators(unittest.TestCase):
+    """Test finding minimal and minimum m-separators."""
+
+    def assert_separators(self, graph: NxMixedGraph) -> None:
+        """Check the separators of every pair of nodes against an exhaustive search."""
+        nodes = set(graph.nodes())
+        for left, right in itt.combinations(sorted(nodes), 2):
+            others = nodes - {left, right}
+            for include in powerset(others, stop=2):
+                separators = [
+                    set(conditions)
+                    for conditions in powerset(others)
+                    if set(include) <= set(conditions)
+                    and are_m_separated(graph, left, right, conditions=conditions)
+                ]
+                minimal = find_minimal_separator(graph, left, right, include=include)
+                minimum = find_minimum_separator(graph, left, right, include=include)
+                with self.subTest(left=left, right=right, include=include):
+                    if not separators:
+                        self.assertIsNone(minimal)
+                        self.assertIsNone(minimum)
+                        continue
+                    self.assertIn(minimal, separators)
+                    self.assertFalse(any(separator < minimal for separator in separators))
+                    self.assertIn(minimum, separators)
+                    self.assertEqual(min(map(len, separators)), len(minimum))
+
+    def test_diamond(self):
+        """Test a DAG with minimal separators of different sizes."""
+        self.assertEqual({Z3}, find_minimum_separator(diamond, X, Y))
+        self.assertEqual({Z1, Z2}, find_minimal_separator(diamond, X, Y, include=[Z1]))
+        self.assertEqual({Z1, Z2}, find_minimum_separator(diamond, X, Y, restrict=[Z1, Z2]))
+        self.assertEqual({Z3}, find_minimal_separator(diamond, {X, Z1, Z2}, Y))
+        self.assertIsNone(find_minimal_separator(diamond, X, Y, restrict=[Z1]))
+        self.assertIsNone(find_minimum_separator(diamond, X, Y, include=[Y]))
+        with self.assertRaises(ValueError):
+            find_minimal_separator(diamond, X, Y, include=[Z1], restrict=[Z3])
+        self.assert_separators(diamond)
+
+    def test_collider_path(self):
+        """Test an ADMG with a path of colliders through bidirected edges."""
+        self.assertEqual(set(), find_minimal_separator(collider_graph, V1, V4))
+        self.assertEqual({V2, V3}, find_minimal_separator(collider_graph, V1, V4, include=[V2]))
+        self.assertEqual({V5}, find_minimum_separator(collider_graph, V1, V6))
+        # conditioning on V4 opens the path of colliders, which has to be blocked at V3
+        separator = find_minimum_separator(collider_graph, V1, V6, include=[V4])
+        self.assertEqual(3, len(separator))
+        self.assertIn(V3, separator)
+        self.assert_separators(collider_graph)
+
+    def test_inducing_path(self):
+        """Test that nodes connected by an inducing path don't have a separator."""
+        self.assertIsNone(find_minimal_separator(napkin, Z1, Y))
+        self.assertIsNone(find_minimum_separator(napkin, Z1, Y))
+        self.assert_separators(napkin)
+
+    def test_conditional_independencies(self):
+        """Test that finding separators gets the same pairs as an exhaustive search."""
+        for example in iter_small_examples():
+            graph = example.graph
+            for max_conditions in [None, 2]:
+                with self.subTest(name=example.name, max_conditions=max_conditions):
+                    expected = {
+                        (judgement.left, judgement.right): len(judgement.conditions)
+                        for judgement in get_conditional_independencies(
+                            graph, max_conditions=max_conditions
+                        )
+                    }
+                    judgements = get_conditional_independencies(
+                        graph, max_conditions=max_conditions, strategy="separators"
+                    )
+                    for judgement in judgements:
+                        self.assertTrue(
+                            are_m_separated(
+                                graph,
+                                judgement.left,
+                                judgement.right,
+                                conditions=judgement.conditions,
+                            )
+                        )
+                    self.assertEqual(
+                        expected,
+                        {
+                            (judgement.left, judgement.right): len(judgement.conditions)
+                            for judgement in judgements
+                        },
+                    )
+                    for judgement in minimal_separations(
+                        graph, minimum=False, max_conditions=max_conditions
+                    ):
+                        self.assertIn((judgement.left, judgement.right), expected)
@@ -1,11 +1,14 @@
 """Test sigma separation."""
 
+import itertools as itt
 import unittest
 
 from y0.algorithm.conditional_independencies import are_d_separated
 from y0.algorithm.separation.sigma_separation import (
     are_sigma_separated,
     get_equivalence_classes,
+    get_sigma_connected,
+    get_sigma_separated,
     is_collider,
     is_non_collider_fork,
     is_non_collider_left_chain,
@@ -14,6 +17,7 @@ from y0.algorithm.separation.sigma_separation import (
 )
 from y0.dsl import V1, V2, V3, V4, V5, V6, Variable
 from y0.graph import NxMixedGraph
+from y0.util.combinatorics import powerset
 
 V7, V8 = map(Variable, ["V7", "V8"])
 
@@ -121,3 +125,66 @@ class TestSigmaSeparation(unittest.TestCase):
                     d, are_d_separated(graph, left, right, conditions=conditions).separated
                 )
                 self.assertEqual(s, are_sigma_separated(graph, left, right, conditions=conditions))
+
+    def test_separations_figure_3_paths(self):
+        """Test that checking simple paths up to a cutoff agrees on Table 1."""
+        for left, right, conditions, s in [
+            (V2, V4, [V3, V5], False),
+            (V1, V6, [], True),
+            (V1, V6, [V3, V5], False),
+            (V1, V8, [V4], True),
+        ]:
+            with self.subTest(left=left, right=right, conditions=conditions):
+                self.assertEqual(
+                    s, are_sigma_separated(graph, left, right, conditions=conditions, cutoff=8)
+                )
+
+    def test_batch(self):
+        """Test getting all nodes that are sigma-connected to a node in one search."""
+        nodes = set(graph.nodes())
+        for conditions in powerset(sorted(nodes), stop=3):
+            for source in nodes:
+                with self.subTest(source=source, conditions=conditions):
+                    expected = {
+                        node
+                        for node in nodes
+                        if not are_sigma_separated(
+                            graph, source, node, conditions=conditions, sigma=self.sigma
+                        )
+                    }
+                    self.assertEqual(
+                        expected, get_sigma_connected(graph, source, conditions=conditions)
+                    )
+                    self.assertEqual(
+                        nodes - expected,
+                        get_sigma_separated(graph, source, nodes, conditions=conditions),
+                    )
+
+    def test_parallel_edges(self):
+        """Test a directed edge and a bidirected edge between the same nodes."""
+        parallel = NxMixedGraph.from_edges(
+            directed=[(V2, V1), (V3, V4), (V3, V1)],
+            undirected=[(V4, V2), (V1, V2)],
+        )
+        # V4 <-> V2 -> V1 is open, since V2 is a non-collider
+        self.assertFalse(are_sigma_separated(parallel, V4, V1, conditions=[V3]))
+        # in an acyclic graph, sigma-separation is the same as d-separation
+        for conditions in powerset([V2, V3]):
+            self.assertEqual(
+                are_d_separated(parallel, V4, V1, conditions=conditions).separated,
+                are_sigma_separated(parallel, V4, V1, conditions=conditions),
+            )
+
+    def test_long_feedback_loop(self):
+        """Test a graph whose paths are too many to enumerate."""
+        nodes = [Variable(f"V{i}") for i in range(40)]
+        directed = list(itt.pairwise(nodes))
+        # a feedback loop from the end of the chain back to its middle
+        directed.append((nodes[39], nodes[20]))
+        # shortcuts that make many paths through the loop
+        directed.extend((nodes[i], nodes[i + 2]) for i in range(20, 37, 2))
+        feedback = NxMixedGraph.from_edges(nodes=nodes, directed=directed)
+        # V10 isn't in a cycle, so conditioning on it blocks the chain
+        self.assertTrue(are_sigma_separated(feedback, nodes[0], nodes[39], conditions=[nodes[10]]))
+        # V30 is in the same cycle as its child, so the chain stays open
+        self.assertFalse(are_sigma_separated(feedback, nodes[0], nodes[39], conditions=[nodes[30]]))
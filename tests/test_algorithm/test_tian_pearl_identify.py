@@ -8,9 +8,13 @@
 .. [tian03a] https://ftp.cs.ucla.edu/pub/stat_ser/R290-L.pdf.
 """
 
+import itertools as itt
 import logging
 
+import numpy as np
+
 from tests.test_algorithm import cases
+from y0.algorithm.identify import identify_outcomes
 from y0.algorithm.tian_id import (
     compute_ancestral_set_q_value,
     compute_c_factor,
@@ -18,6 +22,7 @@ from y0.algorithm.tian_id import (
     compute_c_factor_marginalizing_over_topological_successors,
     compute_q_value_of_variables_with_low_topological_ordering_indices,
     identify_district_variables,
+    tian_pearl_identify,
 )
 from y0.algorithm.transport import transport_variable
 from y0.dsl import (
@@ -30,6 +35,8 @@ from y0.dsl import (
     W5,
     X1,
     X2,
+    Z1,
+    Z2,
     Fraction,
     One,
     P,
@@ -38,12 +45,14 @@ from y0.dsl import (
     Product,
     R,
     Sum,
+    Variable,
     W,
     X,
     Y,
     Z,
     Zero,
 )
+from y0.examples import backdoor, napkin
 from y0.graph import NxMixedGraph
 
 # From [correa22a]_, Figure 2a.
@@ -386,6 +395,51 @@ class TestIdentify(cases.GraphTestCase):
         self.assert_expr_equal(result_4, expected_result)
 
 
+class TestTianPearlIdentify(cases.GraphTestCase):
+    """Test identifying whole queries with Tian and Pearl's algorithm."""
+
+    def test_identifiable(self):
+        """Test identifiable queries."""
+        self.assert_expr_equal(
+            Sum[Z](P(Y | X, Z) * P(Z)),
+            tian_pearl_identify(graph=backdoor, treatments=X, outcomes=Y),
+        )
+        # Q[Y] from Q[Z2, X, Y] by Lemma 4 of [tian03a]_. Since Z2 is a collider between
+        # the bidirected edges, this equals P(Y | X), which the ID algorithm finds, but the
+        # district's C-factor keeps the parents of X
+        q = Sum[Z2](P(Z2) * P(X | Z1, Z2) * P(Y | X, Z1, Z2))
+        self.assert_expr_equal(
+            q / Sum[Y](q), tian_pearl_identify(graph=napkin, treatments=X, outcomes=Y)
+        )
+        self.assertEqual(P(Y | X), identify_outcomes(napkin, treatments=X, outcomes=Y))
+
+    def test_unidentifiable(self):
+        """Test that queries are not identifiable when a district fails."""
+        bow_arc = NxMixedGraph.from_edges(directed=[(X, Y)], undirected=[(X, Y)])
+        self.assertIsNone(tian_pearl_identify(graph=bow_arc, treatments=X, outcomes=Y))
+
+    def test_agrees_with_id(self):
+        """Test that queries on random small graphs are identifiable exactly when ID finds them."""
+        rng = np.random.default_rng(0)
+        nodes = [Variable(f"V{i}") for i in range(5)]
+        pairs = list(itt.combinations(nodes, 2))
+        for i in range(100):
+            # the nodes are in topological order, so the graph is acyclic
+            graph = NxMixedGraph.from_edges(
+                nodes=nodes,
+                directed=[pair for pair in pairs if rng.random() < 0.4],
+                undirected=[pair for pair in pairs if rng.random() < 0.3],
+            )
+            treatment, outcome = sorted(rng.choice(len(nodes), size=2, replace=False))
+            treatments, outcomes = nodes[treatment], nodes[outcome]
+            with self.subTest(i=i, treatments=treatments, outcomes=outcomes):
+                self.assertEqual(
+                    identify_outcomes(graph, treatments=treatments, outcomes=outcomes) is None,
+                    tian_pearl_identify(graph=graph, treatments=treatments, outcomes=outcomes)
+                    is None,
+                )
+
+
 class TestComputeCFactor(cases.GraphTestCase):
     """Test the "compute_c_factor" subroutine of Tian and Pearl's identify algorithm as implemented by [tikka20a].
 
@@ -409,6 +463,16 @@ class TestComputeCFactor(cases.GraphTestCase):
         [expected_result_2_part_1, expected_result_2_part_2, expected_result_2_part_3]
     )
 
+    def test_compute_c_factor_memo(self):
+        """Test that C factors are memoized for the same district and Q value."""
+        kwargs = {
+            "district": [W1, X, Y],
+            "subgraph_variables": [W1, W2, X, Y],
+            "subgraph_probability": Sum.safe(self.expected_result_1, [W3]),
+            "graph_topo": list(tian_pearl_figure_9a_graph.topological_sort()),
+        }
+        self.assertIs(compute_c_factor(**kwargs), compute_c_factor(**kwargs))
+
     def test_compute_c_factor_1(self):
         """First test of the compute C factor subroutine, based on the example on page 29 of [tian03a]."""
         result_1 = compute_c_factor(
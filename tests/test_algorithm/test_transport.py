@@ -1,14 +1,18 @@
 """Unit tests for transport."""
 
 import unittest
+from unittest import mock
 
+from y0.algorithm import transport
 from y0.algorithm.transport import (
     TransportQuery,
     TRSOQuery,
     activate_domain_and_interventions,
+    all_transports_d_separated,
     create_transport_diagram,
     get_nodes_to_transport,
     identify_target_outcomes,
+    is_transport_node,
     surrogate_to_transport,
     transport_variable,
     trso,
@@ -32,6 +36,7 @@ from y0.dsl import (
     Pi1,
     Pi2,
     Pi3,
+    Population,
     PopulationProbability,
     Probability,
     Product,
@@ -46,6 +51,7 @@ from y0.dsl import (
 from y0.examples import tikka_trso_figure_8_graph as tikka_trso_figure_8
 from y0.graph import NxMixedGraph
 from y0.mutate import canonicalize, fraction_expand
+from y0.util.combinatorics import powerset
 
 tikka_trso_figure_8_transport = {
     X1: [Pi1],
@@ -474,6 +480,22 @@ class TestTransport(_TestCase):
 
         self.assertEqual(expected, actual)
 
+    def test_all_transports_d_separated(self):
+        """Test that both d-separation backends agree when checking transportability nodes."""
+        for graph in [graph_1, graph_2]:
+            nodes = {node for node in graph.nodes() if not is_transport_node(node)}
+            for interventions in powerset(nodes, stop=2):
+                for outcome in nodes - set(interventions):
+                    if any(node not in graph.remove_in_edges(interventions) for node in nodes):
+                        continue  # remove_in_edges() drops isolated nodes
+                    with self.subTest(interventions=interventions, outcome=outcome):
+                        self.assertEqual(
+                            all_transports_d_separated(
+                                graph, set(interventions), {outcome}, backend="moral"
+                            ),
+                            all_transports_d_separated(graph, set(interventions), {outcome}),
+                        )
+
     def test_trso_line6(self):
         """Test that trso_line6 builds a dictionary of domains and modified queries."""
         query = TRSOQuery(
@@ -662,6 +684,21 @@ class TestTransport(_TestCase):
 
         self.assertEqual(line10_expected1, line10_actual1)
 
+        # the product is built in topological order, so it doesn't need canonicalizing
+        district2 = {Y2, W, X1}
+        expected_expression = Product.safe(
+            PopulationProbability(
+                population=Pi2,
+                distribution=node | ordering[: ordering.index(node)],
+            )
+            for node in ordering
+            if node in district2
+        )
+        with mock.patch.object(transport, "canonicalize") as mock_canonicalize:
+            line10_actual2 = trso_line10(line10_query1, district2, new_surrogate_interventions)
+        mock_canonicalize.assert_not_called()
+        self.assertEqual(expected_expression, line10_actual2.expression)
+
 
 class TestIntegration(_TestCase):
     """Test integration over the whole workflow."""
@@ -863,6 +900,219 @@ class TestIntegration(_TestCase):
             surrogate_interventions={Pi1: {X1}, Pi2: {X2}},
         )
         self.assert_expr_equal(expected_estimand, actual_estimand)
+        self.assertEqual(canonicalize(actual_estimand), actual_estimand)
+
+    def test_transport_raw(self):
+        """Test that canonicalization of the estimand can be turned off."""
+        kwargs = {
+            "target_outcomes": {Y1, Y2},
+            "target_interventions": {X1, X2},
+            "surrogate_outcomes": {Pi1: {Y1}, Pi2: {Y2}},
+            "surrogate_interventions": {Pi1: {X1}, Pi2: {X2}},
+        }
+        estimand = identify_target_outcomes(tikka_trso_figure_8, **kwargs)
+        raw_estimand = identify_target_outcomes(tikka_trso_figure_8, **kwargs, canonical=False)
+        self.assertIsNotNone(raw_estimand)
+        self.assertEqual(estimand, canonicalize(raw_estimand))
+
+    def test_transport_canonicalize_once(self):
+        """Test that the estimand is only canonicalized once, not on every line of TRSO."""
+        with mock.patch.object(
+            transport, "canonicalize", side_effect=transport.canonicalize
+        ) as mock_canonicalize:
+            estimand = identify_target_outcomes(
+                tikka_trso_figure_8,
+                target_outcomes={Y1, Y2},
+                target_interventions={X1, X2},
+                surrogate_outcomes={Pi1: {Y1}, Pi2: {Y2}},
+                surrogate_interventions={Pi1: {X1}, Pi2: {X2}},
+            )
+        self.assertIsNotNone(estimand)
+        self.assertEqual(1, mock_canonicalize.call_count)
+
+    def test_transport_partial_canonicalization(self):
+        """Test problems that failed on line 7 when sub-expressions were canonicalized.
+
+        Canonicalizing the result of each line marginalized some sub-expressions down
+        to only the active interventions, so line 7 raised a :class:`ValueError`.
+        """
+        v0, v1, v2, v3, v4, v5, v6, v7, v8, v9 = (Variable(f"V{i}") for i in range(10))
+        pi0, pi1, pi2, pi3, pi4 = (Population(f"pi{i}") for i in range(5))
+        problems = [
+            (
+                NxMixedGraph.from_edges(
+                    nodes=[v0, v1, v2, v3, v4, v5, v6],
+                    directed=[
+                        (v0, v4),
+                        (v1, v3),
+                        (v1, v4),
+                        (v1, v6),
+                        (v2, v4),
+                        (v2, v5),
+                        (v4, v6),
+                    ],
+                    undirected=[(v1, v6)],
+                ),
+                {v6},
+                {v0, v5},
+                {pi0: {v3, v6}, pi1: {v4, v6}, pi2: {v2, v4, v6}, pi3: {v2, v4, v6}},
+                {pi0: {v2}, pi1: {v0}, pi2: {v2}, pi3: {v2}},
+            ),
+            (
+                NxMixedGraph.from_edges(
+                    directed=[
+                        (v0, v2),
+                        (v0, v6),
+                        (v0, v8),
+                        (v1, v4),
+                        (v1, v6),
+                        (v2, v3),
+                        (v2, v4),
+                        (v2, v5),
+                        (v2, v6),
+                        (v2, v8),
+                        (v3, v4),
+                        (v3, v6),
+                        (v4, v6),
+                        (v5, v7),
+                        (v5, v8),
+                        (v6, v8),
+                    ],
+                    undirected=[(v0, v8), (v1, v2), (v2, v6)],
+                ),
+                {v8},
+                {v4, v6},
+                {pi0: {v8}},
+                {pi0: {v6}},
+            ),
+            (
+                NxMixedGraph.from_edges(
+                    directed=[
+                        (v0, v2),
+                        (v1, v4),
+                        (v1, v6),
+                        (v2, v4),
+                        (v2, v5),
+                        (v3, v6),
+                        (v4, v7),
+                    ],
+                    undirected=[(v1, v7)],
+                ),
+                {v7},
+                {v0, v2},
+                {pi0: {v1, v7}},
+                {pi0: {v2}},
+            ),
+            (
+                NxMixedGraph.from_edges(
+                    directed=[
+                        (v1, v7),
+                        (v2, v3),
+                        (v2, v4),
+                        (v2, v6),
+                        (v2, v7),
+                        (v3, v4),
+                        (v3, v5),
+                        (v4, v7),
+                        (v5, v7),
+                        (v6, v7),
+                    ],
+                    undirected=[(v0, v2), (v0, v7), (v2, v7)],
+                ),
+                {v7},
+                {v0, v6},
+                {pi0: {v3, v4, v7}, pi1: {v3, v7}, pi2: {v1, v5, v7}, pi3: {v7}},
+                {pi0: {v1}, pi1: {v0}, pi2: {v0}, pi3: {v5}},
+            ),
+            (
+                NxMixedGraph.from_edges(
+                    directed=[
+                        (v0, v3),
+                        (v0, v4),
+                        (v0, v6),
+                        (v1, v4),
+                        (v1, v9),
+                        (v2, v4),
+                        (v2, v6),
+                        (v2, v7),
+                        (v2, v8),
+                        (v3, v4),
+                        (v3, v5),
+                        (v3, v6),
+                        (v3, v9),
+                        (v4, v9),
+                        (v5, v8),
+                        (v6, v7),
+                        (v8, v9),
+                    ],
+                    undirected=[(v0, v9), (v1, v4), (v2, v9), (v5, v6)],
+                ),
+                {v9},
+                {v7, v8},
+                {
+                    pi0: {v9},
+                    pi1: {v2, v9},
+                    pi2: {v0, v4, v9},
+                    pi3: {v3, v5, v9},
+                    pi4: {v3, v9},
+                },
+                {pi0: {v3}, pi1: {v2}, pi2: {v5}, pi3: {v5}, pi4: {v5}},
+            ),
+        ]
+        for (
+            graph,
+            target_outcomes,
+            target_interventions,
+            surrogate_outcomes,
+            surrogate_interventions,
+        ) in problems:
+            with self.subTest(target_interventions=target_interventions):
+                estimand = identify_target_outcomes(
+                    graph,
+                    target_outcomes=target_outcomes,
+                    target_interventions=target_interventions,
+                    surrogate_outcomes=surrogate_outcomes,
+                    surrogate_interventions=surrogate_interventions,
+                )
+                self.assertIsNotNone(estimand)
+                self.assertEqual(canonicalize(estimand), estimand)
+
+    def test_transport_memo(self):
+        """Test that subquery results can be shared between queries."""
+        kwargs = {
+            "target_outcomes": {Y1, Y2},
+            "target_interventions": {X1, X2},
+            "surrogate_outcomes": {Pi1: {Y1}, Pi2: {Y2}},
+            "surrogate_interventions": {Pi1: {X1}, Pi2: {X2}},
+        }
+        expected = identify_target_outcomes(tikka_trso_figure_8, **kwargs)
+        memo = {}
+        self.assertEqual(
+            expected, identify_target_outcomes(tikka_trso_figure_8, **kwargs, memo=memo)
+        )
+        self.assertLess(0, len(memo))
+
+        # poison the memo to check it's used on the second call
+        poisoned = dict.fromkeys(memo, Zero())
+        self.assertEqual(
+            Zero(), identify_target_outcomes(tikka_trso_figure_8, **kwargs, memo=poisoned)
+        )
+
+    def test_transport_fingerprints(self):
+        """Test that each graph is only fingerprinted once per query."""
+        with mock.patch.object(
+            NxMixedGraph, "fingerprint", autospec=True, side_effect=NxMixedGraph.fingerprint
+        ) as mock_fingerprint:
+            estimand = identify_target_outcomes(
+                tikka_trso_figure_8,
+                target_outcomes={Y1, Y2},
+                target_interventions={X1, X2},
+                surrogate_outcomes={Pi1: {Y1}, Pi2: {Y2}},
+                surrogate_interventions={Pi1: {X1}, Pi2: {X2}},
+            )
+        self.assertIsNotNone(estimand)
+        graph_ids = [id(call.args[0]) for call in mock_fingerprint.call_args_list]
+        self.assertEqual(len(set(graph_ids)), len(graph_ids))
 
     def test_transport_2(self):
         """Test that transport returns the correct expression."""
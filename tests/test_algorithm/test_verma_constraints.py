@@ -0,0 +1,114 @@
+"""Test finding Verma constraints without R."""
+
+import unittest
+
+import networkx as nx
+import pyparsing
+
+from y0.algorithm.verma_constraints import clear_verma_constraints_cache, get_verma_constraints
+from y0.dsl import V1, V2, V3, V4, P, Q, Sum, Variable
+from y0.examples import (
+    backdoor,
+    examples,
+    frontdoor,
+    identifiability_2_example,
+    napkin_example,
+    verma_1,
+)
+from y0.graph import NxMixedGraph
+from y0.struct import VermaConstraint
+
+try:
+    from y0.causaleffect import r_get_verma_constraints
+    from y0.r_utils import CAUSALEFFECT, IGRAPH, prepare_renv
+except ImportError:  # rpy2 is not installed
+    missing_rpy2 = True
+else:
+    missing_rpy2 = False
+
+u_1 = Variable("u_1")
+
+
+class TestVermaConstraints(unittest.TestCase):
+    """Test finding Verma constraints without R."""
+
+    def setUp(self) -> None:
+        """Start each test with an empty cache."""
+        clear_verma_constraints_cache()
+
+    def test_verma_1(self):
+        """Test getting the single Verma constraint from the Figure 1A graph."""
+        self.assertEqual(
+            [
+                VermaConstraint(
+                    lhs_cfactor=Sum[V2](Q[V2, V4](V1, V2, V3, V4)),
+                    lhs_expr=Sum[V2](P(V4 | (V1, V2, V3)) * P(V2 | V1)),
+                    rhs_cfactor=Q[V4](V3, V4),
+                    rhs_expr=Sum[u_1, V3](P(V4 | u_1 | V3) * P(V3) * P(u_1)),
+                    variables=(V1,),
+                )
+            ],
+            get_verma_constraints(verma_1),
+        )
+
+    def test_examples(self):
+        """Test the constraints found by ``causaleffect`` on the examples."""
+        self.assertEqual(
+            napkin_example.verma_constraints, get_verma_constraints(napkin_example.graph)
+        )
+
+        # causaleffect drops the sum over Z2 in the left hand side expression of the first
+        constraints = get_verma_constraints(identifiability_2_example.graph)
+        self.assertEqual(2, len(constraints))
+        for expected in identifiability_2_example.verma_constraints or []:
+            with self.subTest(variables=expected.variables):
+                self.assertIn(
+                    expected._replace(lhs_expr=None),
+                    [constraint._replace(lhs_expr=None) for constraint in constraints],
+                )
+
+    def test_no_constraints(self):
+        """Test graphs without Verma constraints."""
+        for graph in [backdoor, frontdoor, NxMixedGraph.from_edges(undirected=[(V1, V2)])]:
+            with self.subTest(graph=graph):
+                self.assertEqual([], get_verma_constraints(graph))
+
+    def test_cache(self):
+        """Test that equal graphs share constraints and the cache can be cleared."""
+        constraints = get_verma_constraints(verma_1)
+        constraints.clear()
+        self.assertEqual(1, len(get_verma_constraints(verma_1.copy())))
+        clear_verma_constraints_cache()
+        self.assertEqual(1, len(get_verma_constraints(verma_1)))
+
+
+@unittest.skipIf(missing_rpy2, "rpy2 is not installed")
+class TestAgainstCausalEffect(unittest.TestCase):
+    """Test finding Verma constraints without R against ``causaleffect``."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Make sure the R packages are installed."""
+        try:
+            prepare_renv([CAUSALEFFECT, IGRAPH])
+        except Exception as e:  # noqa:BLE001
+            raise unittest.SkipTest(f"R packages not properly installed.\n\n{e}") from None
+
+    def test_examples(self):
+        """Test that the same constraints are found as by ``causaleffect`` on the examples."""
+        for example in examples:
+            if not nx.is_directed_acyclic_graph(example.graph.directed):
+                continue
+            with self.subTest(name=example.name):
+                try:
+                    expected = r_get_verma_constraints(example.graph)
+                except pyparsing.ParseException:
+                    continue
+                # causaleffect sometimes drops sums in the left hand side expression
+                self.assertEqual(
+                    {constraint._replace(lhs_expr=None) for constraint in expected},
+                    {
+                        constraint._replace(lhs_expr=None)
+                        for constraint in get_verma_constraints(example.graph)
+                    },
+                )
@@ -12,6 +12,7 @@ from y0.graph import (
     DEFAULT_TAG,
     DEFULT_PREFIX,
     NxMixedGraph,
+    TopologicalIndex,
     get_nodes_in_directed_paths,
     is_a_fixable,
     is_markov_blanket_shielded,
@@ -295,6 +296,39 @@ class TestGraph(unittest.TestCase):
         g2_y0_pre = {node.name for node in g2_y0_pre}
         self.assertEqual(g2_y0_pre, g2_ananke_pre)
 
+    def test_topological_index(self):
+        """Test looking up predecessors in a topological index."""
+        graph = NxMixedGraph.from_edges(directed=[(X, Y), (Y, Z)], undirected=[(X, Z)])
+        index = graph.topological_index()
+        self.assertIsInstance(index, TopologicalIndex)
+        self.assertEqual((X, Y, Z), index.ordering)
+        self.assertEqual(3, len(index))
+        self.assertIn(Y, index)
+        self.assertNotIn(A, index)
+        self.assertEqual(2, index.index(Z))
+        self.assertEqual((), index.predecessors(X))
+        self.assertEqual((X, Y), index.predecessors(Z))
+        self.assertEqual(graph.pre(Z), list(index.predecessors(Z)))
+        with self.assertRaises(KeyError):
+            index.predecessors(A)
+
+        self.assertEqual((X, Z), index.exclude({Y}).ordering)
+        self.assertEqual((X, Z), index.restrict({X, Z}).ordering)
+        self.assertEqual((X,), index.exclude({Y}).predecessors(Z))
+
+    def test_fingerprint(self):
+        """Test that the fingerprint doesn't depend on insertion order."""
+        graph = NxMixedGraph.from_edges(directed=[(X, Y), (Y, Z)], undirected=[(X, Z)])
+        same = NxMixedGraph.from_edges(directed=[(Y, Z), (X, Y)], undirected=[(Z, X)])
+        self.assertEqual(graph.fingerprint(), same.fingerprint())
+        self.assertEqual(napkin.fingerprint(), napkin.copy().fingerprint())
+        for other in [
+            NxMixedGraph.from_edges(directed=[(X, Y), (Y, Z)]),
+            NxMixedGraph.from_edges(directed=[(X, Y), (Y, Z), (X, Z)]),
+            NxMixedGraph.from_edges(nodes=[A], directed=[(X, Y), (Y, Z)], undirected=[(X, Z)]),
+        ]:
+            self.assertNotEqual(graph.fingerprint(), other.fingerprint())
+
 
 class TestFixability(unittest.TestCase):
     """A test case for fixability in estimation workflows and tools."""